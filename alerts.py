@@ -1,83 +1,141 @@
-import sqlite3
 from datetime import datetime
+import json
+import threading
+from bisect import bisect_left, bisect_right, insort
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from database import get_connection, on_commit, track_versions, transaction
+
+class AlertIndex:
+    """In-memory index των ενεργών alerts ανά νόμισμα.
+    
+    Για κάθε coin κρατάμε δύο ταξινομημένες λίστες (target_price, alert_id),
+    μία για 'above' και μία για 'below'. Με ένα bisect βρίσκουμε όσα
+    ενεργοποιούνται: O(log n + k) ανά coin για k alerts.
+    """
+    
+    def __init__(self):
+        self.above = {}    # coin -> [(target, id), ...] ταξινομημένα
+        self.below = {}
+        self.alerts = {}   # id -> (email, coin, target, condition)
+        self.lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self.alerts)
+    
+    def load(self, alerts):
+        """Ξαναχτίζει το index από (id, email, coin, target, condition)"""
+        above, below, by_id = {}, {}, {}
+        for alert_id, email, coin, target, condition in alerts:
+            side = above if condition == 'above' else below if condition == 'below' else None
+            if side is None:
+                continue
+            side.setdefault(coin, []).append((target, alert_id))
+            by_id[alert_id] = (email, coin, target, condition)
+        
+        for entries in list(above.values()) + list(below.values()):
+            entries.sort()
+        
+        with self.lock:
+            self.above, self.below, self.alerts = above, below, by_id
+    
+    def add(self, alert_id, email, coin, target, condition):
+        side = self.above if condition == 'above' else self.below if condition == 'below' else None
+        if side is None:
+            return
+        with self.lock:
+            insort(side.setdefault(coin, []), (target, alert_id))
+            self.alerts[alert_id] = (email, coin, target, condition)
+    
+    def remove(self, alert_id):
+        with self.lock:
+            alert = self.alerts.pop(alert_id, None)
+            if alert is None:
+                return
+            _, coin, target, condition = alert
+            entries = (self.above if condition == 'above' else self.below).get(coin, [])
+            i = bisect_left(entries, (target, alert_id))
+            if i < len(entries) and entries[i] == (target, alert_id):
+                del entries[i]
+    
+    def match(self, current_prices):
+        """Τα alerts που ενεργοποιούνται με τις τρέχουσες τιμές"""
+        triggered = []
+        with self.lock:
+            for coin, price in current_prices.items():
+                # above: target <= price -> το prefix της λίστας
+                entries = self.above.get(coin)
+                if entries:
+                    end = bisect_right(entries, (price, float('inf')))
+                    for target, alert_id in entries[:end]:
+                        triggered.append((alert_id, self.alerts[alert_id][0], coin, price, target, 'above'))
+                
+                # below: target >= price -> το suffix της λίστας
+                entries = self.below.get(coin)
+                if entries:
+                    start = bisect_left(entries, (price, float('-inf')))
+                    for target, alert_id in entries[start:]:
+                        triggered.append((alert_id, self.alerts[alert_id][0], coin, price, target, 'below'))
+        
+        return triggered
 
 class AlertSystem:
-    def __init__(self, db_path='crypto_prices.db'):
+    def __init__(self, db_path=None):
         self.db_path = db_path
+        self.index = AlertIndex()
         self.init_alerts_table()
+        self.reload_index()
     
     def init_alerts_table(self):
         """Δημιουργεί πίνακα για alerts"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS alerts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email TEXT NOT NULL,
-                coin_name TEXT NOT NULL,
-                target_price REAL NOT NULL,
-                condition TEXT NOT NULL,  -- 'above' or 'below'
-                active BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_triggered TIMESTAMP
-            )
-        ''')
+        with transaction(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS alerts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    email TEXT NOT NULL,
+                    coin_name TEXT NOT NULL,
+                    target_price REAL NOT NULL,
+                    condition TEXT NOT NULL,  -- 'above' or 'below'
+                    active BOOLEAN DEFAULT 1,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_triggered TIMESTAMP
+                )
+            ''')
+            track_versions(conn, 'alerts', 'alerts')
         
-        conn.commit()
-        conn.close()
         print("✅ Alerts table initialized")
     
+    def reload_index(self):
+        """Φορτώνει όλα τα ενεργά alerts στο in-memory index"""
+        self.index.load(self.get_active_alerts())
+    
     def add_alert(self, email, coin_name, target_price, condition):
         """Προσθέτει νέο alert"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('''
-            INSERT INTO alerts (email, coin_name, target_price, condition)
-            VALUES (?, ?, ?, ?)
-        ''', (email, coin_name, target_price, condition))
-        
-        conn.commit()
-        alert_id = c.lastrowid
-        conn.close()
+        with transaction(self.db_path) as conn:
+            c = conn.execute('''
+                INSERT INTO alerts (email, coin_name, target_price, condition)
+                VALUES (?, ?, ?, ?)
+            ''', (email, coin_name, target_price, condition))
+            alert_id = c.lastrowid
         
+        self.index.add(alert_id, email, coin_name, target_price, condition)
         print(f"✅ Alert added for {coin_name} at ${target_price}")
         return alert_id
     
     def get_active_alerts(self):
         """Παίρνει όλα τα ενεργά alerts"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('''
+        c = get_connection(self.db_path).execute('''
             SELECT id, email, coin_name, target_price, condition
             FROM alerts
             WHERE active = 1
         ''')
         
-        alerts = c.fetchall()
-        conn.close()
-        return alerts
+        return c.fetchall()
     
     def check_alerts(self, current_prices):
-        """Ελέγχει ποια alerts ενεργοποιούνται"""
-        triggered = []
-        alerts = self.get_active_alerts()
-        
-        for alert_id, email, coin, target, condition in alerts:
-            if coin in current_prices:
-                price = current_prices[coin]
-                
-                if condition == 'above' and price >= target:
-                    triggered.append((alert_id, email, coin, price, target, 'above'))
-                elif condition == 'below' and price <= target:
-                    triggered.append((alert_id, email, coin, price, target, 'below'))
-        
-        return triggered
+        """Ελέγχει ποια alerts ενεργοποιούνται (από το in-memory index)"""
+        return self.index.match(current_prices)
     
     def send_email_alert(self, to_email, coin_name, current_price, target_price, condition):
         """Στέλνει email alert"""
@@ -105,14 +163,101 @@ class AlertSystem:
     
     def deactivate_alert(self, alert_id):
         """Απενεργοποιεί alert που ενεργοποιήθηκε"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        with transaction(self.db_path) as conn:
+            conn.execute('''
+                UPDATE alerts 
+                SET active = 0, last_triggered = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (alert_id,))
+        
+        self.index.remove(alert_id)
+    
+    def deactivate_alerts(self, alert_ids):
+        """Απενεργοποιεί πολλά alerts σε ένα transaction.
+        
+        Είναι και το claim τους: κάθε worker (process) βλέπει τα ίδια alerts
+        να ενεργοποιούνται, αλλά μόνο ένας τα βρίσκει ακόμα active. Επιστρέφει
+        τα ids που απενεργοποίησε αυτό το call - μόνο γι' αυτά στέλνουμε email.
+        """
+        if not alert_ids:
+            return []
+        with transaction(self.db_path) as conn:
+            # Ένα statement για όλα (json_each: χωρίς όριο στον αριθμό των parameters)
+            claimed = [row[0] for row in conn.execute('''
+                UPDATE alerts
+                SET active = 0, last_triggered = CURRENT_TIMESTAMP
+                WHERE id IN (SELECT value FROM json_each(?)) AND active = 1
+                RETURNING id
+            ''', (json.dumps(list(alert_ids)),))]
+            
+            # Τα claimed φεύγουν από το index μόνο αν γίνει commit (μπορεί να είμαστε
+            # σε εξωτερικό transaction· σε rollback τα ξαναπιάνει το επόμενο tick)
+            on_commit(lambda: [self.index.remove(alert_id) for alert_id in claimed], self.db_path)
+        # Τα υπόλοιπα τα απενεργοποίησε (ή τα έσβησε) άλλος worker, σε transaction που
+        # έχει ήδη γίνει commit: φεύγουν τώρα, αλλιώς θα ξαναβγαίνουν σε κάθε tick
+        for alert_id in set(alert_ids).difference(claimed):
+            self.index.remove(alert_id)
+        return claimed
+    
+    def delete_alert(self, alert_id):
+        """Διαγράφει ένα alert - επιστρέφει False αν δεν υπάρχει"""
+        with transaction(self.db_path) as conn:
+            c = conn.execute('DELETE FROM alerts WHERE id = ?', (alert_id,))
+            deleted = c.rowcount > 0
         
-        c.execute('''
-            UPDATE alerts 
-            SET active = 0, last_triggered = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (alert_id,))
+        self.index.remove(alert_id)
+        return deleted
+
+def benchmark(count=1000000, coins=20, rounds=10):
+    """Χρόνος του check_alerts με count συνθετικά alerts (index vs πλήρες scan)"""
+    import os
+    import random
+    import time
+    from benchtools import temp_database
+    
+    coin_names = [f'coin-{i}' for i in range(coins)]
+    rng = random.Random(42)
+    
+    # Όπως στην πράξη: 'above' πάνω από την τρέχουσα τιμή (100k), 'below' κάτω από αυτή
+    def random_target():
+        if rng.random() < 0.5:
+            return rng.uniform(100000, 200000), 'above'
+        return rng.uniform(0, 100000), 'below'
+    
+    with temp_database('alerts-bench-') as directory:
+        db_path = os.path.join(directory, 'bench.db')
+        system = AlertSystem(db_path)
+        with transaction(db_path) as conn:
+            conn.executemany('''
+                INSERT INTO alerts (email, coin_name, target_price, condition)
+                VALUES (?, ?, ?, ?)
+            ''', ((f'user{i}@example.com', rng.choice(coin_names), *target)
+                  for i, target in enumerate(random_target() for _ in range(count))))
+        
+        start = time.perf_counter()
+        system.reload_index()
+        print(f"⏱️ Loaded {len(system.index)} alerts into the index in {time.perf_counter() - start:.2f}s")
         
-        conn.commit()
-        conn.close()
\ No newline at end of file
+        # Κινήσεις ±1% γύρω από την τρέχουσα τιμή
+        ticks = [{coin: 100000 * rng.uniform(0.99, 1.01) for coin in coin_names}
+                 for _ in range(rounds)]
+        
+        start = time.perf_counter()
+        fired = sum(len(system.check_alerts(prices)) for prices in ticks)
+        indexed = (time.perf_counter() - start) / rounds
+        
+        start = time.perf_counter()
+        for prices in ticks:
+            [a for a in system.get_active_alerts() if a[2] in prices and
+             ((a[4] == 'above' and prices[a[2]] >= a[3]) or (a[4] == 'below' and prices[a[2]] <= a[3]))]
+        scan = (time.perf_counter() - start) / rounds
+        
+        print(f"⏱️ {count} alerts, {coins} coins: index {indexed * 1000:.2f}ms/tick, "
+              f"full scan {scan * 1000:.0f}ms/tick ({fired / rounds:.0f} fired/tick)")
+
+if __name__ == "__main__":
+    import sys
+    
+    # python alerts.py bench [count]
+    if len(sys.argv) > 1 and sys.argv[1] == 'bench':
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 1000000)
\ No newline at end of file
@@ -1,57 +1,96 @@
-from flask import Flask, jsonify, render_template, request
-from database import get_latest_prices, init_db
+from flask import Flask, Response, jsonify, render_template, request
+from database import bump_versions, get_data_versions, init_db, transaction
 import json
-from datetime import datetime
+import sys
+import time
+from datetime import datetime, timedelta
 from alerts import AlertSystem
-from apscheduler.schedulers.background import BackgroundScheduler
+from notifications import AlertOutbox
 import atexit
-import sqlite3
-from trading import TradingBot
+from trading import (DEFAULT_ACCOUNT, TRANSACTIONS_MAX_PAGE, TRANSACTIONS_PAGE, TradingBot,
+                     parse_transaction_cursor, transaction_cursor)
+from stream import PriceBroadcaster
+from charts import ChartCache, MAX_SOURCE_POINTS, downsample
+from export import FORMATS, export_coins, stream_export
+from httpcache import ResponseCache
+from indicators import DEFAULT_RESOLUTION, INDICATOR_WINDOWS, IndicatorEngine
+from portfolio import PortfolioEngine, get_net_worth_history
+from pricecache import PriceCache
+from priceboard import price_board
+from ticks import tick_bus
 
 app = Flask(__name__)
 
-def check_alerts_job():
-    """Background job για έλεγχο alerts"""
+HISTORY_TAIL = 20           # Σημεία του /api/history χωρίς διάστημα (τα τελευταία raw ticks)
+MAX_BATCH_COINS = 50        # Νομίσματα ανά /api/history?coins= και /api/dashboard
+
+def check_alerts_on_tick(timestamp, current_prices):
+    """Έλεγχος alerts για κάθε νέο tick (subscriber στο tick bus)"""
     with app.app_context():
         try:
-            # Παίρνουμε τελευταίες τιμές
-            from database import get_latest_prices
-            prices = get_latest_prices()
-            
-            current_prices = {}
-            for coin_name, price, _ in prices:
-                current_prices[coin_name] = price
-            
-            # Ελέγχουμε alerts
+            # Ελέγχουμε alerts μόνο για τα νομίσματα του tick
             triggered = alert_system.check_alerts(current_prices)
             
-            for alert_id, email, coin, price, target, condition in triggered:
-                alert_system.send_email_alert(email, coin, price, target, condition)
-                alert_system.deactivate_alert(alert_id)
-                
+            # Απενεργοποίηση και ουρά των emails σε ένα transaction· την αποστολή
+            # την κάνουν οι workers του outbox, όχι το thread του tick bus.
+            # Κάθε worker βλέπει το ίδιο tick: email μόνο για όσα alerts
+            # απενεργοποίησε αυτός (τα υπόλοιπα τα πήρε άλλος worker)
             if triggered:
-                print(f"🎯 Triggered {len(triggered)} alerts at {datetime.now()}")
+                with transaction(immediate=True):
+                    claimed = set(alert_system.deactivate_alerts([alert[0] for alert in triggered]))
+                    triggered = [alert for alert in triggered if alert[0] in claimed]
+                    messages = alert_outbox.enqueue(triggered) if triggered else 0
                 
+                if triggered:
+                    print(f"🎯 Triggered {len(triggered)} alerts ({messages} emails queued) at {datetime.now()}")
+        
         except Exception as e:
             print(f"❌ Error in alert job: {e}")
 
 # Initialize alert system
 alert_system = AlertSystem()
+# Ουρά αποστολής των alert emails (workers + SMTP pool)
+alert_outbox = AlertOutbox()
 # Initialize trading bot
 trading_bot = TradingBot()
-
-# Background scheduler για έλεγχο alerts κάθε λεπτό
-scheduler = BackgroundScheduler()
-scheduler.add_job(func=check_alerts_job, trigger="interval", seconds=60)
-scheduler.start()
-
-# Σταμάτα scheduler όταν κλείνει η εφαρμογή
-atexit.register(lambda: scheduler.shutdown())
+# Mark-to-market του portfolio στη μνήμη (ticks + trades, χωρίς queries ανά request)
+portfolio_engine = PortfolioEngine(trading_bot)
+# Κοινό SSE broadcast των τιμών για όλα τα dashboards
+price_broadcaster = PriceBroadcaster()
+# Cache για downsampled ιστορικό (ανά coin, διάστημα, points)
+chart_cache = ChartCache()
+# Τα πρόσφατα ticks κάθε νομίσματος στη μνήμη (για /api/prices και /api/history)
+price_cache = PriceCache()
+# ETag/304 και έτοιμα (συμπιεσμένα) σώματα για τα GET endpoints, ανά version δεδομένων
+# (τα versions είναι στη βάση, κοινά για όλους τους workers)
+response_cache = ResponseCache(get_data_versions)
+# Τεχνικοί δείκτες ανά ανάλυση (φορτώνονται στο πρώτο request, ενημερώνονται σε κάθε tick)
+indicator_engines = {resolution: IndicatorEngine(resolution) for resolution in INDICATOR_WINDOWS}
 
 # Αρχικοποίηση βάσης δεδομένων όταν ξεκινάει η εφαρμογή
 # Αυτό είναι το νέο τρόπο αντί για before_first_request
 with app.app_context():
     init_db()
+    price_cache.load()
+    portfolio_engine.load()
+
+# Τα alerts ελέγχονται μόλις φτάσει κάθε tick, όχι κάθε 60 δευτερόλεπτα.
+# Ο watcher πιάνει τα ticks όταν ο fetcher τρέχει σε άλλο process.
+tick_bus.subscribe(price_cache.on_tick)
+tick_bus.subscribe(check_alerts_on_tick)
+tick_bus.subscribe(portfolio_engine.on_tick)
+for engine in indicator_engines.values():
+    tick_bus.subscribe(engine.on_tick)
+# Trades και υπόλοιπα που άλλαξαν άλλα processes (ο watcher βλέπει κάθε commit τους)
+tick_bus.on_change(portfolio_engine.sync)
+tick_bus.start_watcher()
+alert_outbox.start()
+
+# Σταμάτα τα background threads όταν κλείνει η εφαρμογή
+atexit.register(lambda: price_broadcaster.stop())
+atexit.register(lambda: tick_bus.stop())
+atexit.register(lambda: alert_outbox.stop())
+atexit.register(lambda: trading_bot.stop())
 
 # Βασική σελίδα - απλά εμφανίζει μήνυμα
 @app.route('/')
@@ -62,32 +101,168 @@ def home():
 def dashboard():
     return render_template('index.html')
 
+def fixed_range():
+    """Το διάστημα δεν εξαρτάται από την ώρα του request (χωρίς 'to' τελειώνει στο "τώρα")"""
+    return 'to' in request.args
+
 # Trading endpoints
+def request_account_id(data=None):
+    """Το account_id του request (JSON body ή query string)· DEFAULT_ACCOUNT αν λείπει"""
+    value = (data or {}).get('account_id', request.args.get('account_id', DEFAULT_ACCOUNT))
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def account_error(account_id):
+    """Η απάντηση για account_id που δεν είναι ακέραιος (400) ή δεν υπάρχει (404)"""
+    if account_id is None:
+        return jsonify({
+            "status": "error",
+            "message": "'account_id' must be an integer"
+        }), 400
+    return jsonify({
+        "status": "error",
+        "message": f"Account {account_id} not found"
+    }), 404
+
+@app.route('/api/trading/accounts', methods=['GET', 'POST'])
+@response_cache.conditional('ledger')
+def trading_accounts():
+    """Λίστα λογαριασμών (GET, keyset με ?after=) ή νέος λογαριασμός (POST)"""
+    try:
+        if request.method == 'GET':
+            try:
+                after = int(request.args.get('after', 0))
+                limit = max(1, min(int(request.args.get('limit', 100)), 1000))
+            except ValueError:
+                return jsonify({
+                    "status": "error",
+                    "message": "'after' and 'limit' must be integers"
+                }), 400
+            accounts = trading_bot.get_accounts(limit, after)
+            return jsonify({
+                "status": "success",
+                "accounts": accounts,
+                "next_after": accounts[-1]['id'] if len(accounts) == limit else None
+            })
+        
+        data = request.json or {}
+        name = data.get('name')
+        if not name:
+            return jsonify({
+                "status": "error",
+                "message": "'name' is required"
+            }), 400
+        account_id = trading_bot.create_account(name, float(data.get('balance', 10000)))
+        if account_id is None:
+            return jsonify({
+                "status": "error",
+                "message": f"Account '{name}' already exists"
+            }), 409
+        return jsonify({
+            "status": "success",
+            "account_id": account_id
+        }), 201
+    
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
 @app.route('/api/trading/balance')
+@response_cache.conditional('ledger')
 def get_trading_balance():
     """Επιστρέφει το τρέχον υπόλοιπο"""
-    balance = trading_bot.get_balance()
+    account_id = request_account_id()
+    balance = trading_bot.get_balance(account_id) if account_id is not None else None
+    if balance is None:
+        return account_error(account_id)
     return jsonify({
         "status": "success",
         "balance": balance
     })
 
 @app.route('/api/trading/portfolio')
+@response_cache.conditional('ledger')
 def get_portfolio():
     """Επιστρέφει το portfolio"""
-    portfolio = trading_bot.get_portfolio()
+    account_id = request_account_id()
+    if account_id is None:
+        return account_error(account_id)
+    portfolio = trading_bot.get_portfolio(account_id)
     return jsonify({
         "status": "success",
         "portfolio": portfolio
     })
 
+def transaction_filters():
+    """Τα φίλτρα coin/type/from/to του request - ValueError αν κάποιο δεν είναι έγκυρο"""
+    from database import parse_timestamp
+    
+    side = request.args.get('type')
+    if side not in (None, 'buy', 'sell'):
+        raise ValueError(f"Invalid type: {side!r}")
+    start = request.args.get('from')
+    end = request.args.get('to')
+    return {
+        'coin_name': request.args.get('coin'),
+        'side': side,
+        'start': parse_timestamp(start) if start else None,
+        'end': parse_timestamp(end) if end else None
+    }
+
 @app.route('/api/trading/transactions')
+@response_cache.conditional('ledger')
 def get_transactions():
-    """Επιστρέφει το ιστορικό συναλλαγών"""
-    transactions = trading_bot.get_transactions()
+    """Επιστρέφει το ιστορικό συναλλαγών (keyset pagination με ?before=, φίλτρα coin/type/from/to)"""
+    account_id = request_account_id()
+    if account_id is None:
+        return account_error(account_id)
+    try:
+        filters = transaction_filters()
+        limit = max(1, min(int(request.args.get('limit', TRANSACTIONS_PAGE)), TRANSACTIONS_MAX_PAGE))
+        before = request.args.get('before')
+        before = parse_transaction_cursor(before) if before else None
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "Invalid 'limit', 'before', 'type', 'from' or 'to'"
+        }), 400
+    
+    transactions = trading_bot.get_transactions(limit, account_id, before, **filters)
     return jsonify({
         "status": "success",
-        "transactions": transactions
+        "transactions": transactions,
+        "next_before": transaction_cursor(transactions[-1]) if len(transactions) == limit else None
+    })
+
+@app.route('/api/trading/transactions/summary')
+@response_cache.conditional('ledger')
+def get_transaction_summary():
+    """Ανά coin: πλήθος συναλλαγών, όγκος και realized P&L (προαιρετικά στο [from, to])"""
+    account_id = request_account_id()
+    if account_id is None:
+        return account_error(account_id)
+    try:
+        filters = transaction_filters()
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "Invalid 'from' or 'to'"
+        }), 400
+    
+    summary = trading_bot.get_transaction_summary(account_id, filters['start'], filters['end'])
+    return jsonify({
+        "status": "success",
+        "summary": summary,
+        "realized_pnl": sum(item['realized_pnl'] for item in summary)
     })
 
 @app.route('/api/trading/buy', methods=['POST'])
@@ -98,14 +273,8 @@ def buy_coin():
         coin = data.get('coin')
         amount = float(data.get('amount'))
         
-        # Παίρνουμε τρέχουσα τιμή
-        from database import get_latest_prices
-        prices = get_latest_prices()
-        current_price = None
-        for c, p, _ in prices:
-            if c == coin:
-                current_price = p
-                break
+        # Παίρνουμε τρέχουσα τιμή (από το κοινό price board)
+        current_price = trading_bot.get_current_price(coin)
         
         if not current_price:
             return jsonify({
@@ -113,7 +282,10 @@ def buy_coin():
                 "message": "Coin not found"
             }), 404
         
-        result = trading_bot.buy_coin(coin, amount, current_price)
+        account_id = request_account_id(data)
+        if account_id is None:
+            return account_error(account_id)
+        result = trading_bot.buy_coin(coin, amount, current_price, account_id)
         
         if result['success']:
             return jsonify({
@@ -127,7 +299,7 @@ def buy_coin():
                 "status": "error",
                 "message": result['message']
             }), 400
-            
+    
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -142,14 +314,8 @@ def sell_coin():
         coin = data.get('coin')
         amount = float(data.get('amount'))
         
-        # Παίρνουμε τρέχουσα τιμή
-        from database import get_latest_prices
-        prices = get_latest_prices()
-        current_price = None
-        for c, p, _ in prices:
-            if c == coin:
-                current_price = p
-                break
+        # Παίρνουμε τρέχουσα τιμή (από το κοινό price board)
+        current_price = trading_bot.get_current_price(coin)
         
         if not current_price:
             return jsonify({
@@ -157,7 +323,10 @@ def sell_coin():
                 "message": "Coin not found"
             }), 404
         
-        result = trading_bot.sell_coin(coin, amount, current_price)
+        account_id = request_account_id(data)
+        if account_id is None:
+            return account_error(account_id)
+        result = trading_bot.sell_coin(coin, amount, current_price, account_id)
         
         if result['success']:
             return jsonify({
@@ -172,7 +341,7 @@ def sell_coin():
                 "status": "error",
                 "message": result['message']
             }), 400
-            
+    
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -180,30 +349,71 @@ def sell_coin():
         }), 500
 
 @app.route('/api/trading/portfolio-value')
+@response_cache.conditional('ledger', 'prices')
 def get_portfolio_value():
     """Υπολογίζει την αξία του portfolio"""
     try:
-        # Παίρνουμε τρέχουσες τιμές
-        from database import get_latest_prices
-        prices = get_latest_prices()
+        # Από το portfolio engine: ενημερώνεται σε κάθε tick και trade
+        account_id = request_account_id()
+        value_info = portfolio_engine.get_portfolio_value(account_id) if account_id is not None else None
+        if value_info is None:
+            return account_error(account_id)
         
-        current_prices = {}
-        for coin_name, price, _ in prices:
-            current_prices[coin_name] = price
+        return jsonify({
+            "status": "success",
+            "balance": value_info['balance'],
+            "portfolio_value": value_info['portfolio_value'],
+            "total_net_worth": value_info['total_net_worth'],
+            "holdings": value_info['holdings']
+        })
+    
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/trading/net-worth')
+@response_cache.conditional('prices', when=fixed_range)
+def get_net_worth():
+    """Η καθαρή αξία ανά tick (equity curve) στο [from, to], προαιρετικά με points"""
+    try:
+        from database import parse_timestamp, current_timestamp
         
-        value_info = trading_bot.get_portfolio_value(current_prices)
-        balance = trading_bot.get_balance()
+        try:
+            end = request.args.get('to')
+            start = request.args.get('from')
+            end = parse_timestamp(end) if end else current_timestamp()
+            start = parse_timestamp(start) if start else parse_timestamp(
+                datetime.fromisoformat(end) - timedelta(days=1))
+            points = int(request.args.get('points', 0))
+        except ValueError:
+            return jsonify({
+                "status": "error",
+                "message": "Invalid 'from', 'to' or 'points'"
+            }), 400
         
-        total_net_worth = balance + value_info['total_value']
+        account_id = request_account_id()
+        if account_id is None:
+            return account_error(account_id)
+        rows = get_net_worth_history(start, end, account_id)
+        timestamps = [row[0] for row in rows]
+        net_worth = [row[1] for row in rows]
+        holdings_value = [row[2] for row in rows]
+        if points >= 3:
+            timestamps, net_worth, holdings_value = downsample(timestamps, net_worth, holdings_value,
+                                                               points=points)
         
         return jsonify({
             "status": "success",
-            "balance": balance,
-            "portfolio_value": value_info['total_value'],
-            "total_net_worth": total_net_worth,
-            "holdings": value_info['holdings']
+            "from": start,
+            "to": end,
+            "timestamps": timestamps,
+            "net_worth": list(net_worth),
+            "holdings_value": list(holdings_value),
+            "count": len(timestamps)
         })
-        
+    
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -227,20 +437,17 @@ def add_alert():
             "alert_id": alert_id,
             "message": f"Alert set for {coin} at ${price}"
         })
-        
+    
     except Exception as e:
         return jsonify({
             "status": "error",
             "message": str(e)
         }), 500
 
-@app.route('/api/alerts')
-def get_alerts():
-    """Επιστρέφει όλα τα alerts"""
-    alerts = alert_system.get_active_alerts()
-    
+def alerts_payload():
+    """Τα ενεργά alerts όπως τα επιστρέφει το /api/alerts"""
     result = []
-    for alert_id, email, coin, price, condition in alerts:
+    for alert_id, email, coin, price, condition in alert_system.get_active_alerts():
         result.append({
             "id": alert_id,
             "email": email,
@@ -248,37 +455,41 @@ def get_alerts():
             "price": price,
             "condition": condition
         })
-    
+    return result
+
+@app.route('/api/alerts')
+@response_cache.conditional('alerts')
+def get_alerts():
+    """Επιστρέφει όλα τα alerts"""
     return jsonify({
         "status": "success",
-        "alerts": result
+        "alerts": alerts_payload()
     })
-    
+
+@app.route('/api/alerts/delivery')
+def alert_delivery_stats():
+    """Μετρικές της ουράς αποστολής των alert emails"""
+    return jsonify({
+        "status": "success",
+        "delivery": alert_outbox.stats()
+    })
+
 @app.route('/api/alerts/<int:alert_id>', methods=['DELETE'])
 def delete_alert(alert_id):
     """Διαγράφει ένα alert"""
     try:
-        conn = sqlite3.connect('crypto_prices.db')
-        c = conn.cursor()
-        
-        # Έλεγχος αν υπάρχει το alert
-        c.execute('SELECT id FROM alerts WHERE id = ?', (alert_id,))
-        if not c.fetchone():
+        # Διαγραφή (και έλεγχος αν υπάρχει το alert)
+        if not alert_system.delete_alert(alert_id):
             return jsonify({
                 "status": "error",
                 "message": "Alert not found"
             }), 404
         
-        # Διαγραφή
-        c.execute('DELETE FROM alerts WHERE id = ?', (alert_id,))
-        conn.commit()
-        conn.close()
-        
         return jsonify({
             "status": "success",
             "message": f"Alert {alert_id} deleted successfully"
         })
-        
+    
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -288,60 +499,512 @@ def delete_alert(alert_id):
 # Endpoint για health check
 @app.route('/api/health')
 def health():
-    return jsonify({"status": "healthy", "timestamp": datetime.now().isoformat()})
+    return jsonify({
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "cache": {
+            "prices": price_cache.stats(),
+            "charts": {"entries": len(chart_cache.entries), "hits": chart_cache.hits, "misses": chart_cache.misses},
+            "responses": response_cache.stats()
+        }
+    })
+
+def prices_payload(prices=None):
+    """Οι τελευταίες τιμές όπως τις επιστρέφει το /api/prices"""
+    # Κοινό board όλων των workers· στη βάση μόνο αν είναι stale
+    if prices is None:
+        prices = price_board.get_latest_prices()
+    
+    # Μετατροπή σε λεξικό για JSON
+    result = []
+    for coin_name, price, timestamp in prices:
+        result.append({
+            'coin': coin_name,
+            'price': price,
+            'timestamp': timestamp
+        })
+    return result
 
 # Endpoint για τις τελευταίες τιμές
 @app.route('/api/prices')
+@response_cache.conditional('prices')
 def get_prices():
     try:
-        prices = get_latest_prices()
-        
-        # Μετατροπή σε λεξικό για JSON
-        result = []
-        for coin_name, price, timestamp in prices:
-            result.append({
-                'coin': coin_name,
-                'price': price,
-                'timestamp': timestamp
-            })
+        result = prices_payload()
         
         return jsonify({
             "status": "success",
             "data": result,
             "count": len(result)
         })
-        
+    
     except Exception as e:
         return jsonify({
             "status": "error",
             "message": str(e)
         }), 500
 
+# Export ιστορικού σε CSV/NDJSON (stream, σταθερή μνήμη)
+@app.route('/api/export')
+@app.route('/api/export/<coin_name>')
+def export_history(coin_name=None):
+    from database import parse_timestamp, timestamp_to_ms
+    
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in FORMATS:
+        return jsonify({
+            "status": "error",
+            "message": f"Invalid format (use {', '.join(FORMATS)})"
+        }), 400
+    
+    try:
+        start = request.args.get('from')
+        end = request.args.get('to')
+        start_ms = timestamp_to_ms(parse_timestamp(start)) if start else None
+        end_ms = timestamp_to_ms(parse_timestamp(end)) if end else None
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "Invalid 'from' or 'to' (use ISO 8601 or epoch seconds)"
+        }), 400
+    
+    coins = export_coins()
+    if coin_name is not None:
+        if coin_name not in coins:
+            return jsonify({
+                "status": "error",
+                "message": f"No data for {coin_name}"
+            }), 404
+        coins = [coin_name]
+    
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    mimetype, extension = FORMATS[fmt]
+    filename = f"{coin_name or 'all-coins'}.{extension}" + ('.gz' if compress else '')
+    
+    return Response(
+        stream_export(coins, start_ms, end_ms, fmt, compress),
+        mimetype='application/gzip' if compress else mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+# Server-Sent Events: ένα event ανά νέο tick, αντί για polling
+@app.route('/api/stream')
+def stream_prices():
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    return Response(
+        price_broadcaster.stream(last_event_id),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 # Endpoint για ιστορικά δεδομένα (για τα γραφήματα)
 @app.route('/api/history/<coin_name>')
+@response_cache.conditional('prices', when=lambda: fixed_range() or not request.args)
 def get_history(coin_name):
     try:
-        # Χρησιμοποιούμε τη νέα συνάρτηση από το database.py
-        from database import get_historical_data
-        historical_data = get_historical_data(coin_name, limit=20)
+        from database import (get_history_range, parse_timestamp, pick_resolution,
+                              current_timestamp, ROLLUPS, MAX_HISTORY_POINTS)
         
-        # Διαχωρίζουμε τιμές και timestamps
-        prices = [data[0] for data in historical_data]
-        timestamps = [data[1] for data in historical_data]
+        start = request.args.get('from')
+        end = request.args.get('to')
+        resolution = request.args.get('resolution')
+        points = request.args.get('points')
         
-        return jsonify({
+        # Χωρίς παραμέτρους: τα τελευταία 20 raw σημεία, όπως πάντα
+        if not (start or end or resolution or points):
+            historical_data = price_cache.get_historical_data(coin_name, limit=HISTORY_TAIL)
+            
+            # Διαχωρίζουμε τιμές και timestamps
+            prices = [data[0] for data in historical_data]
+            timestamps = [data[1] for data in historical_data]
+            
+            return jsonify({
+                "status": "success",
+                "coin": coin_name,
+                "resolution": "raw",
+                "prices": prices,
+                "timestamps": timestamps,
+                "count": len(prices)
+            })
+        
+        try:
+            end = parse_timestamp(end) if end else current_timestamp()
+            start = parse_timestamp(start) if start else parse_timestamp(
+                datetime.fromisoformat(end) - timedelta(days=1))
+        except ValueError:
+            return jsonify({
+                "status": "error",
+                "message": "Invalid 'from' or 'to' (use ISO 8601 or epoch seconds)"
+            }), 400
+        
+        if points is not None:
+            try:
+                points = int(points)
+            except ValueError:
+                points = 0
+            if points < 3:
+                return jsonify({
+                    "status": "error",
+                    "message": "'points' must be an integer >= 3"
+                }), 400
+            
+            # Ίδιο αίτημα χωρίς νέο tick από τότε: έτοιμο από το cache
+            cache_key = (coin_name, request.args.get('from'), request.args.get('to'),
+                         resolution, points, price_cache.get_latest_timestamp(coin_name))
+            cached = chart_cache.get(cache_key)
+            if cached is not None:
+                return jsonify(cached)
+        
+        if not resolution or resolution == 'auto':
+            # Με points διαβάζουμε πιο λεπτομερή σειρά και τη μειώνουμε με LTTB
+            resolution = pick_resolution(start, end, MAX_SOURCE_POINTS if points else MAX_HISTORY_POINTS)
+        elif resolution != 'raw' and resolution not in ROLLUPS:
+            return jsonify({
+                "status": "error",
+                "message": f"Invalid resolution (use auto, raw, {', '.join(ROLLUPS)})"
+            }), 400
+        
+        if resolution == 'raw':
+            # Πρόσφατα διαστήματα από το in-memory cache, παλαιότερα από τη βάση
+            rows = price_cache.get_history_range(coin_name, start, end)
+        else:
+            rows = get_history_range(coin_name, start, end, resolution)
+        result = {
             "status": "success",
             "coin": coin_name,
+            "resolution": resolution,
+            "from": start,
+            "to": end
+        }
+        
+        if resolution == 'raw':
+            result["prices"] = [row[0] for row in rows]
+            result["timestamps"] = [row[1] for row in rows]
+        else:
+            # Για τα γραφήματα: prices = close κάθε bucket
+            result["timestamps"] = [row[0] for row in rows]
+            result["open"] = [row[1] for row in rows]
+            result["high"] = [row[2] for row in rows]
+            result["low"] = [row[3] for row in rows]
+            result["prices"] = [row[4] for row in rows]
+        
+        if points:
+            series = ("prices",) if resolution == 'raw' else ("prices", "open", "high", "low")
+            reduced = downsample(result["timestamps"], *(result[key] for key in series), points=points)
+            result["timestamps"] = reduced[0]
+            for key, values in zip(series, reduced[1:]):
+                result[key] = values
+            result["source_count"] = len(rows)
+        
+        result["count"] = len(result["prices"])
+        if points:
+            chart_cache.put(cache_key, result)
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+def history_series(coin_names, start=None, end=None, resolution=None, points=None, source=None):
+    """{coin: series} με τα πεδία του /api/history/<coin>, για πολλά νομίσματα.
+    
+    Χωρίς διάστημα: τα τελευταία HISTORY_TAIL raw σημεία από το source
+    (price cache, ή database για μια εικόνα της βάσης). Σε OHLC ανάλυση όλα
+    τα νομίσματα διαβάζονται με ένα query (get_history_ranges), όχι ένα ανά νόμισμα.
+    """
+    from database import get_history_ranges
+    
+    series = {}
+    if start is None:
+        for coin_name in coin_names:
+            rows = (source or price_cache).get_historical_data(coin_name, limit=HISTORY_TAIL)
+            series[coin_name] = {
+                "prices": [row[0] for row in rows],
+                "timestamps": [row[1] for row in rows],
+                "count": len(rows)
+            }
+        return series
+    
+    if resolution == 'raw':
+        ranges = {coin_name: price_cache.get_history_range(coin_name, start, end) for coin_name in coin_names}
+    else:
+        ranges = get_history_ranges(coin_names, start, end, resolution)
+    
+    for coin_name, rows in ranges.items():
+        if resolution == 'raw':
+            result = {"prices": [row[0] for row in rows], "timestamps": [row[1] for row in rows]}
+            keys = ("prices",)
+        else:
+            result = {
+                "timestamps": [row[0] for row in rows],
+                "open": [row[1] for row in rows],
+                "high": [row[2] for row in rows],
+                "low": [row[3] for row in rows],
+                "prices": [row[4] for row in rows]
+            }
+            keys = ("prices", "open", "high", "low")
+        if points:
+            reduced = downsample(result["timestamps"], *(result[key] for key in keys), points=points)
+            result["timestamps"] = reduced[0]
+            for key, values in zip(keys, reduced[1:]):
+                result[key] = values
+            result["source_count"] = len(rows)
+        result["count"] = len(result["prices"])
+        series[coin_name] = result
+    return series
+
+def request_coins(default=None):
+    """Τα νομίσματα του ?coins=a,b,c (χωρίς διπλά, έως MAX_BATCH_COINS)"""
+    value = request.args.get('coins', default or '')
+    coins = list(dict.fromkeys(coin.strip() for coin in value.split(',') if coin.strip()))
+    return coins[:MAX_BATCH_COINS]
+
+# Ιστορικό πολλών νομισμάτων σε ένα request (π.χ. όλα τα γραφήματα της σελίδας)
+@app.route('/api/history')
+@response_cache.conditional('prices', when=lambda: fixed_range() or list(request.args) == ['coins'])
+def get_history_batch():
+    try:
+        from database import (parse_timestamp, pick_resolution, current_timestamp,
+                              ROLLUPS, MAX_HISTORY_POINTS)
+        
+        coins = request_coins()
+        if not coins:
+            return jsonify({
+                "status": "error",
+                "message": "'coins' is required (e.g. ?coins=bitcoin,ethereum)"
+            }), 400
+        
+        start = request.args.get('from')
+        end = request.args.get('to')
+        resolution = request.args.get('resolution')
+        points = request.args.get('points')
+        
+        if not (start or end or resolution or points):
+            return jsonify({
+                "status": "success",
+                "resolution": "raw",
+                "series": history_series(coins)
+            })
+        
+        try:
+            end = parse_timestamp(end) if end else current_timestamp()
+            start = parse_timestamp(start) if start else parse_timestamp(
+                datetime.fromisoformat(end) - timedelta(days=1))
+            points = int(points) if points is not None else None
+        except ValueError:
+            return jsonify({
+                "status": "error",
+                "message": "Invalid 'from', 'to' or 'points'"
+            }), 400
+        if points is not None and points < 3:
+            return jsonify({
+                "status": "error",
+                "message": "'points' must be an integer >= 3"
+            }), 400
+        
+        if not resolution or resolution == 'auto':
+            resolution = pick_resolution(start, end, MAX_SOURCE_POINTS if points else MAX_HISTORY_POINTS)
+        elif resolution != 'raw' and resolution not in ROLLUPS:
+            return jsonify({
+                "status": "error",
+                "message": f"Invalid resolution (use auto, raw, {', '.join(ROLLUPS)})"
+            }), 400
+        
+        return jsonify({
+            "status": "success",
+            "resolution": resolution,
+            "from": start,
+            "to": end,
+            "series": history_series(coins, start, end, resolution, points)
+        })
+    
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+# Όλα όσα δείχνει το dashboard (τιμές, γραφήματα, alerts, trading) σε ένα request
+@app.route('/api/dashboard')
+@response_cache.conditional('prices', 'ledger', 'alerts')
+def get_dashboard():
+    try:
+        import database
+        
+        account_id = request_account_id()
+        
+        # Όλα από ένα read transaction, δηλαδή από την ίδια εικόνα της βάσης.
+        # Όχι από τα caches στη μνήμη (board, price cache, portfolio engine):
+        # ενημερώνονται το καθένα λίγο μετά το commit και μαζί θα μπορούσαν
+        # να δείξουν τιμές από δύο διαφορετικά ticks
+        with transaction():
+            balance = trading_bot.get_balance(account_id) if account_id is not None else None
+            if balance is None:
+                return account_error(account_id)
+            latest = database.get_latest_prices()
+            portfolio = trading_bot.get_portfolio_value(
+                {coin_name: price for coin_name, price, _ in latest}, account_id)
+            prices = prices_payload(latest)
+            alerts = alerts_payload()
+            transactions = trading_bot.get_transactions(account_id=account_id)
+            history = history_series(request_coins('bitcoin'), source=database)
+        
+        return jsonify({
+            "status": "success",
             "prices": prices,
-            "timestamps": timestamps,
-            "count": len(prices)
+            "count": len(prices),
+            "history": history,
+            "alerts": alerts,
+            "trading": {
+                "balance": balance,
+                "portfolio_value": portfolio['total_value'],
+                "total_net_worth": balance + portfolio['total_value'],
+                "holdings": sorted(portfolio['holdings'], key=lambda holding: holding['coin'])
+            },
+            "transactions": transactions
         })
+    
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+def get_indicator_engine():
+    """Το engine για το ?resolution= του request (ή None αν δεν υπάρχει)"""
+    return indicator_engines.get(request.args.get('resolution', DEFAULT_RESOLUTION))
+
+# Τεχνικοί δείκτες (SMA, EMA, RSI, MACD, Bollinger, volatility) για ένα νόμισμα
+@app.route('/api/indicators/<coin_name>')
+@response_cache.conditional('prices')
+def get_indicators(coin_name):
+    try:
+        engine = get_indicator_engine()
+        if engine is None:
+            return jsonify({
+                "status": "error",
+                "message": f"Invalid resolution (use {', '.join(INDICATOR_WINDOWS)})"
+            }), 400
         
+        try:
+            limit = int(request.args.get('limit', 200))
+        except ValueError:
+            return jsonify({
+                "status": "error",
+                "message": "'limit' must be an integer"
+            }), 400
+        
+        result = engine.get_indicators(coin_name, limit)
+        if result is None:
+            return jsonify({
+                "status": "error",
+                "message": f"No data for {coin_name}"
+            }), 404
+        return jsonify({"status": "success", **result})
+    
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+# Πίνακας συσχέτισης των αποδόσεων όλων των νομισμάτων
+@app.route('/api/correlation')
+@response_cache.conditional('prices')
+def get_correlation():
+    try:
+        engine = get_indicator_engine()
+        if engine is None:
+            return jsonify({
+                "status": "error",
+                "message": f"Invalid resolution (use {', '.join(INDICATOR_WINDOWS)})"
+            }), 400
+        
+        try:
+            window = request.args.get('window')
+            window = int(window) if window else None
+        except ValueError:
+            return jsonify({
+                "status": "error",
+                "message": "'window' must be an integer (buckets)"
+            }), 400
+        
+        return jsonify({"status": "success", **engine.get_correlation(window)})
+    
     except Exception as e:
         return jsonify({
             "status": "error",
             "message": str(e)
         }), 500
 
+def benchmark(rounds=200):
+    """Πρώτη φόρτωση του dashboard: τα παλιά ξεχωριστά requests vs /api/dashboard.
+    
+    Σε προσωρινή βάση (benchtools.temp_database), όχι στη βάση της εφαρμογής.
+    Τα requests της σελίδας τα μετράει το tests/test_dashboard.py.
+    """
+    from benchtools import check, temp_database
+    from database import insert_prices
+    
+    coins = ['bitcoin', 'ethereum', 'solana', 'ripple', 'cardano']
+    pages = {
+        'separate requests': ['/api/prices', '/api/history/bitcoin', '/api/alerts',
+                              '/api/trading/portfolio-value', '/api/trading/transactions'],
+        '/api/dashboard': [f"/api/dashboard?coins={','.join(coins)}"]
+    }
+    
+    with temp_database():
+        # Οι πίνακες που φτιάχνονται στην εκκίνηση, τώρα στην προσωρινή βάση
+        alert_system.init_alerts_table()
+        alert_outbox.init_outbox_table()
+        trading_bot.init_trading_tables()
+        portfolio_engine.init_history_table()
+        init_db()
+        start = datetime(2024, 1, 1)
+        for minute in range(60):
+            insert_prices({coin: 100.0 + i + minute % 7 for i, coin in enumerate(coins)},
+                          (start + timedelta(minutes=minute)).strftime('%Y-%m-%d %H:%M:%S'))
+        for coin in coins:
+            alert_system.add_alert('bench@example.com', coin, 150.0, 'above')
+            trading_bot.buy_coin(coin, 1.0, 100.0)
+        price_cache.load()
+        portfolio_engine.load()
+        
+        client = app.test_client()
+        settle, response_cache.settle = response_cache.settle, 0   # Τα versions αλλάζουν μόνο από εδώ
+        try:
+            for name, urls in pages.items():
+                for cold in (True, False):
+                    begin = time.perf_counter()
+                    for _ in range(rounds):
+                        if cold:
+                            # Νέο version: κάθε σώμα ξαναφτιάχνεται (όπως μετά από ένα tick)
+                            with transaction() as conn:
+                                bump_versions(conn, 'prices', 'ledger', 'alerts')
+                        for url in urls:
+                            status = client.get(url).status_code
+                            check(status == 200, f"{url} returned {status}")
+                    elapsed = (time.perf_counter() - begin) / rounds * 1000
+                    state = 'after a tick' if cold else 'cached'
+                    print(f"⏱️ {name}: {len(urls)} requests, {elapsed:.2f}ms per page load ({state})")
+        finally:
+            response_cache.settle = settle
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    if sys.argv[1:2] == ['bench']:
+        benchmark()
+    else:
+        app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,334 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+ARCHIVE_CHUNK = 500000      # Γραμμές ανά fetch από τη βάση κατά το archive
+OPEN_PARTITIONS = 256       # Μέγιστος αριθμός partitions με ανοιχτά memmaps (LRU)
+TS_DTYPE = np.dtype('<i8')  # epoch ms, little-endian
+PRICE_DTYPE = np.dtype('<f8')
+
+def format_timestamps(ts_ms):
+    """epoch ms (numpy) σε timestamps της βάσης ('YYYY-MM-DD HH:MM:SS')"""
+    if not len(ts_ms):
+        return []
+    text = np.datetime_as_string(np.asarray(ts_ms).astype('datetime64[ms]').astype('datetime64[s]'))
+    return np.char.replace(text, 'T', ' ').tolist()
+
+class PriceArchive:
+    """Columnar archive για το παλιό ιστορικό, έξω από το SQLite.
+    
+    Ένα partition ανά νόμισμα ανά μήνα: <dir>/<coin>/<YYYY-MM>.ts (int64 epoch ms)
+    και .price (float64), ταξινομημένα και append-only. Το index.json κρατά
+    count/first/last ανά partition· οι readers βλέπουν μόνο τις count γραμμές
+    του index, οπότε ένα append που δεν ολοκληρώθηκε δεν φαίνεται ποτέ.
+    Ticks παλαιότερα από το τέλος ενός μήνα ξαναγράφουν τον μήνα σε νέα αρχεία
+    (<YYYY-MM>.<generation>.ts) που το index δείχνει μόνο όταν είναι έτοιμα.
+    Τα αρχεία διαβάζονται με numpy.memmap χωρίς αντιγραφή.
+    """
+    
+    def __init__(self, path=None, max_open=OPEN_PARTITIONS):
+        self.path = path            # None: δίπλα στη βάση (crypto_prices_archive/)
+        self.index = {}             # coin -> {month: {'count', 'first_ms', 'last_ms'}}
+        self.index_mtime = None
+        self.maps = OrderedDict()   # (coin, month, count, generation) -> (ts, prices) memmaps, LRU
+        self.max_open = max_open
+        self.lock = threading.Lock()
+    
+    def root(self):
+        if self.path is not None:
+            return self.path
+        from database import DB_PATH
+        return os.path.splitext(DB_PATH)[0] + '_archive'
+    
+    def _files(self, coin_name, month, generation=0):
+        base = os.path.join(self.root(), coin_name, month if not generation else f'{month}.{generation}')
+        return base + '.ts', base + '.price'
+    
+    def load_index(self):
+        """Ξαναδιαβάζει το index.json αν άλλαξε (π.χ. από άλλο process)"""
+        index_path = os.path.join(self.root(), 'index.json')
+        try:
+            mtime = os.stat(index_path).st_mtime_ns
+        except FileNotFoundError:
+            self.index, self.index_mtime = {}, None
+            return self.index
+        if mtime != self.index_mtime:
+            with open(index_path) as f:
+                self.index = json.load(f)
+            self.index_mtime = mtime
+        return self.index
+    
+    def _save_index(self):
+        # Atomic: νέο αρχείο και rename πάνω στο παλιό
+        index_path = os.path.join(self.root(), 'index.json')
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, index_path)
+        self.index_mtime = os.stat(index_path).st_mtime_ns
+    
+    def append(self, coin_name, ts_ms, prices):
+        """Προσθέτει ταξινομημένα ticks ενός νομίσματος στα partitions τους.
+        
+        Ticks νεότερα από το τέλος του partition γράφονται στο τέλος των αρχείων·
+        παλαιότερα συγχωνεύονται στον μήνα τους (_merge). Ticks που υπάρχουν ήδη
+        (ίδιο ts_ms) αγνοούνται, ώστε ένα archive που διακόπηκε να μπορεί απλά
+        να ξανατρέξει. Επιστρέφει πόσα ticks γράφτηκαν.
+        """
+        ts_ms = np.asarray(ts_ms, dtype=TS_DTYPE)
+        prices = np.asarray(prices, dtype=PRICE_DTYPE)
+        if not len(ts_ms):
+            return 0
+        
+        with self.lock:
+            self.load_index()
+            partitions = self.index.setdefault(coin_name, {})
+            months = ts_ms.astype('datetime64[ms]').astype('datetime64[M]')
+            # Όρια κάθε μήνα μέσα στα (ταξινομημένα) ticks
+            edges = np.flatnonzero(months[1:] != months[:-1]) + 1
+            written = 0
+            for start, end in zip(np.r_[0, edges], np.r_[edges, len(ts_ms)]):
+                month = str(months[start])
+                meta = partitions.get(month, {'count': 0, 'first_ms': None, 'last_ms': None})
+                ts_part, price_part = ts_ms[start:end], prices[start:end]
+                if meta['last_ms'] is not None:
+                    older = ts_part <= meta['last_ms']
+                    if older.any():
+                        written += self._merge(coin_name, month, ts_part[older], price_part[older])
+                        meta = partitions[month]
+                        ts_part, price_part = ts_part[~older], price_part[~older]
+                if not len(ts_part):
+                    continue
+                
+                ts_path, price_path = self._files(coin_name, month, meta.get('generation', 0))
+                os.makedirs(os.path.dirname(ts_path), exist_ok=True)
+                for path, values, dtype in ((ts_path, ts_part, TS_DTYPE), (price_path, price_part, PRICE_DTYPE)):
+                    with open(path, 'ab') as f:
+                        # Από τη θέση του index: ό,τι έμεινε από μισό append γράφεται από πάνω
+                        f.truncate(meta['count'] * dtype.itemsize)
+                        f.write(values.astype(dtype, copy=False).tobytes())
+                        f.flush()
+                        os.fsync(f.fileno())
+                
+                partitions[month] = dict(
+                    meta,
+                    count=meta['count'] + len(ts_part),
+                    first_ms=meta['first_ms'] if meta['first_ms'] is not None else int(ts_part[0]),
+                    last_ms=int(ts_part[-1])
+                )
+                written += len(ts_part)
+            
+            self._save_index()
+        return written
+    
+    def _merge(self, coin_name, month, ts_ms, prices):
+        """Συγχωνεύει ticks μέσα στο εύρος ενός μήνα (με self.lock και φρέσκο index).
+        
+        Ο μήνας γράφεται ταξινομημένος σε αρχεία του επόμενου generation· μετά
+        το fsync το index δείχνει σε αυτά και τα παλιά σβήνονται. Ένας reader
+        βλέπει είτε τον παλιό είτε τον νέο μήνα, ποτέ κάτι ενδιάμεσο.
+        """
+        partitions = self.index[coin_name]
+        meta = partitions[month]
+        generation = meta.get('generation', 0)
+        old_paths = self._files(coin_name, month, generation)
+        old_ts = np.fromfile(old_paths[0], dtype=TS_DTYPE, count=meta['count'])
+        old_prices = np.fromfile(old_paths[1], dtype=PRICE_DTYPE, count=meta['count'])
+        keep = ~np.isin(ts_ms, old_ts)
+        if not keep.any():
+            return 0
+        
+        ts_all = np.concatenate((old_ts, ts_ms[keep]))
+        order = np.argsort(ts_all, kind='stable')
+        ts_all, prices_all = ts_all[order], np.concatenate((old_prices, prices[keep]))[order]
+        new_paths = self._files(coin_name, month, generation + 1)
+        for path, values in zip(new_paths, (ts_all, prices_all)):
+            with open(path, 'wb') as f:
+                f.write(values.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        
+        partitions[month] = dict(meta, count=len(ts_all), first_ms=int(ts_all[0]),
+                                 last_ms=int(ts_all[-1]), generation=generation + 1)
+        self._save_index()
+        for path in old_paths:
+            os.remove(path)
+        return int(keep.sum())
+    
+    def _partition(self, coin_name, month, count, generation=0):
+        key = (coin_name, month, count, generation)
+        arrays = self.maps.get(key)
+        if arrays is not None:
+            self.maps.move_to_end(key)
+            return arrays
+        
+        # Μετά από append/merge το partition ξανανοίγει με το νέο count/generation
+        for old in [k for k in self.maps if k[:2] == (coin_name, month)]:
+            del self.maps[old]
+        ts_path, price_path = self._files(coin_name, month, generation)
+        arrays = (np.memmap(ts_path, dtype=TS_DTYPE, mode='r', shape=(count,)),
+                  np.memmap(price_path, dtype=PRICE_DTYPE, mode='r', shape=(count,)))
+        self.maps[key] = arrays
+        # Τα παλαιότερα σε χρήση κλείνουν (ένα scan που τα κρατά ακόμα δεν επηρεάζεται)
+        while len(self.maps) > self.max_open:
+            self.maps.popitem(last=False)
+        return arrays
+    
+    def partitions(self, coin_name, start_ms=None, end_ms=None):
+        """[(ts, prices)] memmaps των partitions που τέμνουν το [start_ms, end_ms]"""
+        with self.lock:
+            partitions = self.load_index().get(coin_name, {})
+            result = []
+            for month in sorted(partitions):
+                meta = partitions[month]
+                if meta['count'] == 0:
+                    continue
+                if start_ms is not None and meta['last_ms'] < start_ms:
+                    continue
+                if end_ms is not None and meta['first_ms'] > end_ms:
+                    continue
+                result.append(self._partition(coin_name, month, meta['count'], meta.get('generation', 0)))
+        return result
+    
+    def scan(self, coin_name, start_ms=None, end_ms=None):
+        """(ts, prices) numpy arrays για το [start_ms, end_ms] - όλο το archive αν λείπουν"""
+        ts_parts, price_parts = [], []
+        for ts, prices in self.partitions(coin_name, start_ms, end_ms):
+            lo = 0 if start_ms is None else np.searchsorted(ts, start_ms, 'left')
+            hi = len(ts) if end_ms is None else np.searchsorted(ts, end_ms, 'right')
+            ts_parts.append(ts[lo:hi])
+            price_parts.append(prices[lo:hi])
+        if not ts_parts:
+            return np.empty(0, TS_DTYPE), np.empty(0, PRICE_DTYPE)
+        if len(ts_parts) == 1:
+            return ts_parts[0], price_parts[0]
+        return np.concatenate(ts_parts), np.concatenate(price_parts)
+    
+    def tail(self, coin_name, limit, before_ms=None):
+        """Τα τελευταία limit ticks πριν το before_ms ως (ts, prices)"""
+        ts_parts, price_parts, needed = [], [], limit
+        for ts, prices in reversed(self.partitions(coin_name, None, before_ms)):
+            hi = len(ts) if before_ms is None else np.searchsorted(ts, before_ms, 'left')
+            lo = max(0, hi - needed)
+            ts_parts.insert(0, ts[lo:hi])
+            price_parts.insert(0, prices[lo:hi])
+            needed -= hi - lo
+            if needed <= 0:
+                break
+        if not ts_parts:
+            return np.empty(0, TS_DTYPE), np.empty(0, PRICE_DTYPE)
+        return np.concatenate(ts_parts), np.concatenate(price_parts)
+    
+    def get_history(self, coin_name, start_ms=None, end_ms=None):
+        """Όπως το database.get_history_range(..., 'raw'): [(price, timestamp), ...]"""
+        ts, prices = self.scan(coin_name, start_ms, end_ms)
+        return list(zip(prices.tolist(), format_timestamps(ts)))
+    
+    def get_tail(self, coin_name, limit, before_ms=None):
+        ts, prices = self.tail(coin_name, limit, before_ms)
+        return list(zip(prices.tolist(), format_timestamps(ts)))
+    
+    def archive(self, before_ms):
+        """Μεταφέρει από το prices_v2 στο archive όλα τα ticks πριν το before_ms.
+        
+        Ανά νόμισμα, σε ένα BEGIN IMMEDIATE: διαβάζονται τα ticks, γράφονται
+        (και fsync) τα αρχεία και το index, και σβήνονται οι γραμμές από τη βάση.
+        Κανένας writer δεν μπορεί να προσθέσει tick πριν το before_ms ανάμεσα
+        στο read και στο delete, οπότε σβήνεται μόνο ό,τι αρχειοθετήθηκε. Αν
+        διακοπεί στη μέση, το επόμενο archive() συνεχίζει χωρίς διπλές εγγραφές.
+        """
+        from database import get_connection, transaction
+        
+        moved = {}
+        for coin_id, coin_name in get_connection().execute('SELECT id, name FROM coins ORDER BY name').fetchall():
+            with transaction(immediate=True) as conn:
+                cursor = conn.execute('''
+                    SELECT ts_ms, price FROM prices_v2
+                    WHERE coin_id = ? AND ts_ms < ?
+                    ORDER BY ts_ms
+                ''', (coin_id, before_ms))
+                count = 0
+                while True:
+                    rows = cursor.fetchmany(ARCHIVE_CHUNK)
+                    if not rows:
+                        break
+                    ts_ms, prices = zip(*rows)
+                    self.append(coin_name, ts_ms, prices)
+                    count += len(rows)
+                
+                if count:
+                    conn.execute('DELETE FROM prices_v2 WHERE coin_id = ? AND ts_ms < ?', (coin_id, before_ms))
+            if count:
+                moved[coin_name] = count
+        return moved
+    
+    def close(self):
+        """Κλείνει τα memmaps και ξεχνά το index (π.χ. όταν αλλάζει το path)"""
+        with self.lock:
+            self.maps.clear()
+            self.index, self.index_mtime = {}, None
+    
+    def stats(self):
+        index = self.load_index()
+        return {
+            'coins': len(index),
+            'partitions': sum(len(partitions) for partitions in index.values()),
+            'ticks': sum(meta['count'] for partitions in index.values() for meta in partitions.values())
+        }
+
+def benchmark(years=5, rounds=5):
+    """Scan πολλών ετών (ανά λεπτό, ένα νόμισμα): SQLite prices_v2 vs archive"""
+    import database
+    from benchtools import check, temp_database
+    
+    first = int(np.datetime64('2020-01-01', 'ms').astype(np.int64))
+    ts_ms = first + np.arange(years * 525600, dtype=np.int64) * 60000
+    prices = 100 + np.sin(np.arange(len(ts_ms)) / 1000.0)
+    
+    with temp_database('archive-bench-'):
+        archive = PriceArchive()
+        conn = database.get_connection()
+        conn.execute('CREATE TABLE prices_v2 (coin_id INTEGER NOT NULL, ts_ms INTEGER NOT NULL, '
+                     'price REAL NOT NULL, PRIMARY KEY (coin_id, ts_ms)) WITHOUT ROWID')
+        with database.transaction() as conn:
+            conn.executemany('INSERT INTO prices_v2 VALUES (1, ?, ?)', zip(ts_ms.tolist(), prices.tolist()))
+        archive.append('bench', ts_ms, prices)
+        
+        def timed(scan):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                result = scan()
+            return (time.perf_counter() - start) / rounds, result
+        
+        sqlite_time, sqlite_mean = timed(lambda: conn.execute(
+            'SELECT AVG(price) FROM prices_v2 WHERE coin_id = 1').fetchone()[0])
+        archive_time, archive_mean = timed(lambda: float(archive.scan('bench')[1].mean()))
+        size = len(ts_ms) * (TS_DTYPE.itemsize + PRICE_DTYPE.itemsize)
+        archive.close()
+        
+        print(f"⏱️ {years} years, {len(ts_ms)} ticks: SQLite AVG {sqlite_time * 1000:.0f}ms, "
+              f"archive mean {archive_time * 1000:.1f}ms ({size / archive_time / 1e9:.1f}GB/s)")
+        check(abs(sqlite_mean - archive_mean) < 1e-6, f"means differ: {sqlite_mean} vs {archive_mean}")
+
+# Κοινό archive για όλο το process
+price_archive = PriceArchive()
+
+if __name__ == "__main__":
+    import sys
+    
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == 'bench':
+        # python archive.py bench [years]
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 5)
+    else:
+        # python archive.py [before]: ό,τι είναι παλαιότερο από το RETENTION_DAYS['raw']
+        from database import init_db, parse_timestamp, timestamp_to_ms, archive_history
+        init_db()
+        before = timestamp_to_ms(parse_timestamp(sys.argv[1])) if command else None
+        print(f"📦 Archived: {archive_history(before)}")
+        print(f"📦 Archive: {price_archive.stats()}")
\ No newline at end of file
@@ -0,0 +1,327 @@
+import itertools
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import database
+
+INITIAL_BALANCE = 10000     # Όπως το αρχικό balance του TradingBot
+SWEEP_CHUNK = 8             # Configurations ανά task του pool
+YEAR_SECONDS = 365 * 86400
+
+def ewm(values, alpha):
+    """EMA μιας σειράς (ίδιο αποτέλεσμα με indicators.ema) χωρίς loop ανά bar.
+    
+    ema_t = d^k (ema_s + a Σ x_j d^-j) για τα k bars μετά το s (d = 1 - a):
+    ένα cumsum ανά block, με blocks τόσο μικρά ώστε το d^-k να χωρά σε float64.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.empty_like(values)
+    if not len(values):
+        return result
+    decay = 1 - alpha
+    block = max(1, int(150 / -np.log10(decay)))
+    result[0] = previous = values[0]
+    for s in range(1, len(values), block):
+        x = values[s:s + block]
+        powers = decay ** -np.arange(1, len(x) + 1, dtype=np.float64)
+        result[s:s + len(x)] = (previous + np.cumsum(alpha * x * powers)) / powers
+        previous = result[s + len(x) - 1]
+    return result
+
+def sma(values, period):
+    """Κινητός μέσος όρος με cumsum (NaN για τα πρώτα period - 1 bars)"""
+    result = np.full(len(values), np.nan)
+    if len(values) >= period:
+        sums = np.cumsum(np.concatenate(([0.0], values)))
+        result[period - 1:] = (sums[period:] - sums[:-period]) / period
+    return result
+
+def rolling_std(values, period):
+    result = np.full(len(values), np.nan)
+    if len(values) >= period:
+        sums = np.cumsum(np.concatenate(([0.0], values)))
+        squares = np.cumsum(np.concatenate(([0.0], values * values)))
+        mean = (sums[period:] - sums[:-period]) / period
+        result[period - 1:] = np.sqrt(np.maximum((squares[period:] - squares[:-period]) / period - mean ** 2, 0))
+    return result
+
+def hold(enter, leave):
+    """Θέση 1 από κάθε enter μέχρι το επόμενο leave (forward-fill των σημάτων)"""
+    signal = np.where(enter, 1.0, np.where(leave, 0.0, np.nan))
+    positions = np.where(np.isnan(signal), 0, np.arange(len(signal)))
+    np.maximum.accumulate(positions, out=positions)
+    result = signal[positions]
+    return np.where(np.isnan(result), 0.0, result)
+
+class Strategy:
+    """Βάση για τις στρατηγικές του backtest.
+    
+    exposure() δίνει για κάθε bar το ποσοστό της αξίας που θέλουμε σε coin
+    (0..1), μόνο από τιμές μέχρι και αυτό το bar. Τα indicators μένουν στο
+    cache του process για τα επόμενα configurations με τα ίδια periods.
+    """
+    name = None
+    defaults = {}
+    ranges = {}                 # Προεπιλεγμένο πλέγμα για τα sweeps
+    
+    cache = {}
+    cache_owner = None
+    
+    def indicator(self, prices, key, build):
+        if Strategy.cache_owner is not prices:
+            Strategy.cache, Strategy.cache_owner = {}, prices
+        value = Strategy.cache.get(key)
+        if value is None:
+            value = Strategy.cache[key] = build()
+        return value
+    
+    def exposure(self, prices, **params):
+        raise NotImplementedError
+
+class SmaCross(Strategy):
+    """Μέσα όσο ο γρήγορος SMA είναι πάνω από τον αργό"""
+    name = 'sma_cross'
+    defaults = {'fast': 20, 'slow': 50}
+    ranges = {'fast': range(5, 105, 5), 'slow': range(20, 520, 10)}
+    
+    def exposure(self, prices, fast=20, slow=50):
+        if fast >= slow:
+            return np.zeros(len(prices))
+        fast_sma = self.indicator(prices, ('sma', fast), lambda: sma(prices, fast))
+        slow_sma = self.indicator(prices, ('sma', slow), lambda: sma(prices, slow))
+        with np.errstate(invalid='ignore'):
+            return (fast_sma > slow_sma).astype(np.float64)
+
+class RsiReversion(Strategy):
+    """Αγορά όταν το RSI πέφτει κάτω από lower, πώληση πάνω από upper"""
+    name = 'rsi'
+    defaults = {'period': 14, 'lower': 30, 'upper': 70}
+    ranges = {'period': range(7, 43, 7), 'lower': range(15, 45, 5), 'upper': range(55, 90, 5)}
+    
+    def exposure(self, prices, period=14, lower=30, upper=70):
+        def build():
+            # Wilder smoothing, όπως στο indicators.py
+            change = np.diff(prices)
+            gain = ewm(np.maximum(change, 0), 1 / period)
+            loss = ewm(np.maximum(-change, 0), 1 / period)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rsi = np.where(loss == 0, 100.0, 100 - 100 / (1 + gain / loss))
+            return np.concatenate(([50.0], rsi))
+        
+        rsi = self.indicator(prices, ('rsi', period), build)
+        return hold(rsi < lower, rsi > upper)
+
+class BollingerReversion(Strategy):
+    """Αγορά κάτω από την κάτω ζώνη, πώληση όταν η τιμή ξαναφτάσει τον μέσο όρο"""
+    name = 'bollinger'
+    defaults = {'period': 20, 'width': 2.0}
+    ranges = {'period': range(10, 110, 10), 'width': (1.5, 2.0, 2.5, 3.0)}
+    
+    def exposure(self, prices, period=20, width=2.0):
+        middle = self.indicator(prices, ('sma', period), lambda: sma(prices, period))
+        std = self.indicator(prices, ('std', period), lambda: rolling_std(prices, period))
+        with np.errstate(invalid='ignore'):
+            return hold(prices < middle - width * std, prices >= middle)
+
+STRATEGIES = {strategy.name: strategy for strategy in (SmaCross, RsiReversion, BollingerReversion)}
+
+def simulate(prices, exposure, initial_balance=INITIAL_BALANCE):
+    """Εκτελεί τις αλλαγές του exposure με τους κανόνες του TradingBot.
+    
+    Κάθε αλλαγή γίνεται buy ή sell στην τιμή του bar: η αγορά ενημερώνει τον
+    μέσο όρο κόστους όπως το buy_coin και η πώληση δίνει profit_loss =
+    total_value - amount * avg_buy_price όπως το sell_coin. Ανάμεσα στα
+    trades τα holdings δεν αλλάζουν, οπότε η αξία ανά bar βγαίνει vectorized.
+    """
+    exposure = np.clip(np.nan_to_num(exposure), 0, 1)
+    changes = np.flatnonzero(np.diff(exposure, prepend=0.0))
+    cash_at = np.empty(len(changes))
+    amount_at = np.empty(len(changes))
+    cash, amount, avg_price = float(initial_balance), 0.0, 0.0
+    realized = 0.0
+    trades = wins = sells = 0
+    targets = exposure[changes].tolist()
+    
+    for n, (target, price) in enumerate(zip(targets, prices[changes].tolist())):
+        delta = target * (cash + amount * price) / price - amount
+        if delta > 0:
+            # buy_coin: total_cost <= balance, νέος μέσος όρος κόστους
+            delta = min(delta, cash / price)
+            avg_price = (amount * avg_price + delta * price) / (amount + delta)
+            amount += delta
+            cash -= delta * price
+            trades += 1
+        elif delta < 0:
+            # sell_coin: P&L πάνω στο μέσο κόστος, το portfolio αδειάζει στο 0
+            delta = min(-delta, amount)
+            profit_loss = delta * price - delta * avg_price
+            realized += profit_loss
+            wins += profit_loss > 0
+            sells += 1
+            amount -= delta
+            cash += delta * price
+            if target == 0:
+                amount = avg_price = 0.0
+            trades += 1
+        cash_at[n], amount_at[n] = cash, amount
+    
+    segment = np.searchsorted(changes, np.arange(len(prices)), 'right') - 1
+    holding = segment >= 0
+    cash_series = np.where(holding, cash_at[segment], initial_balance) if len(changes) else \
+        np.full(len(prices), float(initial_balance))
+    amount_series = np.where(holding, amount_at[segment], 0.0) if len(changes) else np.zeros(len(prices))
+    equity = cash_series + amount_series * prices
+    return equity, {
+        'trades': trades,
+        'realized_pl': realized,
+        'win_rate': wins / sells if sells else None
+    }
+
+def performance(equity, periods_per_year):
+    """Συνολική απόδοση, μέγιστο drawdown και (annualized) Sharpe ratio"""
+    returns = equity[1:] / equity[:-1] - 1
+    peak = np.maximum.accumulate(equity)
+    deviation = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    return {
+        'total_return': float(equity[-1] / equity[0] - 1),
+        'max_drawdown': float((equity / peak - 1).min()),
+        'sharpe': float(returns.mean() / deviation * np.sqrt(periods_per_year)) if deviation > 0 else 0.0,
+        'final_value': float(equity[-1])
+    }
+
+def backtest(strategy, prices, params=None, periods_per_year=YEAR_SECONDS / 60,
+             initial_balance=INITIAL_BALANCE):
+    """Ένα configuration μιας στρατηγικής (όνομα ή instance) πάνω σε μια σειρά τιμών"""
+    if isinstance(strategy, str):
+        strategy = STRATEGIES[strategy]()
+    params = {**strategy.defaults, **(params or {})}
+    equity, stats = simulate(prices, strategy.exposure(prices, **params), initial_balance)
+    return {'params': params, **performance(equity, periods_per_year), **stats}
+
+def load_prices(coin_name, resolution='1m', start=None, end=None):
+    """(ts_ms, prices) από τη βάση: raw ticks ή τα close των rollups (με forward-fill)"""
+    start = database.parse_timestamp(start) if start else '1970-01-01 00:00:00'
+    end = database.parse_timestamp(end if end else time.time())
+    rows = database.get_history_range(coin_name, start, end, resolution)
+    if resolution == 'raw':
+        prices, timestamps = zip(*rows) if rows else ((), ())
+    else:
+        timestamps, prices = [row[0] for row in rows], [row[4] for row in rows]
+    ts_ms = np.array(timestamps, dtype='datetime64[s]').astype(np.int64) * 1000
+    return ts_ms, np.array(prices, dtype=np.float64)
+
+def periods_per_year(ts_ms):
+    """Bars ανά χρόνο από το τυπικό βήμα της σειράς (για το annualized Sharpe)"""
+    if len(ts_ms) < 2:
+        return 1.0
+    step = float(np.median(np.diff(ts_ms))) / 1000
+    return YEAR_SECONDS / step if step > 0 else 1.0
+
+def grid(**ranges):
+    """Όλοι οι συνδυασμοί των τιμών: grid(fast=[10, 20], slow=[50, 100])"""
+    names = list(ranges)
+    return [dict(zip(names, values)) for values in itertools.product(*ranges.values())]
+
+def random_grid(count, seed=None, **ranges):
+    """count τυχαίοι συνδυασμοί (χωρίς επαναλήψεις όσο το πλέγμα φτάνει)"""
+    rng = random.Random(seed)
+    names = list(ranges)
+    total = np.prod([len(values) for values in ranges.values()])
+    configs, seen = [], set()
+    while len(configs) < min(count, total):
+        values = tuple(rng.choice(list(ranges[name])) for name in names)
+        if values not in seen:
+            seen.add(values)
+            configs.append(dict(zip(names, values)))
+    return configs
+
+# Οι τιμές κάθε worker: memmap του ίδιου αρχείου (read-only, κοινές σελίδες στο OS)
+worker_prices = None
+
+def init_worker(path):
+    global worker_prices
+    worker_prices = np.load(path, mmap_mode='r')
+
+def run_chunk(strategy_name, configs, periods, initial_balance):
+    prices = np.asarray(worker_prices)
+    strategy = STRATEGIES[strategy_name]()
+    return [backtest(strategy, prices, params, periods, initial_balance) for params in configs]
+
+def sweep(strategy_name, ts_ms, prices, configs, workers=None, sort='sharpe',
+          initial_balance=INITIAL_BALANCE):
+    """Backtest πολλών configurations παράλληλα σε ProcessPoolExecutor.
+    
+    Οι τιμές γράφονται μία φορά σε .npy και κάθε worker τις ανοίγει ως
+    read-only memmap, αντί να στέλνονται (pickle) σε κάθε task. Τα configs
+    πάνε σε chunks, ώστε ο ίδιος worker να ξαναχρησιμοποιεί τα indicators
+    (π.χ. τον ίδιο SMA) ανάμεσα σε configurations.
+    """
+    periods = periods_per_year(ts_ms)
+    workers = workers or os.cpu_count() or 1
+    chunks = [configs[i:i + SWEEP_CHUNK] for i in range(0, len(configs), SWEEP_CHUNK)]
+    
+    if workers == 1:
+        global worker_prices
+        worker_prices = prices
+        results = [result for chunk in chunks
+                   for result in run_chunk(strategy_name, chunk, periods, initial_balance)]
+    else:
+        directory = tempfile.mkdtemp(prefix='backtest-')
+        try:
+            path = os.path.join(directory, 'prices.npy')
+            np.save(path, np.ascontiguousarray(prices, dtype=np.float64))
+            with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(path,)) as executor:
+                futures = [executor.submit(run_chunk, strategy_name, chunk, periods, initial_balance)
+                           for chunk in chunks]
+                results = [result for future in futures for result in future.result()]
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    
+    return sorted(results, key=lambda result: result[sort], reverse=True)
+
+def print_results(results, top=5):
+    for result in results[:top]:
+        params = ', '.join(f'{name}={value}' for name, value in result['params'].items())
+        print(f"   {params}: return {result['total_return'] * 100:+.1f}%, "
+              f"drawdown {result['max_drawdown'] * 100:.1f}%, sharpe {result['sharpe']:.2f}, "
+              f"{result['trades']} trades")
+
+def benchmark(configs=1000, bars=YEAR_SECONDS // 60, workers=None):
+    """Sweep πάνω σε έναν χρόνο συνθετικών τιμών λεπτού"""
+    rng = np.random.default_rng(1)
+    prices = 30000 * np.exp(np.cumsum(rng.normal(0, 0.001, bars)))
+    ts_ms = np.arange(bars, dtype=np.int64) * 60000
+    for name in ('sma_cross', 'rsi'):
+        sample = random_grid(configs, seed=1, **STRATEGIES[name].ranges)
+        start = time.perf_counter()
+        results = sweep(name, ts_ms, prices, sample, workers)
+        elapsed = time.perf_counter() - start
+        print(f"⏱️ {name}: {len(sample)} configs x {bars} bars in {elapsed:.1f}s "
+              f"({elapsed / len(sample) * 1000:.0f}ms/config, {workers or os.cpu_count()} workers)")
+        print_results(results, top=3)
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args:
+        print("Usage: python backtest.py COIN [STRATEGY] [--resolution 1m] [--configs N] | bench [configs]")
+    elif args[0] == 'bench':
+        benchmark(int(args[1]) if len(args) > 1 else 1000)
+    else:
+        positional = [arg for i, arg in enumerate(args) if not arg.startswith('--')
+                      and (i == 0 or not args[i - 1].startswith('--'))]
+        options = {arg: value for arg, value in zip(args, args[1:]) if arg.startswith('--')}
+        name = positional[1] if len(positional) > 1 else 'sma_cross'
+        resolution = options.get('--resolution', '1m')
+        ts_ms, prices = load_prices(args[0], resolution)
+        if len(prices) < 2:
+            print(f"❌ Not enough {resolution} history for {args[0]}")
+        else:
+            sample = random_grid(int(options.get('--configs', 200)), seed=1, **STRATEGIES[name].ranges)
+            results = sweep(name, ts_ms, prices, sample)
+            print(f"📈 {name} on {args[0]} ({len(prices)} {resolution} bars, {len(sample)} configs):")
+            print_results(results)
\ No newline at end of file
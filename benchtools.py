@@ -0,0 +1,42 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+class CheckFailed(Exception):
+    """Ένας έλεγχος ενός benchmark απέτυχε"""
+
+def check(condition, message):
+    """Σαν assert, αλλά ισχύει και με python -O (που αφαιρεί τα asserts)"""
+    if not condition:
+        raise CheckFailed(message)
+
+@contextmanager
+def temp_database(prefix='crypto-bench-'):
+    """Προσωρινός φάκελος για benchmarks: βάση, price board και archive.
+    
+    Μέσα στο with, το database.DB_PATH και τα paths του price_board και του
+    price_archive δείχνουν στον φάκελο (bench.db, bench.board, bench_archive/).
+    Στο τέλος, ακόμα και μετά από σφάλμα, επανέρχονται και ο φάκελος σβήνεται.
+    Δίνει τη διαδρομή του φακέλου.
+    """
+    import database
+    from archive import price_archive
+    from priceboard import price_board
+    
+    directory = tempfile.mkdtemp(prefix=prefix)
+    saved = database.DB_PATH, price_board.path, price_archive.path
+    database.close_connection()
+    price_board.close()
+    price_archive.close()
+    database.DB_PATH = os.path.join(directory, 'bench.db')
+    price_board.path = os.path.join(directory, 'bench.board')
+    price_archive.path = os.path.join(directory, 'bench_archive')
+    try:
+        yield directory
+    finally:
+        database.close_connection()
+        price_board.close()
+        price_archive.close()
+        database.DB_PATH, price_board.path, price_archive.path = saved
+        shutil.rmtree(directory, ignore_errors=True)
\ No newline at end of file
@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Μέγιστο μέγεθος σειράς που διαβάζουμε από τη βάση πριν το LTTB
+MAX_SOURCE_POINTS = 1000000
+
+def to_epoch_ms(timestamps):
+    """Timestamps της βάσης (string) σε numpy array από epoch milliseconds"""
+    return np.array(timestamps, dtype='datetime64[ms]').astype(np.int64)
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: τα indices των threshold σημείων που κρατάμε.
+    
+    Το πρώτο και το τελευταίο σημείο μένουν πάντα. Τα υπόλοιπα χωρίζονται σε
+    threshold - 2 buckets και από κάθε bucket κρατάμε το σημείο που σχηματίζει
+    το μεγαλύτερο τρίγωνο με το προηγούμενο επιλεγμένο σημείο και τον μέσο
+    όρο του επόμενου bucket.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    
+    # Όρια των buckets στο [1, n - 1) και οι μέσοι όροι όλων μαζί με cumsum
+    edges = (np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    counts = np.diff(edges)
+    x_sums = np.add.reduceat(x[:n - 1], edges[:-1])
+    y_sums = np.add.reduceat(y[:n - 1], edges[:-1])
+    x_means = np.append(x_sums / counts, x[-1])
+    y_means = np.append(y_sums / counts, y[-1])
+    
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Ο μέσος όρος του επόμενου bucket (για το τελευταίο: το τελευταίο σημείο)
+        cx, cy = x_means[i + 1], y_means[i + 1]
+        ax, ay = x[a], y[a]
+        areas = np.abs((ax - cx) * (y[start:end] - ay) - (ax - x[start:end]) * (cy - ay))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    
+    return selected
+
+def downsample(timestamps, *series, points):
+    """Κρατά points σημεία με LTTB πάνω στην πρώτη σειρά του series.
+    
+    Επιστρέφει (timestamps, *series) με τα ίδια indices σε όλες τις σειρές,
+    ώστε π.χ. open/high/low να μένουν ευθυγραμμισμένα με το close.
+    """
+    if len(timestamps) <= points:
+        return (timestamps, *series)
+    
+    indices = lttb_indices(to_epoch_ms(timestamps), series[0], points)
+    result = [[timestamps[i] for i in indices]]
+    for values in series:
+        values = np.asarray(values)
+        result.append(values[indices].tolist())
+    return tuple(result)
+
+class ChartCache:
+    """LRU cache για έτοιμα (downsampled) series.
+    
+    Το key περιέχει το version των δεδομένων (π.χ. το τελευταίο timestamp
+    του νομίσματος), οπότε ένα νέο tick ακυρώνει αυτόματα τις παλιές εγγραφές.
+    """
+    
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
\ No newline at end of file
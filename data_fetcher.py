@@ -1,6 +1,34 @@
 import requests
+import csv
+import datetime
+import os
+import re
 import time
-from database import insert_price, init_db
+import random
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+import database
+from archive import format_timestamps, price_archive
+from database import insert_prices, init_db, prune_history, ingest_stats
+
+API_URL = "https://api.coingecko.com/api/v3/simple/price"
+
+# Ρυθμίσεις για μεγάλο αριθμό νομισμάτων
+MAX_IDS_LENGTH = 1800         # μέγιστο μήκος της παραμέτρου ids ανά request (URL-safe)
+MAX_WORKERS = 4               # παράλληλα requests
+RATE_LIMIT_PER_MINUTE = 30    # όριο του δωρεάν CoinGecko API
+REQUEST_TIMEOUT = 10          # δευτερόλεπτα
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0            # δευτερόλεπτα, διπλασιάζεται σε κάθε retry
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+PRUNE_INTERVAL = 3600         # κάθε πόσα δευτερόλεπτα εφαρμόζεται το retention
+CHANGE_ONLY = True            # γράφουμε μόνο τιμές που άλλαξαν (+ heartbeat rows)
+BACKFILL_BATCH = 500000       # γραμμές ανά transaction στο import ιστορικού
+BACKFILL_CHUNK = 1 << 20      # bytes ανά διάβασμα των JSON dumps
+BACKFILL_BLOCK = 65536        # γραμμές CSV ανά block
+BACKFILL_VALUES = 200         # γραμμές ανά INSERT (multi-row VALUES, 400 parameters)
 
 # Λίστα με τα νομίσματα που θέλουμε να παρακολουθούμε
 COINS = [
@@ -26,30 +54,161 @@ COINS = [
     'maker'             # MKR
 ]
 
-def fetch_crypto_prices():
-    """Τραβάει τις τιμές από το CoinGecko API"""
-    url = "https://api.coingecko.com/api/v3/simple/price"
+class RateLimiter:
+    """Thread-safe όριο requests ανά λεπτό (ομοιόμορφη κατανομή στο χρόνο)"""
     
+    def __init__(self, calls_per_minute=RATE_LIMIT_PER_MINUTE):
+        self.interval = 60.0 / calls_per_minute if calls_per_minute else 0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Περιμένει μέχρι να επιτρέπεται το επόμενο request"""
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+_session = None
+
+def get_session():
+    """Κοινό requests.Session με connection pool για όλα τα batches"""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+        _session.mount('https://', adapter)
+        _session.mount('http://', adapter)
+    return _session
+
+def chunk_coins(coins, max_length=MAX_IDS_LENGTH):
+    """Χωρίζει τα ids σε batches ώστε το ','.join(batch) να μην ξεπερνά το max_length"""
+    batches = []
+    batch, length = [], 0
+    for coin_id in coins:
+        extra = len(coin_id) + (1 if batch else 0)
+        if batch and length + extra > max_length:
+            batches.append(batch)
+            batch, length = [], 0
+            extra = len(coin_id)
+        batch.append(coin_id)
+        length += extra
+    if batch:
+        batches.append(batch)
+    return batches
+
+def backoff_delay(attempt, response=None):
+    """Χρόνος αναμονής πριν το retry: Retry-After αν υπάρχει, αλλιώς exponential με jitter"""
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return BACKOFF_BASE * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+def fetch_batch(ids, url=API_URL, limiter=None, session=None):
+    """Τραβάει ένα batch από ids, με retries σε 429/5xx.
+    
+    Επιστρέφει (data, stats): latency_ms είναι ο χρόνος του επιτυχημένου
+    request, elapsed_ms ο συνολικός χρόνος μαζί με rate limit και retries.
+    """
+    session = session or get_session()
     params = {
-        'ids': ','.join(COINS),
+        'ids': ','.join(ids),
         'vs_currencies': 'usd'
     }
     
+    start = time.perf_counter()
+    for attempt in range(MAX_RETRIES + 1):
+        if limiter:
+            limiter.acquire()
+        
+        response = None
+        request_start = time.perf_counter()
+        try:
+            response = session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                data = response.json()
+                break
+        except (requests.ConnectionError, requests.Timeout):
+            pass
+        
+        if attempt == MAX_RETRIES:
+            status = response.status_code if response is not None else 'connection error'
+            raise RuntimeError(f"Batch of {len(ids)} coins failed after {attempt + 1} attempts ({status})")
+        time.sleep(backoff_delay(attempt, response))
+    
+    end = time.perf_counter()
+    stats = {
+        'coins': len(ids),
+        'latency_ms': (end - request_start) * 1000,
+        'elapsed_ms': (end - start) * 1000,
+        'attempts': attempt + 1
+    }
+    return data, stats
+
+def fetch_prices(coins=None, url=API_URL, max_workers=MAX_WORKERS,
+                 calls_per_minute=RATE_LIMIT_PER_MINUTE):
+    """Τραβάει τιμές για οσαδήποτε νομίσματα σε παράλληλα batches.
+    
+    Επιστρέφει (data, stats): το data έχει τη μορφή της απάντησης του
+    CoinGecko ({coin_id: {'usd': price}}), το stats ένα dict ανά batch.
+    Batches που αποτυγχάνουν αναφέρονται στο stats με 'error'.
+    """
+    coins = coins or COINS
+    batches = chunk_coins(coins)
+    limiter = RateLimiter(calls_per_minute)
+    
+    def run(batch):
+        try:
+            return fetch_batch(batch, url=url, limiter=limiter)
+        except Exception as e:
+            return {}, {'coins': len(batch), 'error': str(e)}
+    
+    data, stats = {}, []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch_data, batch_stats in executor.map(run, batches):
+            data.update(batch_data)
+            stats.append(batch_stats)
+    
+    for i, batch_stats in enumerate(stats, 1):
+        if 'error' in batch_stats:
+            print(f"❌ Batch {i}/{len(stats)}: {batch_stats['error']}")
+        else:
+            print(f"📦 Batch {i}/{len(stats)}: {batch_stats['coins']} coins "
+                  f"in {batch_stats['latency_ms']:.0f}ms ({batch_stats['attempts']} attempts)")
+    
+    return data, stats
+
+def fetch_crypto_prices(coins=None, url=API_URL, calls_per_minute=RATE_LIMIT_PER_MINUTE):
+    """Τραβάει τις τιμές από το CoinGecko API"""
+    coins = coins or COINS
+    
     try:
-        response = requests.get(url, params=params)
-        data = response.json()
+        data, _ = fetch_prices(coins, url=url, calls_per_minute=calls_per_minute)
         
-        # Επανάληψη σε κάθε νόμισμα και αποθήκευση στη βάση
-        for coin_id in COINS:
+        # Μαζεύουμε όλο τον κύκλο και τον γράφουμε σε ένα transaction
+        tick = {}
+        missing = []
+        for coin_id in coins:
             if coin_id in data:
-                price = data[coin_id]['usd']
-                insert_price(coin_id, price)
-                print(f"✅ {coin_id}: ${price}")
+                tick[coin_id] = data[coin_id]['usd']
             else:
-                print(f"❌ Δεν βρέθηκε τιμή για: {coin_id}")
+                missing.append(coin_id)
         
-        return data
+        if missing:
+            print(f"❌ Δεν βρέθηκε τιμή για {len(missing)} νομίσματα: {', '.join(missing[:10])}")
         
+        if tick:
+            stored = ingest_stats['stored']
+            timestamp = insert_prices(tick, change_only=CHANGE_ONLY)
+            stored = ingest_stats['stored'] - stored
+            print(f"✅ Stored {stored}/{len(tick)} prices at {timestamp}"
+                  f" ({len(tick) - stored} unchanged)")
+        
+        return data
+    
     except Exception as e:
         print(f"❌ Σφάλμα: {e}")
         return None
@@ -61,14 +220,500 @@ def continuous_fetch(interval=60):
     
     init_db()  # Βεβαιώνουμε ότι η βάση υπάρχει
     
+    last_prune = 0
     try:
         while True:
             print(f"\n🕒 Fetching data at {time.strftime('%Y-%m-%d %H:%M:%S')}")
             fetch_crypto_prices()
+            
+            # Retention: σβήνουμε raw ticks που καλύπτονται πλέον από τα rollups
+            if time.time() - last_prune >= PRUNE_INTERVAL:
+                print(f"🧹 Pruned: {prune_history()}")
+                last_prune = time.time()
+            
             time.sleep(interval)
     except KeyboardInterrupt:
         print("\n⏹️ Data fetching stopped")
 
+# market_chart: {"prices": [[ms, price], ...], "market_caps": [...], ...}
+CHART_PAIR = re.compile(rb'\[\s*(-?[0-9.eE+-]+)\s*,\s*(-?[0-9.eE+-]+|null)\s*\]')
+CHART_END = re.compile(rb'\]\s*\]')        # ] ζεύγους + ] του πίνακα
+CHART_CLOSED = re.compile(rb'\s*\]')       # ] του πίνακα στην αρχή του buffer (ανάμεσα σε ζεύγη)
+
+# Ονόματα στηλών που αναγνωρίζονται στα CSV (CoinGecko export: snapped_at,price,...)
+CSV_TIME_COLUMNS = ('timestamp', 'ts_ms', 'ts', 'time', 'date', 'snapped_at')
+CSV_PRICE_COLUMNS = ('price', 'close')
+CSV_COIN_COLUMNS = ('coin', 'coin_name', 'coin_id')
+
+_day_ms = {}
+
+def parse_time_ms(value):
+    """epoch seconds/ms ή ISO timestamp (UTC) σε epoch ms"""
+    value = value.strip()
+    if value.replace('.', '', 1).isdigit():
+        number = float(value)
+        return int(number if number >= 1e11 else number * 1000)
+    
+    # Γρήγορος δρόμος για 'YYYY-MM-DD[ HH:MM:SS][ UTC|Z]': η μέρα υπολογίζεται μία φορά
+    rest, tail = value[11:19], value[19:]
+    if tail in ('', 'Z', ' UTC', '+00:00') and (len(value) == 10 or rest[2:3] == rest[5:6] == ':'):
+        base = _day_ms.get(value[:10])
+        if base is None:
+            day = datetime.datetime.strptime(value[:10], '%Y-%m-%d').replace(tzinfo=datetime.timezone.utc)
+            base = _day_ms[value[:10]] = int(day.timestamp()) * 1000
+        if len(value) == 10:
+            return base
+        return base + (int(rest[:2]) * 3600 + int(rest[3:5]) * 60 + int(rest[6:8])) * 1000
+    return database.timestamp_to_ms(database.parse_timestamp(value))
+
+def parse_chart_pairs(body):
+    """'[ms,price],[ms,price],...' σε (ts_ms, prices) numpy arrays"""
+    if b'null' not in body:
+        numbers = np.fromstring(body.translate(None, b'[] \t\r\n').strip(b','), sep=',')
+        if len(numbers) % 2 == 0:
+            return numbers[0::2].astype(np.int64), numbers[1::2]
+    # Αργός δρόμος: κενές τιμές (null) ή κάτι που δεν είναι μόνο αριθμοί
+    pairs = [(float(ms), float(price)) for ms, price in CHART_PAIR.findall(body) if price != b'null']
+    numbers = np.array(pairs, dtype=np.float64).reshape(-1, 2)
+    return numbers[:, 0].astype(np.int64), numbers[:, 1].copy()
+
+def iter_market_chart(f, coin_name, key='prices', chunk_size=BACKFILL_CHUNK):
+    """Διαβάζει σταδιακά τα [ms, price] ενός market_chart JSON (binary file).
+    
+    Δίνει blocks (coin_name, ts_ms, prices) χωρίς να φορτώνει όλο το αρχείο:
+    κρατάμε στη μνήμη μόνο ένα chunk και το κομμάτι μετά το τελευταίο ].
+    """
+    marker = re.compile(rb'"' + key.encode() + rb'"\s*:\s*\[')
+    buffer = b''
+    while True:
+        chunk = f.read(chunk_size)
+        buffer += chunk
+        match = marker.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        if not chunk:
+            return
+        buffer = buffer[-64:]
+    
+    # Ο buffer ξεκινά πάντα ανάμεσα σε δύο ζεύγη (βάθος 1 μέσα στον πίνακα):
+    # αμέσως μετά το [ του πίνακα ή μετά το ] του τελευταίου ζεύγους που
+    # διαβάστηκε. Ένα ] εκεί κλείνει τον πίνακα· αλλιώς τον κλείνει το πρώτο
+    # ]] (ζεύγος + πίνακας). Έτσι ένα chunk που κόβεται ακριβώς μετά το
+    # τελευταίο ζεύγος δεν ψάχνει το τέλος μέσα στα "market_caps".
+    while True:
+        if CHART_CLOSED.match(buffer):
+            return
+        end = CHART_END.search(buffer)
+        if end:
+            body = buffer[:end.start() + 1]
+        else:
+            cut = buffer.rfind(b']') + 1
+            body, buffer = buffer[:cut], buffer[cut:]
+        
+        if body:
+            ts, prices = parse_chart_pairs(body)
+            if len(ts):
+                yield coin_name, ts, prices
+        if end:
+            return
+        
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        buffer += chunk
+
+def iter_csv(f, coin_name, block_size=BACKFILL_BLOCK):
+    """Διαβάζει σταδιακά ένα CSV με στήλες χρόνου/τιμής (και προαιρετικά νομίσματος)"""
+    reader = csv.reader(f)
+    header = [column.strip().lower() for column in next(reader, [])]
+    
+    def column(names, required=True):
+        for name in names:
+            if name in header:
+                return header.index(name)
+        if required:
+            raise ValueError(f"CSV needs one of the columns: {', '.join(names)}")
+        return None
+    
+    time_col, price_col = column(CSV_TIME_COLUMNS), column(CSV_PRICE_COLUMNS)
+    coin_col = column(CSV_COIN_COLUMNS, required=False)
+    
+    def block():
+        return coin_name, np.array(ts, dtype=np.int64), np.array(prices, dtype=np.float64)
+    
+    ts, prices = [], []
+    for record in reader:
+        if not record or not record[price_col]:
+            continue
+        name = record[coin_col] if coin_col is not None else coin_name
+        # Ένα block έχει ένα νόμισμα
+        if name != coin_name or len(ts) >= block_size:
+            if ts:
+                yield block()
+            coin_name, ts, prices = name, [], []
+        ts.append(parse_time_ms(record[time_col]))
+        prices.append(float(record[price_col]))
+    if ts:
+        yield block()
+
+def new_ticks(conn, coin_id, coin_name, ts, prices, archived_ms=None):
+    """Ταξινομεί τα ticks ενός batch και κρατά όσα δεν υπάρχουν ήδη στη βάση ή στο archive.
+    
+    Επιστρέφει δύο ζεύγη (ts, prices): τα νέα ticks για το prices_v2 και τα
+    νέα ticks μέχρι το archived_ms (το τέλος του archive), που ανήκουν στο archive.
+    """
+    order = np.argsort(ts, kind='stable')
+    ts, prices = ts[order], prices[order]
+    # Ίδιο timestamp δύο φορές στο αρχείο: κερδίζει το τελευταίο
+    keep = np.append(ts[1:] != ts[:-1], True)
+    ts, prices = ts[keep], prices[keep]
+    split = 0 if archived_ms is None else np.searchsorted(ts, archived_ms, 'right')
+    old_ts, old_prices, ts, prices = ts[:split], prices[:split], ts[split:], prices[split:]
+    
+    if len(old_ts):
+        existing = price_archive.scan(coin_name, int(old_ts[0]), int(old_ts[-1]))[0]
+        keep = ~np.isin(old_ts, existing)
+        old_ts, old_prices = old_ts[keep], old_prices[keep]
+    if len(ts):
+        existing = np.fromiter((row[0] for row in conn.execute(
+            'SELECT ts_ms FROM prices_v2 WHERE coin_id = ? AND ts_ms BETWEEN ? AND ?',
+            (coin_id, int(ts[0]), int(ts[-1])))), np.int64)
+        if len(existing):
+            keep = ~np.isin(ts, existing)
+            ts, prices = ts[keep], prices[keep]
+    return (ts, prices), (old_ts, old_prices)
+
+def insert_ticks(conn, coin_id, ts, prices, per_statement=BACKFILL_VALUES):
+    """INSERT ταξινομημένων ticks ενός νομίσματος με multi-row VALUES.
+    
+    Μία εντολή για per_statement γραμμές: ~2x πιο γρήγορα από ένα
+    executemany με μία γραμμή τη φορά.
+    """
+    values = [None] * (2 * len(ts))
+    values[0::2] = ts.tolist()
+    values[1::2] = prices.tolist()
+    
+    def sql(count):
+        # coin_id είναι int από τη βάση: inline, μόνο ts_ms/price ως parameters
+        return ('INSERT INTO prices_v2 (coin_id, ts_ms, price) VALUES '
+                + ', '.join([f'({int(coin_id)}, ?, ?)'] * count))
+    
+    full = len(ts) // per_statement * per_statement * 2
+    step = 2 * per_statement
+    conn.executemany(sql(per_statement), (values[i:i + step] for i in range(0, full, step)))
+    if full < len(values):
+        conn.execute(sql((len(values) - full) // 2), values[full:])
+
+def merge_batch_rollups(conn, coin_name, ts, prices, now=None):
+    """OHLC buckets ενός ταξινομημένου batch με numpy, συγχωνευμένα στα rollups.
+    
+    Buckets παλαιότερα από το RETENTION_DAYS του επιπέδου παραλείπονται
+    (θα τα έσβηνε το επόμενο prune).
+    """
+    now = now or time.time()
+    for resolution, (table, _, seconds) in database.ROLLUPS.items():
+        days = database.RETENTION_DAYS.get(resolution)
+        level_ts, level_prices = ts, prices
+        if days is not None:
+            keep = ts >= int((now - days * 86400) * 1000)
+            level_ts, level_prices = ts[keep], prices[keep]
+        if not len(level_ts):
+            continue
+        
+        keys = level_ts // (seconds * 1000)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+        ends = np.concatenate((starts[1:], [len(keys)])) - 1
+        database.merge_rollups(conn, table, zip(
+            [coin_name] * len(starts),
+            format_timestamps(keys[starts] * seconds * 1000),
+            level_prices[starts].tolist(),
+            np.maximum.reduceat(level_prices, starts).tolist(),
+            np.minimum.reduceat(level_prices, starts).tolist(),
+            level_prices[ends].tolist(),
+            (ends - starts + 1).tolist(),
+            format_timestamps(level_ts[starts]),
+            format_timestamps(level_ts[ends])))
+
+def backfill_file(path, coin_name=None, batch=BACKFILL_BATCH):
+    """Φορτώνει ένα market_chart JSON ή CSV στο prices_v2 σε μεγάλα transactions.
+    
+    Κάθε batch γράφεται ταξινομημένο κατά (coin_id, ts_ms), χωρίς τα ticks
+    που υπάρχουν ήδη (ό,τι υπάρχει κερδίζει), μαζί με τα OHLC buckets του
+    και με το πόσες γραμμές του αρχείου έχουν περαστεί, σε ένα transaction.
+    Ticks μέχρι το τέλος του archive συγχωνεύονται στα partitions του archive
+    (πριν το commit, όπως στο archive(): ένα rerun δεν τα ξαναγράφει).
+    Μετά από διακοπή το ίδιο αρχείο συνεχίζει από εκεί χωρίς διπλές γραμμές.
+    Τα rollups δεν ενημερώνονται ανά γραμμή (update_rollups) αλλά ανά batch.
+    
+    Επιστρέφει dict με rows (γραμμές του αρχείου), inserted (νέα ticks στη βάση),
+    archived (νέα ticks στο archive) και coins.
+    """
+    source = os.path.abspath(path)
+    info = os.stat(path)
+    coin_name = coin_name or os.path.basename(path).split('.')[0]
+    
+    conn = database.get_connection()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS backfill_progress (
+            source TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            rows INTEGER NOT NULL,
+            done INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    progress = conn.execute('SELECT size, mtime_ns, rows, done FROM backfill_progress WHERE source = ?',
+                            (source,)).fetchone()
+    # Αν το αρχείο άλλαξε από την προηγούμενη φορά ξεκινάμε από την αρχή
+    skip = progress[2] if progress and progress[:2] == (info.st_size, info.st_mtime_ns) else 0
+    result = {'rows': 0, 'inserted': 0, 'archived': 0, 'coins': set()}
+    if skip and progress[3]:
+        print(f"⏭️ {path}: already imported ({skip:,} rows)")
+        return result
+    if skip:
+        print(f"↩️ {path}: resuming after {skip:,} rows")
+    
+    is_csv = path.lower().endswith('.csv')
+    f = open(path, newline='', encoding='utf-8') if is_csv else open(path, 'rb')
+    position = f.buffer.tell if is_csv else f.tell
+    blocks = iter_csv(f, coin_name) if is_csv else iter_market_chart(f, coin_name)
+    
+    pending, pending_rows = {}, 0
+    parsed = skip
+    # Ticks μέχρι το τέλος του archive πάνε στο archive, όχι στο prices_v2
+    archived = {name: max(meta['last_ms'] for meta in months.values())
+                for name, months in price_archive.load_index().items() if months}
+    start = time.perf_counter()
+    
+    def flush(done=False):
+        nonlocal pending, pending_rows
+        with database.transaction() as conn:
+            coin_ids = database.get_coin_ids(conn, list(pending))
+            for name, parts in pending.items():
+                (ts, prices), (old_ts, old_prices) = new_ticks(
+                    conn, coin_ids[name], name, np.concatenate([p[0] for p in parts]),
+                    np.concatenate([p[1] for p in parts]), archived.get(name))
+                if len(old_ts):
+                    price_archive.append(name, old_ts, old_prices)
+                    merge_batch_rollups(conn, name, old_ts, old_prices)
+                    result['archived'] += len(old_ts)
+                if len(ts):
+                    insert_ticks(conn, coin_ids[name], ts, prices)
+                    merge_batch_rollups(conn, name, ts, prices)
+                    result['inserted'] += len(ts)
+                    result['coins'].add(name)
+            conn.execute('''
+                INSERT INTO backfill_progress (source, size, mtime_ns, rows, done)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(source) DO UPDATE SET
+                    size = excluded.size, mtime_ns = excluded.mtime_ns,
+                    rows = excluded.rows, done = excluded.done
+            ''', (source, info.st_size, info.st_mtime_ns, parsed, int(done)))
+        
+        elapsed = time.perf_counter() - start
+        imported = parsed - skip
+        print(f"📥 {os.path.basename(path)}: {parsed:,} rows, "
+              f"{position() / max(info.st_size, 1):.0%} of file, {imported / max(elapsed, 1e-9):,.0f} rows/s")
+        pending, pending_rows = {}, 0
+    
+    try:
+        to_skip = skip
+        for name, ts, prices in blocks:
+            if to_skip:
+                if len(ts) <= to_skip:
+                    to_skip -= len(ts)
+                    continue
+                ts, prices, to_skip = ts[to_skip:], prices[to_skip:], 0
+            pending.setdefault(name, []).append((ts, prices))
+            pending_rows += len(ts)
+            parsed += len(ts)
+            if pending_rows >= batch:
+                flush()
+        flush(done=True)
+    finally:
+        f.close()
+    
+    result['rows'] = parsed - skip
+    return result
+
+def backfill(paths, coin_name=None, batch=BACKFILL_BATCH):
+    """Import ιστορικού από αρχεία (market_chart JSON ή CSV) στη βάση"""
+    init_db()
+    start = time.perf_counter()
+    rows = inserted = archived = 0
+    coins = set()
+    for path in paths:
+        result = backfill_file(path, coin_name, batch)
+        rows += result['rows']
+        inserted += result['inserted']
+        archived += result['archived']
+        coins |= result['coins']
+    
+    if coins:
+        # Το latest_prices μία φορά στο τέλος, μόνο αν το import έχει νεότερα ticks
+        with database.transaction() as conn:
+            names = sorted(coins)
+            conn.execute(f'''
+                INSERT INTO latest_prices (coin_name, price, timestamp)
+                SELECT coins.name, p.price, {database.SQL_MS_TO_TIMESTAMP.format('p.ts_ms')}
+                FROM coins
+                JOIN prices_v2 p ON p.coin_id = coins.id
+                    AND p.ts_ms = (SELECT MAX(ts_ms) FROM prices_v2 WHERE coin_id = coins.id)
+                WHERE coins.name IN ({', '.join('?' * len(names))})
+                ON CONFLICT(coin_name) DO UPDATE
+                SET price = excluded.price, timestamp = excluded.timestamp
+                WHERE excluded.timestamp >= latest_prices.timestamp
+            ''', names)
+            database.bump_versions(conn, 'prices')
+    
+    elapsed = time.perf_counter() - start
+    print(f"✅ Backfill: {rows:,} rows ({inserted:,} new, {archived:,} merged into the archive) "
+          f"for {len(coins)} coins in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    return {'rows': rows, 'inserted': inserted, 'archived': archived, 'coins': len(coins), 'seconds': elapsed}
+
+def benchmark_backfill(rows=10000000, coins=10):
+    """Import market_chart dumps (ένα ανά νόμισμα, ανά λεπτό) σε άδεια βάση"""
+    from benchtools import check, temp_database
+    
+    first = 1577836800000           # 2020-01-01
+    ticks = rows // coins
+    
+    with temp_database('backfill-bench-') as folder:
+        paths = []
+        for j in range(coins):
+            path = os.path.join(folder, f'coin-{j:02d}.json')
+            with open(path, 'w') as f:
+                f.write('{"prices": [')
+                for start in range(0, ticks, 100000):
+                    f.write(','.join(f'[{first + i * 60000},{100 + j + (i % 1000) / 100}]'
+                                     for i in range(start, min(ticks, start + 100000))))
+                    if start + 100000 < ticks:
+                        f.write(',')
+                f.write('], "market_caps": [[0, 1]], "total_volumes": []}')
+            paths.append(path)
+        
+        size = sum(os.path.getsize(path) for path in paths)
+        print(f"⏱️ {rows:,} rows in {coins} files ({size / 1e6:.0f}MB)")
+        result = backfill(paths)
+        check(result['rows'] == ticks * coins, f"{result['rows']} rows imported, expected {ticks * coins}")
+        # Δεύτερο τρέξιμο: όλα τα αρχεία είναι ήδη περασμένα
+        again = backfill(paths)['rows']
+        check(again == 0, f"{again} rows imported again from files already done")
+
+def benchmark_fetch(coins=2000, calls_per_minute=600):
+    """Ένας κύκλος fetch για coins νομίσματα απέναντι σε τοπικό stub του CoinGecko.
+    
+    Το stub ελέγχει το μήκος του ids και το rate limit (429 αν ξεπεραστεί)
+    και σπάει σκόπιμα την πρώτη προσπάθεια κάποιων batches (429 με
+    Retry-After, 500, 503 δύο φορές). Ελέγχουμε το πλήθος των batches, τα
+    retries και ότι όλες οι τιμές γράφτηκαν στη βάση.
+    """
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+    from benchtools import check, temp_database
+    global BACKOFF_BASE
+    
+    coin_ids = [f'stub-coin-{i:04d}' for i in range(coins)]
+    batches = chunk_coins(coin_ids)
+    # Πρώτο id του batch -> πόσες φορές αποτυγχάνει πριν απαντήσει κανονικά
+    failures = {batch[0]: (429, 500, 503)[i % 3] for i, batch in enumerate(batches) if i % 4 == 0}
+    failures = {first: [status] * (2 if status == 503 else 1) for first, status in failures.items()}
+    expected_retries = sum(len(statuses) for statuses in failures.values())
+    window = 60.0 / calls_per_minute
+    state = {'requests': 0, 'rate_limited': 0, 'too_long': 0, 'injected': 0, 'batches': set(), 'last': 0.0}
+    lock = threading.Lock()
+    
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            ids_param = parse_qs(urlparse(self.path).query).get('ids', [''])[0]
+            ids = ids_param.split(',')
+            with lock:
+                state['requests'] += 1
+                now = time.monotonic()
+                # Ανοχή 50% στο διάστημα: τα threads του client ξεκινούν με jitter
+                too_fast = now - state['last'] < window * 0.5
+                state['last'] = now
+                if len(ids_param) > MAX_IDS_LENGTH:
+                    state['too_long'] += 1
+                    status = 414
+                elif too_fast:
+                    state['rate_limited'] += 1
+                    status = 429
+                elif failures.get(ids[0]):
+                    state['injected'] += 1
+                    status = failures[ids[0]].pop()
+                else:
+                    state['batches'].add(ids[0])
+                    status = 200
+            
+            body = b'{}'
+            if status == 200:
+                body = json.dumps({coin_id: {'usd': 1 + int(coin_id[-4:]) / 100} for coin_id in ids}).encode()
+            self.send_response(status)
+            if status == 429:
+                self.send_header('Retry-After', '0')
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/api/v3/simple/price'
+    
+    saved_backoff = BACKOFF_BASE
+    BACKOFF_BASE = 0.01
+    
+    try:
+        with temp_database('fetch-bench-'):
+            init_db()
+            start = time.perf_counter()
+            data = fetch_crypto_prices(coin_ids, url=url, calls_per_minute=calls_per_minute)
+            elapsed = time.perf_counter() - start
+            
+            stored = database.get_connection().execute(
+                f"SELECT COUNT(*) FROM latest_prices WHERE coin_name LIKE 'stub-coin-%'").fetchone()[0]
+    finally:
+        server.shutdown()
+        BACKOFF_BASE = saved_backoff
+    
+    check(data is not None and len(data) == coins, f"{len(data or {})} prices fetched, expected {coins}")
+    check(len(state['batches']) == len(batches), f"{len(state['batches'])} batches answered, expected {len(batches)}")
+    check(state['too_long'] == 0, f"{state['too_long']} requests with ids over {MAX_IDS_LENGTH} chars")
+    check(state['rate_limited'] == 0, f"{state['rate_limited']} requests rate-limited by the stub")
+    check(state['injected'] == expected_retries, f"{state['injected']} injected failures, expected {expected_retries}")
+    check(state['requests'] == len(batches) + expected_retries + state['rate_limited'],
+          f"{state['requests']} requests for {len(batches)} batches and {expected_retries} retries")
+    check(stored == coins, f"{stored} rows stored, expected {coins}")
+    
+    print(f"⏱️ {coins} coins in {len(batches)} batches at {calls_per_minute} calls/min: {elapsed:.2f}s, "
+          f"{state['requests']} requests ({state['injected']} injected failures retried, "
+          f"{state['rate_limited']} rate-limited), {stored} rows stored ✅")
+
 if __name__ == "__main__":
-    # Για δοκιμή, τράβα δεδομένα μια φορά
-    fetch_crypto_prices()
\ No newline at end of file
+    import sys
+    
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == 'backfill':
+        # python data_fetcher.py backfill FILE... [--coin NAME]
+        args = sys.argv[2:]
+        coin_name = None
+        if '--coin' in args:
+            i = args.index('--coin')
+            coin_name = args[i + 1]
+            del args[i:i + 2]
+        backfill(args, coin_name)
+    elif command == 'bench':
+        # python data_fetcher.py bench [coins]
+        benchmark_fetch(int(sys.argv[2]) if len(sys.argv) > 2 else 2000)
+    elif command == 'bench-backfill':
+        # python data_fetcher.py bench-backfill [rows]
+        benchmark_backfill(int(sys.argv[2]) if len(sys.argv) > 2 else 10000000)
+    else:
+        # Για δοκιμή, τράβα δεδομένα μια φορά
+        fetch_crypto_prices()
\ No newline at end of file
@@ -1,79 +1,977 @@
 import sqlite3
 import datetime
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from ticks import tick_bus
+from priceboard import price_board
+from archive import price_archive
 
-def init_db():
-    """Δημιουργεί τη βάση δεδομένων και τον πίνακα αν δεν υπάρχουν"""
-    conn = sqlite3.connect('crypto_prices.db')
-    c = conn.cursor()
+# Στο Docker δείχνει σε mounted φάκελο (CRYPTO_DB_PATH=/app/data/crypto_prices.db), ώστε
+# μαζί με τη βάση να μένουν τα -wal/-shm, το .board και το _archive/ δίπλα της
+DB_PATH = os.environ.get('CRYPTO_DB_PATH', 'crypto_prices.db')
+
+# Pragmas που εφαρμόζονται σε κάθε νέα σύνδεση.
+# WAL: οι readers δεν μπλοκάρουν πάνω στα writes του fetcher (και αντίστροφα)
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,          # ~20MB page cache
+    'mmap_size': 268435456,        # 256MB memory-mapped I/O
+    'busy_timeout': 5000,          # ms αναμονής για lock αντί για άμεσο error
+    'temp_store': 'MEMORY',
+}
+
+# OHLC rollups: resolution -> (πίνακας, format του bucket για strftime, διάρκεια σε sec)
+ROLLUPS = {
+    '1m': ('prices_1m', '%Y-%m-%d %H:%M:00', 60),
+    '1h': ('prices_1h', '%Y-%m-%d %H:00:00', 3600),
+    '1d': ('prices_1d', '%Y-%m-%d 00:00:00', 86400),
+}
+
+# Πόσες μέρες κρατάμε τα raw ticks και τα λεπτά (None = για πάντα)
+RETENTION_DAYS = {
+    'raw': 7,
+    '1m': 90,
+    '1h': None,
+    '1d': None,
+}
+
+# Domains του data_versions (ETags του httpcache): τιμές, συναλλαγές/υπόλοιπα, alerts
+VERSION_DOMAINS = ('prices', 'ledger', 'alerts')
+# Η τρέχουσα ώρα σε epoch seconds μέσα σε SQL (triggers)
+SQL_NOW = "((julianday('now') - 2440587.5) * 86400.0)"
+
+# Μέγιστος αριθμός σημείων όταν η ανάλυση επιλέγεται αυτόματα
+MAX_HISTORY_POINTS = 1000
+
+# Change-only ingest: νέα γραμμή στο prices_v2 μόνο αν η τιμή κινήθηκε πάνω από
+# CHANGE_EPSILON (σχετική μεταβολή) ή αν πέρασαν HEARTBEAT_INTERVAL seconds από
+# την τελευταία γραμμή. Κενό μεγαλύτερο από το heartbeat = δεν είχαμε δεδομένα.
+CHANGE_EPSILON = 0.0
+HEARTBEAT_INTERVAL = 600
+
+# v2: prices_v2 (coin_id, ts_ms) WITHOUT ROWID + coins, και το prices είναι view
+SCHEMA_VERSION = 2
+MIGRATION_BATCH = 50000
+
+# SQL: epoch ms <-> timestamp της βάσης ('YYYY-MM-DD HH:MM:SS', UTC)
+SQL_MS_TO_TIMESTAMP = "datetime({} / 1000, 'unixepoch')"
+SQL_TIMESTAMP_TO_MS = "CAST(round((julianday({}) - 2440587.5) * 86400000) AS INTEGER)"
+
+# Μία σύνδεση ανά thread ανά αρχείο βάσης
+_local = threading.local()
+
+# coin_name -> coin_id ανά αρχείο βάσης (τα ids δεν αλλάζουν ποτέ)
+_coin_ids = {}
+
+# Μετρητές του ingest σε αυτό το process (observed ticks vs γραμμές που γράφτηκαν)
+ingest_stats = {'observed': 0, 'stored': 0, 'suppressed': 0, 'heartbeats': 0}
+
+def get_connection(db_path=None):
+    """Επιστρέφει τη σύνδεση του τρέχοντος thread (τη δημιουργεί αν χρειάζεται)"""
+    db_path = db_path or DB_PATH
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
     
-    # Δημιουργία πίνακα
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS prices (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            coin_name TEXT NOT NULL,
-            price REAL NOT NULL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    conn = connections.get(db_path)
+    if conn is None:
+        # isolation_level=None: τα transactions τα ανοίγουμε ρητά με transaction()
+        conn = sqlite3.connect(db_path, timeout=PRAGMAS['busy_timeout'] / 1000,
+                               isolation_level=None)
+        for name, value in PRAGMAS.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        connections[db_path] = conn
+    return conn
+
+def on_commit(callback, db_path=None):
+    """Καλεί το callback μετά το commit του τρέχοντος transaction (ή αμέσως)"""
+    db_path = db_path or DB_PATH
+    if not get_connection(db_path).in_transaction:
+        callback()
+        return
+    pending = getattr(_local, 'pending', None)
+    if pending is None:
+        pending = _local.pending = {}
+    pending.setdefault(db_path, []).append(callback)
+
+def _run_pending(db_path, committed):
+    """Εκτελεί (ή πετάει, μετά από rollback) τα callbacks του on_commit"""
+    callbacks = getattr(_local, 'pending', {}).pop(db_path or DB_PATH, [])
+    if committed:
+        for callback in callbacks:
+            callback()
+
+def close_connection(db_path=None):
+    """Κλείνει τη σύνδεση του τρέχοντος thread"""
+    connections = getattr(_local, 'connections', {})
+    conn = connections.pop(db_path or DB_PATH, None)
+    if conn is not None:
+        conn.close()
+
+@contextmanager
+def transaction(db_path=None, immediate=False):
+    """Context manager για ένα write transaction πάνω στη σύνδεση του thread.
+    
+    Αν υπάρχει ήδη ανοιχτό transaction, οι εντολές απλά μπαίνουν σε αυτό.
+    """
+    conn = get_connection(db_path)
+    if conn.in_transaction:
+        yield conn
+        return
+    
+    conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        _run_pending(db_path, committed=False)
+        raise
+    else:
+        committed = False
+        try:
+            conn.commit()
+            committed = True
+        finally:
+            # Αν το commit αποτύχει (π.χ. SQLITE_BUSY) το transaction μένει ανοιχτό:
+            # rollback, και τα callbacks του on_commit πετιούνται για να μην τρέξουν
+            # μετά το επόμενο, άσχετο commit του thread
+            if not committed and conn.in_transaction:
+                conn.rollback()
+            _run_pending(db_path, committed)
+
+def init_data_versions(conn):
+    """Πίνακας data_versions: ένας μετρητής αλλαγών ανά domain δεδομένων.
+    
+    Βρίσκεται στη βάση, οπότε όλα τα processes (web workers, fetcher) βλέπουν
+    τα ίδια versions - από εδώ βγαίνουν τα ETags του httpcache. Το version
+    ξεκινά από τυχαίο αριθμό: μια καινούργια βάση δεν ξαναδίνει παλιά ETags.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            domain TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            changed_at REAL NOT NULL        -- epoch seconds
         )
     ''')
+    conn.executemany('INSERT OR IGNORE INTO data_versions (domain, version, changed_at) VALUES (?, ?, ?)',
+                     [(domain, secrets.randbits(40), time.time()) for domain in VERSION_DOMAINS])
+
+def track_versions(conn, table, domain):
+    """Triggers που αυξάνουν το version του domain σε κάθε αλλαγή του table.
+    
+    Έτσι κάθε write, από οποιοδήποτε process και code path, αλλάζει το version
+    στο ίδιο transaction. Οι τιμές δεν έχουν triggers (ένα tick γράφει
+    χιλιάδες γραμμές): το insert_prices καλεί το bump_versions μία φορά.
+    """
+    init_data_versions(conn)
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_version
+            AFTER {event} ON {table}
+            BEGIN
+                UPDATE data_versions
+                SET version = version + 1, changed_at = {SQL_NOW}
+                WHERE domain = '{domain}';
+            END
+        ''')
+
+def bump_versions(conn, *domains):
+    """Αλλάζει τα versions των domains μέσα στο transaction του conn"""
+    conn.executemany(f'UPDATE data_versions SET version = version + 1, changed_at = {SQL_NOW} WHERE domain = ?',
+                     [(domain,) for domain in domains])
+
+def get_data_versions(domains, db_path=None):
+    """{domain: (version, changed_at)} όπως είναι τώρα στη βάση"""
+    rows = get_connection(db_path).execute(
+        f"SELECT domain, version, changed_at FROM data_versions WHERE domain IN ({', '.join('?' * len(domains))})",
+        list(domains)
+    ).fetchall()
+    return {domain: (version, changed_at) for domain, version, changed_at in rows}
+
+def init_db():
+    """Δημιουργεί τη βάση δεδομένων και τον πίνακα αν δεν υπάρχουν"""
+    with transaction() as conn:
+        c = conn.cursor()
+        
+        # Λεξικό νομισμάτων: κάθε tick κρατά μόνο το ακέραιο id
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS coins (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            )
+        ''')
+        
+        # Τα raw ticks, ταξινομημένα στον δίσκο ανά (νόμισμα, χρόνο).
+        # Το primary key είναι και το index - δεν χρειάζεται άλλο.
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS prices_v2 (
+                coin_id INTEGER NOT NULL,
+                ts_ms INTEGER NOT NULL,
+                price REAL NOT NULL,
+                PRIMARY KEY (coin_id, ts_ms)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Νέα βάση: κατευθείαν το view· υπάρχουσα v1 βάση: μετά το migration
+        if not c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'prices'").fetchone():
+            create_prices_view(conn)
+        
+        # Μία γραμμή ανά νόμισμα με την τελευταία τιμή - ενημερώνεται
+        # στο ίδιο transaction με το insert_price
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS latest_prices (
+                coin_name TEXT PRIMARY KEY,
+                price REAL NOT NULL,
+                timestamp TIMESTAMP NOT NULL
+            )
+        ''')
+        
+        init_data_versions(conn)
+        
+        # OHLC ανά λεπτό/ώρα/μέρα, ενημερώνονται σε κάθε insert_prices
+        for table, _, _ in ROLLUPS.values():
+            c.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    coin_name TEXT NOT NULL,
+                    bucket TIMESTAMP NOT NULL,
+                    open REAL NOT NULL,
+                    high REAL NOT NULL,
+                    low REAL NOT NULL,
+                    close REAL NOT NULL,
+                    ticks INTEGER NOT NULL,
+                    first_timestamp TIMESTAMP NOT NULL,
+                    last_timestamp TIMESTAMP NOT NULL,
+                    PRIMARY KEY (coin_name, bucket)
+                ) WITHOUT ROWID
+            ''')
+        
+    # Εκτός του transaction: το migration κάνει commit ανά batch
+    migrate_prices_v2()
+    
+    with transaction() as conn:
+        migrate_latest_prices(conn)
+        migrate_rollups(conn)
+        
+        # Το κοινό board των τιμών ξεκινάει από ό,τι έχει η βάση
+        latest = conn.execute('SELECT coin_name, price, timestamp FROM latest_prices').fetchall()
+        on_commit(lambda: price_board.write(latest))
     
-    conn.commit()
-    conn.close()
     print("Βάση δεδομένων αρχικοποιήθηκε successfully!")
 
-def insert_price(coin_name, price):
-    """Εισάγει μια νέα τιμή στη βάση"""
-    conn = sqlite3.connect('crypto_prices.db')
-    c = conn.cursor()
+def create_prices_view(conn):
+    """Το prices ως view πάνω στο prices_v2, με τις στήλες του v1 schema.
     
-    c.execute('''
-        INSERT INTO prices (coin_name, price)
-        VALUES (?, ?)
-    ''', (coin_name, price))
+    Για SQL εκτός του database.py (π.χ. ad-hoc queries ή παλιά scripts):
+    SELECT και INSERT δουλεύουν όπως πριν. Ο κώδικας εδώ διαβάζει κατευθείαν
+    το prices_v2 ώστε να χρησιμοποιείται το primary key.
+    """
+    conn.execute(f'''
+        CREATE VIEW IF NOT EXISTS prices AS
+        SELECT coins.name AS coin_name, p.price AS price,
+               {SQL_MS_TO_TIMESTAMP.format('p.ts_ms')} AS timestamp
+        FROM prices_v2 p
+        JOIN coins ON coins.id = p.coin_id
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS prices_insert INSTEAD OF INSERT ON prices
+        BEGIN
+            INSERT OR IGNORE INTO coins (name) VALUES (NEW.coin_name);
+            INSERT OR REPLACE INTO prices_v2 (coin_id, ts_ms, price)
+            VALUES ((SELECT id FROM coins WHERE name = NEW.coin_name),
+                    {SQL_TIMESTAMP_TO_MS.format("coalesce(NEW.timestamp, 'now')")},
+                    NEW.price);
+        END
+    ''')
+    conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+def migrate_prices_v2(batch=MIGRATION_BATCH):
+    """Online migration του v1 πίνακα prices στο prices_v2.
+    
+    Αντιγράφει ανά batch, το καθένα στο δικό του transaction, ώστε readers
+    και fetcher να μην περιμένουν. Το τελευταίο batch, το DROP του παλιού
+    πίνακα και το view γίνονται μαζί σε ένα BEGIN IMMEDIATE. Αν διακοπεί,
+    την επόμενη φορά ξαναξεκινάει (το upsert κάνει την αντιγραφή idempotent).
+    """
+    conn = get_connection()
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'prices'").fetchone():
+        return
+    
+    total = conn.execute('SELECT COUNT(*) FROM prices').fetchone()[0]
+    print(f"🔄 Migrating {total} price rows to the v2 schema...")
+    
+    def copy(conn, after, until):
+        conn.execute('INSERT OR IGNORE INTO coins (name) SELECT DISTINCT coin_name FROM prices WHERE id > ?',
+                     (after,))
+        # Σε ίδιο (coin, ts_ms) κερδίζει η νεότερη γραμμή· μη έγκυρα timestamps αγνοούνται
+        conn.execute(f'''
+            INSERT INTO prices_v2 (coin_id, ts_ms, price)
+            SELECT coins.id, {SQL_TIMESTAMP_TO_MS.format('p.timestamp')}, p.price
+            FROM prices p
+            JOIN coins ON coins.name = p.coin_name
+            WHERE p.id > ? AND p.id <= ? AND julianday(p.timestamp) IS NOT NULL
+            ORDER BY p.id
+            ON CONFLICT(coin_id, ts_ms) DO UPDATE SET price = excluded.price
+        ''', (after, until))
+    
+    start = time.perf_counter()
+    copied = 0
+    max_id = conn.execute('SELECT MAX(id) FROM prices').fetchone()[0] or 0
+    while max_id - copied > batch:
+        with transaction() as conn:
+            copy(conn, copied, copied + batch)
+        copied += batch
+        print(f"   {copied}/{max_id}")
+    
+    with transaction(immediate=True) as conn:
+        copy(conn, copied, conn.execute('SELECT MAX(id) FROM prices').fetchone()[0] or 0)
+        conn.execute('DROP TABLE prices')
+        create_prices_view(conn)
+    
+    migrated = conn.execute('SELECT COUNT(*) FROM prices_v2').fetchone()[0]
+    print(f"✅ Migrated to {migrated} rows in prices_v2 in {time.perf_counter() - start:.1f}s "
+          f"(run 'python database.py vacuum' to shrink the file)")
+
+def vacuum():
+    """VACUUM της βάσης - επιστρέφει (μέγεθος πριν, μέγεθος μετά) σε bytes"""
+    before = os.path.getsize(DB_PATH)
+    get_connection().execute('VACUUM')
+    return before, os.path.getsize(DB_PATH)
+
+def migrate_latest_prices(conn):
+    """Γεμίζει τον latest_prices από τον prices (για υπάρχουσες βάσεις)"""
+    if conn.execute('SELECT 1 FROM latest_prices LIMIT 1').fetchone():
+        return
+    
+    # Στο SQLite, με MAX() οι υπόλοιπες στήλες έρχονται από τη γραμμή του max
+    c = conn.execute('''
+        INSERT INTO latest_prices (coin_name, price, timestamp)
+        SELECT coin_name, price, MAX(timestamp)
+        FROM prices
+        GROUP BY coin_name
+    ''')
+    if c.rowcount > 0:
+        print(f"✅ Backfilled latest_prices for {c.rowcount} coins")
+
+def migrate_rollups(conn):
+    """Χτίζει τα rollups από τον prices αν δεν έχουν χτιστεί ποτέ"""
+    daily = ROLLUPS['1d'][0]
+    if conn.execute(f'SELECT 1 FROM {daily} LIMIT 1').fetchone():
+        return
+    if conn.execute('SELECT 1 FROM prices_v2 LIMIT 1').fetchone():
+        rebuild_rollups()
+
+def current_timestamp():
+    """Timestamp σε UTC, στη μορφή του CURRENT_TIMESTAMP της SQLite"""
+    return datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+def timestamp_to_ms(timestamp):
+    """Timestamp της βάσης (UTC) σε epoch milliseconds"""
+    dt = datetime.datetime.fromisoformat(timestamp).replace(tzinfo=datetime.timezone.utc)
+    return int(round(dt.timestamp() * 1000))
+
+def get_coin_ids(conn, names):
+    """{coin_name: coin_id}, προσθέτοντας στο coins όσα νομίσματα λείπουν"""
+    known = _coin_ids.setdefault(DB_PATH, {})
+    missing = [name for name in set(names) if name not in known]
+    if not missing:
+        return known
+    
+    conn.executemany('INSERT OR IGNORE INTO coins (name) VALUES (?)', [(name,) for name in missing])
+    rows = conn.execute(f'''
+        SELECT name, id FROM coins WHERE name IN ({','.join('?' * len(missing))})
+    ''', missing).fetchall()
+    # Στο cache μόνο μετά το commit - σε rollback τα ids δεν υπάρχουν
+    on_commit(lambda: known.update(rows))
+    return {**known, **dict(rows)}
+
+def insert_prices(prices, timestamp=None, change_only=False,
+                  epsilon=CHANGE_EPSILON, heartbeat=HEARTBEAT_INTERVAL):
+    """Εισάγει τις τιμές ενός κύκλου (tick) σε ένα transaction.
+
+    Το prices είναι dict {coin_name: price} ή λίστα από (coin_name, price).
+    Όλες οι γραμμές παίρνουν το ίδιο timestamp, που επιστρέφεται.
+    Με change_only γράφονται στο prices_v2 και στα rollups μόνο όσα νομίσματα
+    άλλαξαν (ή χρειάζονται heartbeat)· latest_prices, board και tick bus
+    ενημερώνονται πάντα με όλο το tick.
+    """
+    items = list(prices.items() if isinstance(prices, dict) else prices)
+    timestamp = timestamp or current_timestamp()
+    rows = [(coin_name, price, timestamp) for coin_name, price in items]
+    
+    with transaction() as conn:
+        coin_ids = get_coin_ids(conn, [coin_name for coin_name, _ in items])
+        ts_ms = timestamp_to_ms(timestamp)
+        stored, heartbeats = items, 0
+        if change_only:
+            stored = []
+            for coin_name, price in items:
+                reason = needs_row(conn, coin_ids[coin_name], price, ts_ms, epsilon, heartbeat)
+                if reason:
+                    stored.append((coin_name, price))
+                    heartbeats += reason == 'heartbeat'
+        
+        conn.executemany('''
+            INSERT INTO prices_v2 (coin_id, ts_ms, price)
+            VALUES (?, ?, ?)
+            ON CONFLICT(coin_id, ts_ms) DO UPDATE SET price = excluded.price
+        ''', [(coin_ids[coin_name], ts_ms, price) for coin_name, price in stored])
+        
+        conn.executemany('''
+            INSERT INTO latest_prices (coin_name, price, timestamp)
+            VALUES (?, ?, ?)
+            ON CONFLICT(coin_name) DO UPDATE
+            SET price = excluded.price, timestamp = excluded.timestamp
+            WHERE excluded.timestamp >= latest_prices.timestamp
+        ''', rows)
+        
+        update_rollups(conn, [(coin_name, price, timestamp) for coin_name, price in stored])
+        bump_versions(conn, 'prices')
+        
+        # Οι subscribers (alerts, stream, ...) μαθαίνουν το tick μόλις γίνει commit
+        tick = {coin_name: price for coin_name, price in items}
+        on_commit(lambda: price_board.write(rows))
+        on_commit(lambda: tick_bus.publish(timestamp, tick))
+        on_commit(lambda: count_ingest(len(items), len(stored), heartbeats))
     
-    conn.commit()
-    conn.close()
+    return timestamp
+
+def needs_row(conn, coin_id, price, ts_ms, epsilon=CHANGE_EPSILON, heartbeat=HEARTBEAT_INTERVAL):
+    """Αν ένα tick πρέπει να γραφτεί: 'change', 'heartbeat' ή None (ίδια τιμή)"""
+    last = conn.execute('''
+        SELECT price, ts_ms FROM prices_v2
+        WHERE coin_id = ? AND ts_ms <= ?
+        ORDER BY ts_ms DESC
+        LIMIT 1
+    ''', (coin_id, ts_ms)).fetchone()
+    return tick_kind(last, price, ts_ms, epsilon, heartbeat)
+
+def tick_kind(last, price, ts_ms, epsilon=CHANGE_EPSILON, heartbeat=HEARTBEAT_INTERVAL):
+    """Ο κανόνας του change-only ingest απέναντι στην τελευταία γραμμή last = (price, ts_ms).
+    
+    Τον εφαρμόζουν το needs_row (last από τη βάση) και το PriceCache (last από
+    το ring), ώστε cache και βάση να κρατούν τα ίδια ticks.
+    """
+    # Πρώτο tick του νομίσματος ή ξαναγράφουμε το ίδιο timestamp
+    if last is None or last[1] == ts_ms:
+        return 'change'
+    last_price, last_ms = last
+    if abs(price - last_price) > epsilon * abs(last_price):
+        return 'change'
+    if ts_ms - last_ms >= heartbeat * 1000:
+        return 'heartbeat'
+    return None
+
+def count_ingest(observed, stored, heartbeats):
+    ingest_stats['observed'] += observed
+    ingest_stats['stored'] += stored
+    ingest_stats['suppressed'] += observed - stored
+    ingest_stats['heartbeats'] += heartbeats
+
+def update_rollups(conn, rows):
+    """Ενημερώνει incrementally τα OHLC buckets για τα (coin_name, price, timestamp)"""
+    for table, bucket_format, _ in ROLLUPS.values():
+        # Στο UPDATE όλες οι στήλες δεξιά του = έχουν τις παλιές τιμές
+        conn.executemany(f'''
+            INSERT INTO {table} (coin_name, bucket, open, high, low, close, ticks,
+                                 first_timestamp, last_timestamp)
+            VALUES (?1, strftime('{bucket_format}', ?3), ?2, ?2, ?2, ?2, 1, ?3, ?3)
+            ON CONFLICT(coin_name, bucket) DO UPDATE SET
+                open = CASE WHEN excluded.first_timestamp < first_timestamp
+                            THEN excluded.open ELSE open END,
+                close = CASE WHEN excluded.last_timestamp >= last_timestamp
+                             THEN excluded.close ELSE close END,
+                high = max(high, excluded.high),
+                low = min(low, excluded.low),
+                ticks = ticks + 1,
+                first_timestamp = min(first_timestamp, excluded.first_timestamp),
+                last_timestamp = max(last_timestamp, excluded.last_timestamp)
+        ''', rows)
+
+def merge_rollups(conn, table, rows):
+    """Συγχωνεύει έτοιμα OHLC buckets (coin_name, bucket, open, high, low, close,
+    ticks, first_timestamp, last_timestamp) με όσα υπάρχουν ήδη στον πίνακα"""
+    conn.executemany(f'''
+        INSERT INTO {table} (coin_name, bucket, open, high, low, close, ticks,
+                             first_timestamp, last_timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(coin_name, bucket) DO UPDATE SET
+            open = CASE WHEN excluded.first_timestamp < first_timestamp
+                        THEN excluded.open ELSE open END,
+            close = CASE WHEN excluded.last_timestamp >= last_timestamp
+                         THEN excluded.close ELSE close END,
+            high = max(high, excluded.high),
+            low = min(low, excluded.low),
+            ticks = ticks + excluded.ticks,
+            first_timestamp = min(first_timestamp, excluded.first_timestamp),
+            last_timestamp = max(last_timestamp, excluded.last_timestamp)
+    ''', rows)
+
+def rebuild_rollups(since=None):
+    """Ξαναχτίζει τα rollups από τα raw ticks (backfill για υπάρχουσες βάσεις).
+    
+    Με since, ξαναχτίζονται μόνο τα buckets από εκείνη τη στιγμή και μετά.
+    Κάθε επίπεδο ξαναχτίζεται ανά νόμισμα μόνο εκεί που η πηγή του (raw ticks,
+    λεπτά, ώρες) έχει ακόμα δεδομένα. Buckets πριν το πρώτο tick της πηγής
+    (μεταφέρθηκαν στο archive ή τα έσβησε το prune) μένουν όπως είναι, και
+    το bucket του πρώτου tick επίσης αν περιέχει ήδη και παλαιότερα ticks.
+    """
+    since = since or '0000-00-00 00:00:00'
+    
+    with transaction() as conn:
+        # Τα λεπτά από τα raw ticks, οι ώρες από τα λεπτά, οι μέρες από τις ώρες
+        source, source_time = None, None
+        for resolution, (table, bucket_format, _) in ROLLUPS.items():
+            start = conn.execute(f"SELECT strftime('{bucket_format}', ?)", (since,)).fetchone()[0] or since
+            if source is None:
+                # (κλειδί της πηγής, νόμισμα, πρώτο tick), με lookup στο primary key
+                coverage = conn.execute(f'''
+                    SELECT id, name, {SQL_MS_TO_TIMESTAMP.format('(SELECT MIN(ts_ms) FROM prices_v2 WHERE coin_id = coins.id)')}
+                    FROM coins
+                ''').fetchall()
+            else:
+                coverage = conn.execute(f'''
+                    SELECT name, name, (SELECT first_timestamp FROM {source}
+                                        WHERE coin_name = coins.name ORDER BY bucket LIMIT 1)
+                    FROM coins
+                ''').fetchall()
+            
+            count = 0
+            for key, coin_name, first_timestamp in coverage:
+                if first_timestamp is None:
+                    continue        # Τίποτα στην πηγή: τα buckets του νομίσματος μένουν
+                boundary = conn.execute(f"SELECT strftime('{bucket_format}', ?)", (first_timestamp,)).fetchone()[0]
+                coin_start = max(start, boundary)
+                conn.execute(f'''
+                    DELETE FROM {table}
+                    WHERE coin_name = ? AND bucket >= ? AND NOT (bucket = ? AND first_timestamp < ?)
+                ''', (coin_name, coin_start, boundary, first_timestamp))
+                
+                if source is None:
+                    # Raw ticks: open/close με lookup στο primary key (coin_id, ts_ms)
+                    c = conn.execute(f'''
+                        INSERT INTO {table} (coin_name, bucket, open, high, low, close, ticks,
+                                             first_timestamp, last_timestamp)
+                        SELECT ?, g.rollup_bucket,
+                               (SELECT price FROM prices_v2 WHERE coin_id = ? AND ts_ms = g.first_key),
+                               g.high, g.low,
+                               (SELECT price FROM prices_v2 WHERE coin_id = ? AND ts_ms = g.last_key),
+                               g.ticks,
+                               {SQL_MS_TO_TIMESTAMP.format('g.first_key')}, {SQL_MS_TO_TIMESTAMP.format('g.last_key')}
+                        FROM (
+                            SELECT strftime('{bucket_format}', ts_ms / 1000, 'unixepoch') AS rollup_bucket,
+                                   MAX(price) AS high, MIN(price) AS low, COUNT(*) AS ticks,
+                                   MIN(ts_ms) AS first_key, MAX(ts_ms) AS last_key
+                            FROM prices_v2
+                            WHERE coin_id = ? AND ts_ms >= ?
+                            GROUP BY rollup_bucket
+                        ) g
+                        WHERE true
+                        ON CONFLICT(coin_name, bucket) DO NOTHING
+                    ''', (coin_name, key, key, key, timestamp_to_ms(coin_start)))
+                else:
+                    # Rollups: open/close με lookup στο primary key (coin_name, bucket)
+                    aggregates = '''
+                        MAX(high) AS high, MIN(low) AS low, SUM(ticks) AS ticks,
+                        MIN(first_timestamp) AS first_timestamp, MAX(last_timestamp) AS last_timestamp,
+                        MIN(bucket) AS first_key, MAX(bucket) AS last_key
+                    '''
+                    open_query = f'SELECT open FROM {source} WHERE coin_name = g.coin_name AND bucket = g.first_key'
+                    close_query = f'SELECT close FROM {source} WHERE coin_name = g.coin_name AND bucket = g.last_key'
+                    
+                    c = conn.execute(f'''
+                        INSERT INTO {table} (coin_name, bucket, open, high, low, close, ticks,
+                                             first_timestamp, last_timestamp)
+                        SELECT g.coin_name, g.rollup_bucket,
+                               ({open_query} LIMIT 1), g.high, g.low,
+                               ({close_query} LIMIT 1), g.ticks,
+                               g.first_timestamp, g.last_timestamp
+                        FROM (
+                            SELECT coin_name, strftime('{bucket_format}', {source_time}) AS rollup_bucket, {aggregates}
+                            FROM {source}
+                            WHERE coin_name = ? AND {source_time} >= ?
+                            GROUP BY rollup_bucket
+                        ) g
+                        WHERE g.rollup_bucket IS NOT NULL
+                        ON CONFLICT(coin_name, bucket) DO NOTHING
+                    ''', (key, coin_start))
+                count += c.rowcount
+            
+            print(f"✅ Rebuilt {count} {resolution} buckets")
+            source, source_time = table, 'bucket'
+        bump_versions(conn, 'prices')
+
+def archive_history(before_ms=None, now=None):
+    """Μεταφέρει στο columnar archive τα raw ticks πριν το before_ms.
+    
+    Χωρίς before_ms: ό,τι είναι παλαιότερο από το RETENTION_DAYS['raw'].
+    """
+    if before_ms is None:
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        before_ms = int((now - datetime.timedelta(days=RETENTION_DAYS['raw'])).timestamp() * 1000)
+    return price_archive.archive(before_ms)
+
+def prune_history(retention=None, now=None, archive=True):
+    """Σβήνει raw ticks και rollups παλαιότερα από το retention τους.
+    
+    Με archive=True τα raw ticks μεταφέρονται πρώτα στο archive, οπότε από
+    τη βάση φεύγουν αλλά το ιστορικό μένει διαθέσιμο.
+    """
+    retention = retention or RETENTION_DAYS
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    deleted = {}
+    
+    if archive and retention.get('raw') is not None:
+        horizon_ms = int((now - datetime.timedelta(days=retention['raw'])).timestamp() * 1000)
+        deleted['archived'] = sum(archive_history(horizon_ms).values())
+    
+    with transaction() as conn:
+        coins = [row[0] for row in conn.execute('SELECT coin_name FROM latest_prices')]
+        coin_ids = [row[0] for row in conn.execute('SELECT id FROM coins')]
+        
+        for resolution, days in retention.items():
+            if days is None:
+                continue
+            horizon = (now - datetime.timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+            
+            if resolution == 'raw':
+                if archive:
+                    # Το archive() τα έσβησε ήδη, στο transaction όπου τα διάβασε· ένα δεύτερο
+                    # DELETE εδώ θα έσβηνε και ticks που γράφτηκαν στο μεταξύ χωρίς archive
+                    continue
+                # Ανά νόμισμα ώστε να χρησιμοποιείται το primary key (coin_id, ts_ms)
+                horizon_ms = timestamp_to_ms(horizon)
+                c = conn.executemany('DELETE FROM prices_v2 WHERE coin_id = ? AND ts_ms < ?',
+                                     [(coin_id, horizon_ms) for coin_id in coin_ids])
+            else:
+                table = ROLLUPS[resolution][0]
+                c = conn.executemany(f'DELETE FROM {table} WHERE coin_name = ? AND bucket < ?',
+                                     [(coin, horizon) for coin in coins])
+            deleted[resolution] = c.rowcount
+        bump_versions(conn, 'prices')
+    
+    return deleted
+
+def insert_price(coin_name, price):
+    """Εισάγει μια νέα τιμή στη βάση"""
+    insert_prices([(coin_name, price)])
     print(f"Inserted {coin_name}: ${price}")
 
 def get_latest_prices():
     """Παίρνει τις τελευταίες τιμές για όλα τα νομίσματα"""
-    conn = sqlite3.connect('crypto_prices.db')
-    c = conn.cursor()
+    c = get_connection().cursor()
     
-    # Παίρνουμε την τελευταία εγγραφή για κάθε νόμισμα
+    # Μία γραμμή ανά νόμισμα, ανεξάρτητα από το μέγεθος του prices
     c.execute('''
-        SELECT p1.coin_name, p1.price, p1.timestamp
-        FROM prices p1
-        WHERE p1.timestamp = (
-            SELECT MAX(timestamp)
-            FROM prices p2
-            WHERE p2.coin_name = p1.coin_name
-        )
-        ORDER BY p1.coin_name
+        SELECT coin_name, price, timestamp
+        FROM latest_prices
+        ORDER BY coin_name
     ''')
     
-    results = c.fetchall()
-    conn.close()
-    return results
+    return c.fetchall()
+
+def get_latest_price(coin_name):
+    """Η τελευταία τιμή ενός νομίσματος (ή None αν δεν υπάρχει)"""
+    row = get_connection().execute(
+        'SELECT price FROM latest_prices WHERE coin_name = ?', (coin_name,)
+    ).fetchone()
+    return row[0] if row else None
+
+def get_latest_timestamp(coin_name):
+    """Το timestamp του τελευταίου tick ενός νομίσματος (ή None)"""
+    row = get_connection().execute(
+        'SELECT timestamp FROM latest_prices WHERE coin_name = ?', (coin_name,)).fetchone()
+    return row[0] if row else None
 
 def get_historical_data(coin_name, limit=50):
     """Παίρνει τα τελευταία 'limit' δεδομένα για ένα συγκεκριμένο νόμισμα"""
-    conn = sqlite3.connect('crypto_prices.db')
-    c = conn.cursor()
+    c = get_connection().cursor()
     
-    c.execute('''
-        SELECT price, timestamp 
-        FROM prices 
-        WHERE coin_name = ? 
-        ORDER BY timestamp DESC 
+    c.execute(f'''
+        SELECT price, {SQL_MS_TO_TIMESTAMP.format('ts_ms')}
+        FROM prices_v2
+        WHERE coin_id = (SELECT id FROM coins WHERE name = ?)
+        ORDER BY ts_ms DESC
         LIMIT ?
     ''', (coin_name, limit))
     
     results = c.fetchall()
-    conn.close()
     
     # Αντιστρέφουμε για να έχουμε παλιό -> νέο
     results.reverse()
+    
+    # Λίγα ticks στη βάση: τα προηγούμενα από το archive
+    if len(results) < limit:
+        before_ms = timestamp_to_ms(results[0][1]) if results else None
+        results = price_archive.get_tail(coin_name, limit - len(results), before_ms) + results
+    
+    # Change-only ingest: η τελευταία τιμή ισχύει μέχρι το τελευταίο tick που είδαμε
+    latest = get_latest_timestamp(coin_name)
+    if results and latest and latest > results[-1][1]:
+        results = (results + [(results[-1][0], latest)])[-limit:]
     return results
 
+def parse_timestamp(value):
+    """Μετατρέπει epoch seconds ή ISO string σε timestamp της βάσης (UTC)"""
+    if isinstance(value, datetime.datetime):
+        dt = value
+    elif isinstance(value, (int, float)) or str(value).replace('.', '', 1).isdigit():
+        dt = datetime.datetime.fromtimestamp(float(value), datetime.timezone.utc)
+    else:
+        dt = datetime.datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return dt.strftime('%Y-%m-%d %H:%M:%S')
+
+def pick_resolution(start, end, max_points=MAX_HISTORY_POINTS):
+    """Διαλέγει την πιο λεπτομερή ανάλυση που δίνει έως max_points σημεία"""
+    span = (datetime.datetime.fromisoformat(end) - datetime.datetime.fromisoformat(start)).total_seconds()
+    if span <= 3600:
+        return 'raw'
+    for resolution, (_, _, seconds) in ROLLUPS.items():
+        if span / seconds <= max_points:
+            return resolution
+    return '1d'
+
+def get_history_range(coin_name, start, end, resolution='raw'):
+    """Ιστορικό σε διάστημα [start, end] σε raw ή OHLC ανάλυση.
+
+    raw: λίστα από (price, timestamp)
+    1m/1h/1d: λίστα από (bucket, open, high, low, close)
+    
+    Με change-only ingest οι τιμές που δεν άλλαξαν δεν έχουν γραμμή: η raw
+    σειρά ξεκινά με την τιμή που ίσχυε στο start και φτάνει μέχρι το
+    τελευταίο tick που είδαμε, και τα OHLC buckets που λείπουν γεμίζουν με
+    το προηγούμενο close. Κενά μεγαλύτερα από HEARTBEAT_INTERVAL μένουν κενά.
+    """
+    c = get_connection().cursor()
+    
+    if resolution == 'raw':
+        start_ms, end_ms = timestamp_to_ms(start), timestamp_to_ms(end)
+        c.execute(f'''
+            SELECT price, {SQL_MS_TO_TIMESTAMP.format('ts_ms')}
+            FROM prices_v2
+            WHERE coin_id = (SELECT id FROM coins WHERE name = ?) AND ts_ms >= ? AND ts_ms <= ?
+            ORDER BY ts_ms
+        ''', (coin_name, start_ms, end_ms))
+        rows = c.fetchall()
+        
+        # Το κομμάτι του διαστήματος πριν το πρώτο tick της βάσης είναι στο archive
+        first_ms = c.execute('''
+            SELECT MIN(ts_ms) FROM prices_v2 WHERE coin_id = (SELECT id FROM coins WHERE name = ?)
+        ''', (coin_name,)).fetchone()[0]
+        if first_ms is None or start_ms < first_ms:
+            archive_end = end_ms if first_ms is None else min(end_ms, first_ms - 1)
+            rows = price_archive.get_history(coin_name, start_ms, archive_end) + rows
+        
+        # Forward-fill: η τιμή που ίσχυε στο start...
+        if not rows or rows[0][1] > start:
+            previous = c.execute('''
+                SELECT price, ts_ms FROM prices_v2
+                WHERE coin_id = (SELECT id FROM coins WHERE name = ?) AND ts_ms < ?
+                ORDER BY ts_ms DESC
+                LIMIT 1
+            ''', (coin_name, start_ms)).fetchone()
+            if previous is None:
+                ts, prices = price_archive.tail(coin_name, 1, start_ms)
+                previous = (float(prices[0]), int(ts[0])) if len(ts) else None
+            if previous and start_ms - previous[1] <= HEARTBEAT_INTERVAL * 1000:
+                rows.insert(0, (previous[0], start))
+        
+        # ...και η τελευταία τιμή μέχρι το τελευταίο tick που είδαμε (ως το end)
+        until = min(end, get_latest_timestamp(coin_name) or '')
+        if rows and until > rows[-1][1]:
+            rows.append((rows[-1][0], until))
+        return rows
+    
+    table, bucket_format, seconds = ROLLUPS[resolution]
+    c.execute(f'''
+        SELECT bucket, open, high, low, close
+        FROM {table}
+        WHERE coin_name = ? AND bucket >= ? AND bucket <= ?
+        ORDER BY bucket
+    ''', (coin_name, start, end))
+    rows = c.fetchall()
+    
+    previous = c.execute(f'''
+        SELECT bucket, open, high, low, close
+        FROM {table}
+        WHERE coin_name = ? AND bucket < ?
+        ORDER BY bucket DESC
+        LIMIT 1
+    ''', (coin_name, start)).fetchone()
+    until = min(end, get_latest_timestamp(coin_name) or '')
+    until = datetime.datetime.fromisoformat(until).strftime(bucket_format) if until else None
+    return fill_buckets(rows, seconds, previous, start, until)
+
+def get_history_ranges(coin_names, start, end, resolution):
+    """Όπως το get_history_range() σε OHLC ανάλυση, για πολλά νομίσματα μαζί.
+    
+    Τα buckets όλων των νομισμάτων και το τελευταίο bucket πριν το start
+    (για το forward-fill) έρχονται με ένα query, όχι ένα ανά νόμισμα.
+    Επιστρέφει {coin_name: λίστα από (bucket, open, high, low, close)}.
+    """
+    table, bucket_format, seconds = ROLLUPS[resolution]
+    conn = get_connection()
+    placeholders = ','.join('?' * len(coin_names))
+    
+    rows = {coin_name: [] for coin_name in coin_names}
+    previous = {}
+    for coin_name, bucket, open_, high, low, close in conn.execute(f'''
+        SELECT coin_name, bucket, open, high, low, close
+        FROM {table}
+        WHERE coin_name IN ({placeholders}) AND bucket >= ? AND bucket <= ?
+        UNION ALL
+        SELECT coin_name, MAX(bucket), open, high, low, close
+        FROM {table}
+        WHERE coin_name IN ({placeholders}) AND bucket < ?
+        GROUP BY coin_name
+        ORDER BY 1, 2
+    ''', (*coin_names, start, end, *coin_names, start)):
+        if bucket < start:
+            previous[coin_name] = (bucket, open_, high, low, close)
+        else:
+            rows[coin_name].append((bucket, open_, high, low, close))
+    
+    latest = dict(conn.execute(f'''
+        SELECT coin_name, timestamp FROM latest_prices WHERE coin_name IN ({placeholders})
+    ''', coin_names))
+    
+    result = {}
+    for coin_name in coin_names:
+        until = min(end, latest.get(coin_name) or '')
+        until = datetime.datetime.fromisoformat(until).strftime(bucket_format) if until else None
+        result[coin_name] = fill_buckets(rows[coin_name], seconds, previous.get(coin_name), start, until)
+    return result
+
+def fill_buckets(rows, seconds, previous=None, start=None, until=None,
+                 heartbeat=HEARTBEAT_INTERVAL):
+    """Forward-fill των OHLC buckets που λείπουν επειδή η τιμή δεν άλλαξε.
+
+    previous: το τελευταίο bucket πριν το start (ή None), until: το τελευταίο
+    bucket για το οποίο είδαμε tick. Τα κενά buckets γίνονται επίπεδα
+    (open = high = low = close = το προηγούμενο close), εκτός αν το κενό
+    είναι μεγαλύτερο από heartbeat (τότε δεν είχαμε δεδομένα).
+    """
+    step = datetime.timedelta(seconds=seconds)
+    max_gap = datetime.timedelta(seconds=heartbeat + seconds)
+    filled = []
+    last = previous
+    
+    def pad(target, inclusive=False):
+        t = datetime.datetime.fromisoformat(last[0])
+        target = datetime.datetime.fromisoformat(target)
+        if target - t > max_gap:
+            return
+        close = last[4]
+        t += step
+        while t < target or (inclusive and t == target):
+            bucket = t.strftime('%Y-%m-%d %H:%M:%S')
+            if start is None or bucket >= start:
+                filled.append((bucket, close, close, close, close))
+            t += step
+    
+    for row in rows:
+        if last is not None:
+            pad(row[0])
+        filled.append(row)
+        last = row
+    if last is not None and until and until > last[0]:
+        pad(until, inclusive=True)
+    return filled
+
+def benchmark_schema(rows=2000000, coins=20, rounds=200):
+    """Μέγεθος αρχείου και latency των queries: v1 πίνακας prices vs prices_v2"""
+    from benchtools import temp_database
+    
+    coin_names = [f'coin-{i:02d}' for i in range(coins)]
+    ticks = rows // coins
+    first = datetime.datetime(2025, 1, 1)
+    
+    def tick_rows():
+        for i in range(ticks):
+            timestamp = (first + datetime.timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S')
+            for j, coin_name in enumerate(coin_names):
+                yield coin_name, 100 + j + (i % 1000) / 100, timestamp
+    
+    def size(*tables):
+        # Bytes των πινάκων/indexes των τιμών (dbstat), χωρίς τα rollups
+        conn = get_connection()
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        return conn.execute(f'''
+            SELECT SUM(pgsize) FROM dbstat WHERE name IN ({','.join('?' * len(tables))})
+        ''', tables).fetchone()[0]
+    
+    def timed(query):
+        start = time.perf_counter()
+        for i in range(rounds):
+            query(coin_names[i % coins])
+        return (time.perf_counter() - start) / rounds * 1000
+    
+    day_start = (first + datetime.timedelta(minutes=ticks // 2)).strftime('%Y-%m-%d %H:%M:%S')
+    day_end = (first + datetime.timedelta(minutes=ticks // 2 + 1439)).strftime('%Y-%m-%d %H:%M:%S')
+    
+    with temp_database('schema-bench-'):
+        # Το v1 schema, όπως το έφτιαχνε το init_db
+        with transaction() as conn:
+            conn.execute('''
+                CREATE TABLE prices (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    coin_name TEXT NOT NULL,
+                    price REAL NOT NULL,
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.execute('CREATE INDEX idx_prices_coin_timestamp ON prices(coin_name, timestamp)')
+            conn.executemany('INSERT INTO prices (coin_name, price, timestamp) VALUES (?, ?, ?)', tick_rows())
+        
+        conn = get_connection()
+        v1 = {
+            'size': size('prices', 'idx_prices_coin_timestamp'),
+            'last 50': timed(lambda coin: conn.execute('''
+                SELECT price, timestamp FROM prices WHERE coin_name = ?
+                ORDER BY timestamp DESC LIMIT 50
+            ''', (coin,)).fetchall()),
+            '1 day range': timed(lambda coin: conn.execute('''
+                SELECT price, timestamp FROM prices
+                WHERE coin_name = ? AND timestamp >= ? AND timestamp <= ? ORDER BY timestamp
+            ''', (coin, day_start, day_end)).fetchall()),
+        }
+        
+        init_db()
+        vacuum()
+        v2 = {
+            'size': size('prices_v2', 'coins', 'sqlite_autoindex_coins_1'),
+            'last 50': timed(lambda coin: get_historical_data(coin, 50)),
+            '1 day range': timed(lambda coin: get_history_range(coin, day_start, day_end)),
+        }
+        
+        print(f"⏱️ {ticks * coins} rows, {coins} coins")
+        print(f"   price data:  v1 {v1['size'] / 1e6:.1f}MB -> v2 {v2['size'] / 1e6:.1f}MB")
+        for name in ('last 50', '1 day range'):
+            print(f"   {name + ':':<12} v1 {v1[name]:.3f}ms -> v2 {v2[name]:.3f}ms")
+
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    import sys
+    
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == 'bench-schema':
+        # python database.py bench-schema [rows]
+        # Μέσω του module database: το temp_database αλλάζει το database.DB_PATH, όχι του __main__
+        import database
+        database.benchmark_schema(int(sys.argv[2]) if len(sys.argv) > 2 else 2000000)
+        sys.exit()
+    
+    init_db()
+    if command == 'rebuild-rollups':
+        # python database.py rebuild-rollups [since]
+        rebuild_rollups(sys.argv[2] if len(sys.argv) > 2 else None)
+    elif command == 'prune':
+        print(f"🧹 Pruned: {prune_history()}")
+    elif command == 'vacuum':
+        before, after = vacuum()
+        print(f"🧹 {before / 1e6:.1f}MB -> {after / 1e6:.1f}MB")
\ No newline at end of file
@@ -0,0 +1,90 @@
+import json
+import zlib
+import database
+from archive import format_timestamps, price_archive
+
+EXPORT_CHUNK = 10000        # Γραμμές ανά query/chunk: σταθερή μνήμη για οποιοδήποτε μέγεθος
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+def export_coins():
+    """Όλα τα νομίσματα που έχουν δεδομένα στη βάση ή στο archive"""
+    names = {row[0] for row in database.get_connection().execute('SELECT name FROM coins')}
+    return sorted(names | set(price_archive.load_index()))
+
+def iter_ticks(coin_name, start_ms=None, end_ms=None, chunk=EXPORT_CHUNK):
+    """Τα ticks ενός νομίσματος σε chunks [(timestamp, price), ...], παλιό -> νέο.
+    
+    Πρώτα το archive (memmap, ό,τι είναι πριν το πρώτο tick της βάσης) και
+    μετά το prices_v2 με keyset pagination πάνω στο (coin_id, ts_ms). Κάθε
+    chunk είναι ένα σύντομο read στο WAL: ο fetcher γράφει κανονικά και το
+    checkpoint δεν περιμένει ένα export που κρατά snapshot για ώρα.
+    """
+    conn = database.get_connection()
+    row = conn.execute('SELECT id FROM coins WHERE name = ?', (coin_name,)).fetchone()
+    coin_id = row[0] if row else None
+    first_ms = None
+    if coin_id is not None:
+        first_ms = conn.execute('SELECT MIN(ts_ms) FROM prices_v2 WHERE coin_id = ?',
+                                (coin_id,)).fetchone()[0]
+    
+    # Το κομμάτι πριν το πρώτο tick της βάσης είναι στο archive
+    if first_ms is None or start_ms is None or start_ms < first_ms:
+        archive_end = end_ms if first_ms is None else first_ms - 1
+        if end_ms is not None:
+            archive_end = min(end_ms, archive_end)
+        for ts, prices in price_archive.partitions(coin_name, start_ms, archive_end):
+            lo = 0 if start_ms is None else int(ts.searchsorted(start_ms, 'left'))
+            hi = len(ts) if archive_end is None else int(ts.searchsorted(archive_end, 'right'))
+            for i in range(lo, hi, chunk):
+                j = min(i + chunk, hi)
+                yield list(zip(format_timestamps(ts[i:j]), prices[i:j].tolist()))
+    
+    if first_ms is None:
+        return
+    after = (start_ms if start_ms is not None else first_ms) - 1
+    end_ms = end_ms if end_ms is not None else 2 ** 62
+    while True:
+        rows = conn.execute(f'''
+            SELECT ts_ms, {database.SQL_MS_TO_TIMESTAMP.format('ts_ms')}, price
+            FROM prices_v2
+            WHERE coin_id = ? AND ts_ms > ? AND ts_ms <= ?
+            ORDER BY ts_ms
+            LIMIT ?
+        ''', (coin_id, after, end_ms, chunk)).fetchall()
+        if not rows:
+            return
+        yield [(timestamp, price) for _, timestamp, price in rows]
+        if len(rows) < chunk:
+            return
+        after = rows[-1][0]
+
+def format_chunk(coin_name, rows, fmt):
+    if fmt == 'ndjson':
+        prefix = '{"coin": ' + json.dumps(coin_name) + ', "timestamp": "'
+        return ''.join(f'{prefix}{timestamp}", "price": {price!r}}}\n' for timestamp, price in rows)
+    return ''.join(f'{coin_name},{timestamp},{price!r}\n' for timestamp, price in rows)
+
+def stream_export(coins, start_ms=None, end_ms=None, fmt='csv', compress=False):
+    """Generator με bytes για ένα Flask Response: CSV ή NDJSON, προαιρετικά gzip.
+    
+    Ένα chunk στη μνήμη τη φορά, για ένα ή για όλα τα νομίσματα (με τη σειρά).
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    
+    def emit(text):
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+    
+    header = emit('coin,timestamp,price\n') if fmt == 'csv' else b''
+    if header:
+        yield header
+    for coin_name in coins:
+        for rows in iter_ticks(coin_name, start_ms, end_ms):
+            data = emit(format_chunk(coin_name, rows, fmt))
+            if data:
+                yield data
+    if compressor:
+        yield compressor.flush()
\ No newline at end of file
@@ -0,0 +1,182 @@
+import gzip
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from functools import wraps
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:         # Προαιρετικό: χωρίς brotli μόνο gzip
+    brotli = None
+
+COMPRESS_MIN_BYTES = 1024   # Μικρότερα σώματα δεν αξίζει να συμπιεστούν
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+SETTLE_SECONDS = 2.0        # Τόσο μετά από μια αλλαγή δεν κάνουμε cache (βλ. current)
+
+class ResponseCache:
+    """Conditional GET για το JSON read API.
+    
+    Κάθε endpoint δηλώνει από ποια δεδομένα εξαρτάται (π.χ. 'prices',
+    'ledger'). Κάθε τέτοιο domain έχει ένα version που διαβάζεται από την
+    κοινή κατάσταση με το versions(domains) -> {domain: (version, changed_at)}
+    (στο app: ο πίνακας data_versions της βάσης, που αλλάζει στο ίδιο
+    transaction με κάθε write). Έτσι όλοι οι workers δίνουν τα ίδια ETags
+    και κανένας δεν μένει σε παλιό version όταν το write έγινε σε άλλο
+    process. Ένα If-None-Match που ταιριάζει απαντιέται με 304 πριν τρέξει
+    το view (με μία μικρή query, αυτή των versions).
+    
+    Τα σώματα των 200 αποθηκεύονται ανά (URL, version) σε LRU, μαζί με τις
+    συμπιεσμένες (gzip/brotli) εκδοχές τους, ώστε ένα poll χωρίς νέα
+    δεδομένα να μη ξαναφτιάχνει ούτε να ξανασυμπιέζει το JSON.
+    """
+    
+    def __init__(self, versions, max_entries=512, settle=SETTLE_SECONDS):
+        self.versions = versions        # domains -> {domain: (version, changed_at)}
+        self.max_entries = max_entries
+        self.settle = settle
+        self.entries = OrderedDict()    # full path -> (etag, body, {encoding: body}, changed_at)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.unsettled = 0
+    
+    def current(self, domains):
+        """(etag, χρόνος της τελευταίας αλλαγής) για τα τρέχοντα versions, ή None.
+        
+        None για settle seconds μετά από μια αλλαγή: τα caches στη μνήμη του
+        κάθε worker (price cache, portfolio engine, ...) ενημερώνονται λίγο
+        μετά το commit, και ένα σώμα που φτιάχτηκε στο μεταξύ δεν πρέπει να
+        μείνει στο cache με το νέο ETag.
+        """
+        versions = self.versions(domains)
+        state = [versions.get(domain, (0, 0.0)) for domain in domains]
+        changed_at = max(changed_at for _, changed_at in state)
+        if time.time() - changed_at < self.settle:
+            return None
+        return '"' + '.'.join(str(version) for version, _ in state) + '"', changed_at
+    
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "unsettled": self.unsettled
+        }
+    
+    def conditional(self, *domains, when=None):
+        """Decorator για GET views που εξαρτώνται μόνο από τα domains.
+        
+        Το when() (προαιρετικό) λέει αν το συγκεκριμένο request μπορεί να
+        γίνει cache - π.χ. όχι όταν το διάστημα τελειώνει στο "τώρα".
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != 'GET' or (when is not None and not when()):
+                    return view(*args, **kwargs)
+                
+                # Το version διαβάζεται πριν το view: αν αλλάξει στο μεταξύ,
+                # το σώμα απλά ξαναφτιάχνεται στο επόμενο request
+                current = self.current(domains)
+                if current is None:
+                    with self.lock:
+                        self.unsettled += 1
+                    return view(*args, **kwargs)
+                etag, changed_at = current
+                if self._not_modified(etag, changed_at):
+                    with self.lock:
+                        self.not_modified += 1
+                    return self._headers(Response(status=304), etag, self._last_modified(changed_at))
+                
+                key = request.full_path
+                with self.lock:
+                    entry = self.entries.get(key)
+                    if entry is not None and entry[0] == etag:
+                        self.entries.move_to_end(key)
+                        self.hits += 1
+                    else:
+                        entry = None
+                        self.misses += 1
+                
+                if entry is None:
+                    response = view(*args, **kwargs)
+                    if not isinstance(response, Response) or response.status_code != 200:
+                        return response
+                    entry = (etag, response.get_data(), {}, changed_at)
+                    with self.lock:
+                        self.entries[key] = entry
+                        self.entries.move_to_end(key)
+                        while len(self.entries) > self.max_entries:
+                            self.entries.popitem(last=False)
+                
+                return self._send(entry)
+            return wrapper
+        return decorator
+    
+    def _not_modified(self, etag, changed_at):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            # Το If-None-Match έχει προτεραιότητα· weak ETags (W/) συγκρίνονται ως ίσα
+            tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+            return etag in tags or '*' in tags
+        
+        if_modified_since = request.headers.get('If-Modified-Since')
+        last_modified = self._last_modified(changed_at)
+        if if_modified_since is None or last_modified is None:
+            return False
+        try:
+            return int(changed_at) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    
+    @staticmethod
+    def _last_modified(changed_at):
+        """Το Last-Modified έχει ακρίβεια δευτερολέπτου: για αλλαγή μέσα στο
+        τρέχον δευτερόλεπτο δεν το στέλνουμε, γιατί μια δεύτερη αλλαγή στο ίδιο
+        δευτερόλεπτο θα είχε το ίδιο Last-Modified (και λάθος 304)."""
+        if int(changed_at) >= int(time.time()):
+            return None
+        return formatdate(changed_at, usegmt=True)
+    
+    @staticmethod
+    def _headers(response, etag, last_modified):
+        response.headers['ETag'] = etag
+        if last_modified:
+            response.headers['Last-Modified'] = last_modified
+        # Ο browser κρατά το σώμα αλλά ρωτάει κάθε φορά (polling)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+    
+    def _send(self, entry):
+        etag, body, compressed, changed_at = entry
+        encoding = self._encoding(len(body))
+        if encoding is not None:
+            # Η συμπίεση γίνεται μία φορά ανά version (όχι ανά request)
+            if encoding not in compressed:
+                compressed[encoding] = (brotli.compress(body, quality=BROTLI_QUALITY) if encoding == 'br'
+                                        else gzip.compress(body, GZIP_LEVEL, mtime=0))
+            response = Response(compressed[encoding], mimetype='application/json')
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response = Response(body, mimetype='application/json')
+        return self._headers(response, etag, self._last_modified(changed_at))
+    
+    @staticmethod
+    def _encoding(size):
+        """br ή gzip αν τα δέχεται ο client και το σώμα είναι αρκετά μεγάλο"""
+        if size < COMPRESS_MIN_BYTES:
+            return None
+        accepted = {part.split(';')[0].strip().lower() for part in
+                    request.headers.get('Accept-Encoding', '').split(',')
+                    if part.replace(' ', '').split(';q=')[-1] not in ('0', '0.0', '0.00', '0.000')}
+        if brotli is not None and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return None
\ No newline at end of file
@@ -0,0 +1,337 @@
+import threading
+import time
+import numpy as np
+import database
+from archive import format_timestamps
+from pricecache import to_epoch
+
+SMA_PERIOD = 20
+EMA_PERIOD = 20
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BOLLINGER_PERIOD, BOLLINGER_WIDTH = 20, 2.0
+VOLATILITY_PERIOD = 24
+SIGNIFICANT_DIGITS = 12     # Ακρίβεια στο JSON (σημαντικά ψηφία, όχι δεκαδικά)
+
+# Buckets που κρατάμε ανά ανάλυση (1m: μία μέρα, 1h: ένα χρόνος, 1d: πέντε χρόνια)
+INDICATOR_WINDOWS = {'1m': 1440, '1h': 8760, '1d': 1825}
+DEFAULT_RESOLUTION = '1h'
+
+# Οι σειρές που επιστρέφονται· οι υπόλοιπες είναι state για τα incremental updates
+SERIES = ('sma', 'ema', 'rsi', 'macd', 'macd_signal', 'macd_hist',
+          'bollinger_upper', 'bollinger_lower', 'volatility')
+
+def ema_step(previous, value, alpha):
+    """Ένα βήμα EMA για όλα τα νομίσματα· ξεκινά από την πρώτη τιμή (όπως adjust=False)"""
+    return np.where(np.isnan(previous), value, previous + alpha * (value - previous))
+
+def ema(values, alpha):
+    """EMA κατά μήκος του χρόνου (axis 1), vectorized στα νομίσματα"""
+    result = np.empty_like(values)
+    previous = np.full(values.shape[0], np.nan)
+    for t in range(values.shape[1]):
+        previous = result[:, t] = ema_step(previous, values[:, t], alpha)
+    return result
+
+def rolling(values, period, reducer):
+    """reducer(window, axis=2) σε κάθε παράθυρο period στηλών· NaN όσο δεν γεμίζει"""
+    result = np.full(values.shape, np.nan)
+    if values.shape[1] >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(values, period, axis=1)
+        result[:, period - 1:] = reducer(windows, axis=2)
+    return result
+
+def returns(closes):
+    """Log returns (η πρώτη στήλη NaN)"""
+    result = np.full(closes.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result[:, 1:] = np.diff(np.log(closes), axis=1)
+    return result
+
+def compute_all(closes, annualize):
+    """Όλοι οι δείκτες για όλα τα νομίσματα μαζί (closes: νομίσματα x buckets)"""
+    result = {}
+    result['sma'] = rolling(closes, SMA_PERIOD, np.mean)
+    result['ema'] = ema(closes, 2 / (EMA_PERIOD + 1))
+    result['ema_fast'] = ema(closes, 2 / (MACD_FAST + 1))
+    result['ema_slow'] = ema(closes, 2 / (MACD_SLOW + 1))
+    result['macd'] = result['ema_fast'] - result['ema_slow']
+    result['macd_signal'] = ema(result['macd'], 2 / (MACD_SIGNAL + 1))
+    result['macd_hist'] = result['macd'] - result['macd_signal']
+    
+    # RSI με Wilder smoothing (EMA με alpha = 1 / period)
+    change = np.full(closes.shape, np.nan)
+    change[:, 1:] = np.diff(closes, axis=1)
+    result['avg_gain'] = ema(np.where(np.isnan(change), np.nan, np.maximum(change, 0)), 1 / RSI_PERIOD)
+    result['avg_loss'] = ema(np.where(np.isnan(change), np.nan, np.maximum(-change, 0)), 1 / RSI_PERIOD)
+    result['rsi'] = rsi(result['avg_gain'], result['avg_loss'])
+    
+    middle = rolling(closes, BOLLINGER_PERIOD, np.mean)
+    width = BOLLINGER_WIDTH * rolling(closes, BOLLINGER_PERIOD, np.std)
+    result['bollinger_upper'] = middle + width
+    result['bollinger_lower'] = middle - width
+    result['volatility'] = rolling(returns(closes), VOLATILITY_PERIOD,
+                                   lambda w, axis: np.std(w, axis=axis, ddof=1)) * annualize
+    return result
+
+def rsi(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+
+def correlation(closes):
+    """Πίνακας συσχέτισης των log returns (pairwise: μόνο τα κοινά buckets κάθε ζεύγους)"""
+    r = returns(closes)[:, 1:]
+    valid = np.isfinite(r)
+    if valid.all():
+        return np.corrcoef(r)
+    
+    # Με matrix products αντί για loop στα ζεύγη
+    mask = valid.astype(np.float64)
+    r = np.where(valid, r, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        n = mask @ mask.T
+        sums = (r @ mask.T) / n                # μέσος του i πάνω στα κοινά buckets με το j
+        squares = ((r * r) @ mask.T) / n
+        covariance = (r @ r.T) / n - sums * sums.T
+        variance = squares - sums ** 2
+        return covariance / np.sqrt(variance * variance.T)
+
+class IndicatorEngine:
+    """Τεχνικοί δείκτες για όλα τα νομίσματα σε ένα πλέγμα από buckets.
+    
+    Φορτώνει τα closes από τα rollups μιας ανάλυσης (forward-fill στα κενά)
+    και υπολογίζει όλους τους δείκτες μαζί με numpy. Μετά ακούει το tick bus:
+    κάθε tick αλλάζει μόνο την τελευταία στήλη (το τρέχον bucket), που
+    ξαναϋπολογίζεται από την προηγούμενη στήλη (EMA/RSI/MACD) και τα
+    τελευταία buckets (rolling δείκτες). Οι απαντήσεις μένουν στο cache
+    μέχρι το επόμενο tick.
+    
+    Κάθε load() ξεκινά τους αναδρομικούς δείκτες (EMA, MACD, RSI) από το
+    πρώτο bucket του παραθύρου, ενώ ένα engine που τρέχει από πριν κουβαλά
+    state από buckets που έχουν βγει από το πλέγμα. Η διαφορά φθίνει σαν
+    (1 - alpha)^window: για το RSI, το πιο αργό (alpha = 1/14), είναι κάτω
+    από 1e-40 ακόμα και στο παράθυρο του 1m (1440 buckets). Ένα μικρό window
+    όμως δίνει άλλες τιμές μετά από κάθε reload.
+    """
+    
+    def __init__(self, resolution=DEFAULT_RESOLUTION, window=None):
+        self.resolution = resolution
+        self.seconds = database.ROLLUPS[resolution][2]
+        self.window = window or INDICATOR_WINDOWS[resolution]
+        self.annualize = np.sqrt(365 * 86400 / self.seconds)
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.coins = []
+        self.index = {}             # coin -> γραμμή
+        self.closes = None          # νομίσματα x buckets
+        self.series = {}
+        self.last_bucket = None     # epoch / seconds του τελευταίου (τρέχοντος) bucket
+        self.version = 0
+        self.cache = {}
+    
+    def load(self):
+        """Γεμίζει το πλέγμα από τα rollups και υπολογίζει όλους τους δείκτες"""
+        table = database.ROLLUPS[self.resolution][0]
+        conn = database.get_connection()
+        coins = [row[0] for row in conn.execute('SELECT coin_name FROM latest_prices ORDER BY coin_name')]
+        latest = conn.execute('SELECT MAX(timestamp) FROM latest_prices').fetchone()[0]
+        last_bucket = int(to_epoch(latest) // self.seconds) if latest else int(time.time() // self.seconds)
+        first_bucket = last_bucket - self.window + 1
+        start = format_timestamps(np.array([first_bucket * self.seconds * 1000]))[0]
+        
+        closes = np.full((len(coins), self.window), np.nan)
+        index = {coin_name: i for i, coin_name in enumerate(coins)}
+        rows = conn.execute(f'SELECT coin_name, bucket, close FROM {table} WHERE bucket >= ?',
+                            (start,)).fetchall()
+        if rows:
+            names, buckets, prices = zip(*rows)
+            seconds = np.array(buckets, dtype='datetime64[s]').astype(np.int64)
+            rows_index = np.array([index.get(name, -1) for name in names])
+            columns = seconds // self.seconds - first_bucket
+            keep = (rows_index >= 0) & (columns >= 0) & (columns < self.window)
+            closes[rows_index[keep], columns[keep]] = np.array(prices)[keep]
+        
+        # Το close ενός bucket ισχύει μέχρι το επόμενο tick (κενά buckets = ίδια τιμή)
+        self._forward_fill(closes)
+        series = compute_all(closes, self.annualize)
+        
+        with self.lock:
+            self.coins, self.index = coins, index
+            self.closes, self.series = closes, series
+            self.last_bucket = last_bucket
+            self.loaded = True
+            self.version += 1
+            self.cache = {}
+    
+    @staticmethod
+    def _forward_fill(values):
+        """Forward-fill των NaN κατά μήκος του χρόνου (in place)"""
+        positions = np.where(np.isnan(values), 0, np.arange(values.shape[1]))
+        np.maximum.accumulate(positions, axis=1, out=positions)
+        filled = values[np.arange(values.shape[0])[:, None], positions]
+        # Πριν το πρώτο bucket ενός νομίσματος μένει NaN
+        values[:] = np.where(np.isnan(values[:, :1]) & (positions == 0), np.nan, filled)
+    
+    def ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+    
+    def on_tick(self, timestamp, prices):
+        """Subscriber του tick bus: ενημερώνει το τρέχον bucket"""
+        if not self.loaded:
+            return
+        bucket = int(to_epoch(timestamp) // self.seconds)
+        with self.lock:
+            if any(coin_name not in self.index for coin_name in prices):
+                # Νέο νόμισμα: ξαναφορτώνουμε στο επόμενο request
+                self.loaded = False
+                return
+            if bucket < self.last_bucket:
+                return
+            
+            # Νέο bucket: η τελευταία στήλη κλείνει, κάθε κενό bucket παίρνει το ίδιο close
+            steps = bucket - self.last_bucket
+            if steps >= self.window:
+                self.loaded = False
+                return
+            for _ in range(steps):
+                self._advance()
+            
+            rows = [self.index[coin_name] for coin_name in prices]
+            self.closes[rows, -1] = list(prices.values())
+            self._update_last()
+            self.version += 1
+            self.cache = {}
+    
+    def _advance(self):
+        """Ολισθαίνει το πλέγμα κατά ένα bucket (η νέα στήλη ξεκινά με το close της προηγούμενης)"""
+        for values in (self.closes, *self.series.values()):
+            values[:, :-1] = values[:, 1:]
+        self.last_bucket += 1
+        self._update_last()
+    
+    def _update_last(self):
+        """Ξαναϋπολογίζει μόνο την τελευταία στήλη κάθε δείκτη"""
+        closes, s = self.closes, self.series
+        x, previous = closes[:, -1], closes[:, -2]
+        
+        def window(values, period):
+            return values[:, -period:]
+        
+        s['sma'][:, -1] = window(closes, SMA_PERIOD).mean(axis=1)
+        s['ema'][:, -1] = ema_step(s['ema'][:, -2], x, 2 / (EMA_PERIOD + 1))
+        s['ema_fast'][:, -1] = ema_step(s['ema_fast'][:, -2], x, 2 / (MACD_FAST + 1))
+        s['ema_slow'][:, -1] = ema_step(s['ema_slow'][:, -2], x, 2 / (MACD_SLOW + 1))
+        s['macd'][:, -1] = s['ema_fast'][:, -1] - s['ema_slow'][:, -1]
+        s['macd_signal'][:, -1] = ema_step(s['macd_signal'][:, -2], s['macd'][:, -1], 2 / (MACD_SIGNAL + 1))
+        s['macd_hist'][:, -1] = s['macd'][:, -1] - s['macd_signal'][:, -1]
+        
+        change = x - previous
+        s['avg_gain'][:, -1] = ema_step(s['avg_gain'][:, -2], np.where(np.isnan(change), np.nan,
+                                                                       np.maximum(change, 0)), 1 / RSI_PERIOD)
+        s['avg_loss'][:, -1] = ema_step(s['avg_loss'][:, -2], np.where(np.isnan(change), np.nan,
+                                                                       np.maximum(-change, 0)), 1 / RSI_PERIOD)
+        s['rsi'][:, -1] = rsi(s['avg_gain'][:, -1], s['avg_loss'][:, -1])
+        
+        middle = window(closes, BOLLINGER_PERIOD).mean(axis=1)
+        width = BOLLINGER_WIDTH * window(closes, BOLLINGER_PERIOD).std(axis=1)
+        s['bollinger_upper'][:, -1] = middle + width
+        s['bollinger_lower'][:, -1] = middle - width
+        r = returns(window(closes, VOLATILITY_PERIOD + 1))[:, 1:]
+        s['volatility'][:, -1] = r.std(axis=1, ddof=1) * self.annualize
+    
+    def _cached(self, key, build):
+        with self.lock:
+            result = self.cache.get(key)
+            if result is None:
+                result = self.cache[key] = build()
+            return result
+    
+    def _timestamps(self, count):
+        buckets = np.arange(self.last_bucket - count + 1, self.last_bucket + 1, dtype=np.int64)
+        return format_timestamps(buckets * self.seconds * 1000)
+    
+    def get_indicators(self, coin_name, limit=200):
+        """Οι τελευταίοι limit buckets όλων των δεικτών για ένα νόμισμα (ή None)"""
+        self.ensure_loaded()
+        limit = max(1, min(limit, self.window))
+        
+        def build():
+            row = self.index.get(coin_name)
+            if row is None:
+                return None
+            result = {
+                'coin': coin_name,
+                'resolution': self.resolution,
+                'timestamps': self._timestamps(limit),
+                'prices': to_list(self.closes[row, -limit:])
+            }
+            for name in SERIES:
+                result[name] = to_list(self.series[name][row, -limit:])
+            result['latest'] = {name: result[name][-1] for name in ('prices', *SERIES)}
+            return result
+        
+        return self._cached(('indicators', coin_name, limit), build)
+    
+    def get_correlation(self, window=None):
+        """Συσχέτιση των log returns όλων των νομισμάτων στα τελευταία window buckets"""
+        self.ensure_loaded()
+        window = max(3, min(window or self.window, self.window))
+        
+        def build():
+            matrix = correlation(self.closes[:, -window:])
+            return {
+                'resolution': self.resolution,
+                'window': window,
+                'from': self._timestamps(window)[0],
+                'coins': list(self.coins),
+                'matrix': [to_list(row) for row in matrix]
+            }
+        
+        return self._cached(('correlation', window), build)
+
+def to_list(values):
+    """numpy -> list για JSON (NaN -> None), σε SIGNIFICANT_DIGITS σημαντικά ψηφία.
+    
+    Όχι round(value, 8): ένα νόμισμα στα 1e-8 (ή ένα MACD της τάξης του)
+    θα έχανε όλη την ακρίβεια.
+    """
+    digits = f'.{SIGNIFICANT_DIGITS}g'
+    return [None if value != value else float(format(value, digits)) + 0.0 for value in values.tolist()]
+
+def benchmark(coins=20, resolution='1h', ticks=1000):
+    """Ένας χρόνος δεδομένων: πλήρης υπολογισμός, συσχέτιση και ένα tick"""
+    from benchtools import check
+    
+    engine = IndicatorEngine(resolution)
+    rng = np.random.default_rng(1)
+    engine.coins = [f'coin-{i:02d}' for i in range(coins)]
+    engine.index = {coin_name: i for i, coin_name in enumerate(engine.coins)}
+    engine.closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (coins, engine.window)), axis=1))
+    engine.last_bucket = int(time.time() // engine.seconds)
+    
+    start = time.perf_counter()
+    engine.series = compute_all(engine.closes, engine.annualize)
+    full = time.perf_counter() - start
+    engine.loaded = True
+    
+    start = time.perf_counter()
+    correlation(engine.closes)
+    corr = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for i in range(ticks):
+        engine._update_last()
+    tick = (time.perf_counter() - start) / ticks
+    
+    # Το incremental update δίνει τα ίδια με τον πλήρη υπολογισμό
+    expected = compute_all(engine.closes, engine.annualize)
+    for name in SERIES:
+        check(np.allclose(engine.series[name][:, -1], expected[name][:, -1], equal_nan=True),
+              f"incremental {name} differs from the full computation")
+    
+    print(f"⏱️ {coins} coins x {engine.window} {resolution} buckets: all indicators {full * 1000:.0f}ms, "
+          f"correlation {corr * 1000:.1f}ms, tick update {tick * 1e6:.0f}µs")
+
+if __name__ == "__main__":
+    benchmark()
\ No newline at end of file
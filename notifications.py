@@ -0,0 +1,499 @@
+import os
+import queue
+import random
+import secrets
+import smtplib
+import socket
+import threading
+import time
+from collections import deque
+from email.mime.text import MIMEText
+from database import get_connection, on_commit, transaction
+
+# Ρυθμίσεις SMTP - χωρίς SMTP_HOST τα emails απλά τυπώνονται (όπως πριν)
+SMTP_HOST = os.environ.get('SMTP_HOST')
+SMTP_PORT = int(os.environ.get('SMTP_PORT', 25))
+SMTP_USER = os.environ.get('SMTP_USER')
+SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD')
+SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS', '0') == '1'
+SMTP_TIMEOUT = 10
+MAIL_FROM = os.environ.get('ALERT_MAIL_FROM', 'alerts@crypto-tracker.local')
+DASHBOARD_URL = 'http://localhost:5000/dashboard'
+
+DELIVERY_WORKERS = 4          # Πόσα emails στέλνονται παράλληλα
+SMTP_POOL_SIZE = 4            # Ανοιχτές συνδέσεις SMTP (επαναχρησιμοποιούνται)
+MAX_DELIVERY_ATTEMPTS = 5     # Μετά από τόσες αποτυχίες το μήνυμα μένει 'failed'
+RETRY_BASE = 2.0              # Seconds: 2, 4, 8, 16... (με jitter)
+RETRY_MAX = 300
+LEASE_SECONDS = 120           # Ένα 'sending' μήνυμα ξαναδίνεται σε άλλον worker μόνο μετά από τόσο
+LATENCY_SAMPLES = 1000        # Πόσες μετρήσεις latency κρατάμε για τα percentiles
+
+def format_message(alerts):
+    """Subject και body για όλα τα alerts ενός παραλήπτη σε ένα tick.
+    
+    alerts: [(coin, price, target, condition), ...]
+    """
+    if len(alerts) == 1:
+        coin, price, target, condition = alerts[0]
+        subject = f'🚀 Crypto Alert: {coin} {condition} ${target}'
+    else:
+        subject = f'🚀 Crypto Alert: {len(alerts)} alerts triggered'
+    
+    lines = ['Hello!', '']
+    for coin, price, target, condition in alerts:
+        lines += [
+            f'Your alert for {coin} has been triggered!',
+            f'Current price: ${price}',
+            f'Target price: ${target}',
+            f'Condition: Price is {condition} target',
+            ''
+        ]
+    lines += [f'Check the dashboard: {DASHBOARD_URL}', '', 'Happy trading! 📈']
+    return subject, '\n'.join(lines)
+
+class ConsoleMailer:
+    """Mailer για development: τυπώνει το email αντί να το στέλνει"""
+    
+    def send(self, to_email, subject, body):
+        print(f"\n📧 EMAIL ALERT\nTo: {to_email}\nSubject: {subject}\n\n{body}\n")
+    
+    def close(self):
+        pass
+
+class SMTPPool:
+    """Μικρό pool από ανοιχτές συνδέσεις SMTP.
+    
+    Κάθε send() δανείζεται μία σύνδεση, ώστε τα emails να μην πληρώνουν
+    connect/EHLO/login κάθε φορά. Μια σύνδεση που έκλεισε ο server
+    ξανανοίγει μία φορά· οποιοδήποτε άλλο σφάλμα φτάνει στον caller.
+    """
+    
+    def __init__(self, host, port=25, size=SMTP_POOL_SIZE, user=None, password=None,
+                 starttls=False, timeout=SMTP_TIMEOUT, sender=MAIL_FROM):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.sender = sender
+        # Θέσεις του pool: None = δεν έχει ανοίξει ακόμα σύνδεση
+        self.slots = queue.LifoQueue()
+        for _ in range(size):
+            self.slots.put(None)
+    
+    def connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.user:
+            server.login(self.user, self.password)
+        return server
+    
+    def send(self, to_email, subject, body):
+        msg = MIMEText(body, 'plain', 'utf-8')
+        msg['Subject'] = subject
+        msg['From'] = self.sender
+        msg['To'] = to_email
+        
+        server = self.slots.get()
+        try:
+            reused = server is not None
+            if server is None:
+                server = self.connect()
+            try:
+                server.sendmail(self.sender, [to_email], msg.as_string())
+            except smtplib.SMTPServerDisconnected:
+                # Ο server έκλεισε μια αδρανή σύνδεση - μία νέα προσπάθεια
+                if not reused:
+                    raise
+                server = self.connect()
+                server.sendmail(self.sender, [to_email], msg.as_string())
+        except Exception:
+            self._discard(server)
+            self.slots.put(None)
+            raise
+        self.slots.put(server)
+    
+    def _discard(self, server):
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+    
+    def close(self):
+        while True:
+            try:
+                server = self.slots.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(server)
+
+class AlertOutbox:
+    """Μόνιμη ουρά (outbox) για τα emails των alerts.
+    
+    Ο έλεγχος των alerts μόνο γράφει στο alert_outbox, στο ίδιο transaction
+    με την απενεργοποίηση των alerts. Ένα σταθερό pool από workers στέλνει
+    τα μηνύματα παράλληλα· όσα αποτύχουν ξαναδοκιμάζονται με exponential
+    backoff, οπότε ένας αργός mail server δεν καθυστερεί ποτέ το tick.
+    
+    Ένα μήνυμα που παίρνει ένας worker γίνεται 'sending' με lease
+    (claimed_at, claimed_by). Αν ο worker (ή όλο το process) πέσει πριν το
+    τελειώσει, το μήνυμα ξαναδίνεται μόνο όταν λήξει το lease - ποτέ ενώ
+    κάποιο άλλο process το στέλνει ακόμα.
+    """
+    
+    def __init__(self, db_path=None, mailer=None, workers=DELIVERY_WORKERS,
+                 max_attempts=MAX_DELIVERY_ATTEMPTS, retry_base=RETRY_BASE, lease=LEASE_SECONDS):
+        self.db_path = db_path
+        if mailer is None:
+            mailer = SMTPPool(SMTP_HOST, SMTP_PORT, user=SMTP_USER, password=SMTP_PASSWORD,
+                              starttls=SMTP_STARTTLS) if SMTP_HOST else ConsoleMailer()
+        self.mailer = mailer
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.lease = lease
+        # Ποιος κρατάει το lease: μοναδικό ανά outbox (process) και host
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}'
+        self.threads = []
+        self.condition = threading.Condition()
+        self.running = False
+        # Μετρικές παράδοσης (από τη στιγμή που έγινε trigger μέχρι το send)
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.sent = 0
+        self.retries = 0
+        self.failed = 0
+        self.init_outbox_table()
+    
+    def init_outbox_table(self):
+        """Δημιουργεί τον πίνακα alert_outbox"""
+        with transaction(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS alert_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    email TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    alert_ids TEXT NOT NULL,            -- π.χ. '12,15'
+                    status TEXT NOT NULL DEFAULT 'pending',  -- pending/sending/sent/failed
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt REAL NOT NULL,         -- epoch seconds
+                    created_at REAL NOT NULL,
+                    sent_at REAL,
+                    last_error TEXT,
+                    claimed_at REAL,                    -- lease του 'sending'
+                    claimed_by TEXT
+                )
+            ''')
+            # Παλιές βάσεις: οι στήλες του lease προστίθενται
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(alert_outbox)')}
+            for column, kind in (('claimed_at', 'REAL'), ('claimed_by', 'TEXT')):
+                if column not in columns:
+                    conn.execute(f'ALTER TABLE alert_outbox ADD COLUMN {column} {kind}')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_alert_outbox_due
+                ON alert_outbox (status, next_attempt)
+            ''')
+    
+    def enqueue(self, triggered):
+        """Βάζει στην ουρά ένα μήνυμα ανά παραλήπτη για τα alerts ενός tick.
+        
+        triggered: [(alert_id, email, coin, price, target, condition), ...]
+        όπως τα επιστρέφει το AlertSystem.check_alerts(). Αν καλεστεί μέσα σε
+        transaction, οι workers ξυπνάνε μόνο μετά το commit.
+        """
+        by_email = {}
+        for alert_id, email, coin, price, target, condition in triggered:
+            by_email.setdefault(email, []).append((alert_id, (coin, price, target, condition)))
+        
+        now = time.time()
+        rows = []
+        for email, alerts in by_email.items():
+            subject, body = format_message([alert for _, alert in alerts])
+            alert_ids = ','.join(str(alert_id) for alert_id, _ in alerts)
+            rows.append((email, subject, body, alert_ids, now, now))
+        
+        with transaction(self.db_path) as conn:
+            conn.executemany('''
+                INSERT INTO alert_outbox (email, subject, body, alert_ids, next_attempt, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            on_commit(self.wake, self.db_path)
+        return len(rows)
+    
+    def wake(self):
+        with self.condition:
+            self.condition.notify_all()
+    
+    def start(self):
+        """Ξεκινάει τους workers (μία φορά)"""
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        
+        # Όσα έμειναν 'sending' από διακοπή τα ξαναπαίρνει το claim() όταν λήξει
+        # το lease τους (άλλα processes μπορεί να τα στέλνουν ακόμα)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'alert-delivery-{i}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        print(f"✅ Alert delivery started ({self.workers} workers)")
+    
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=5)
+        self.threads = []
+        self.mailer.close()
+    
+    def claim(self):
+        """Παίρνει το επόμενο μήνυμα που πρέπει να σταλεί (ή None).
+        
+        Είτε ένα pending που είναι η ώρα του, είτε ένα 'sending' με
+        ληγμένο lease (ο worker του σταμάτησε στη μέση).
+        """
+        now = time.time()
+        with transaction(self.db_path, immediate=True) as conn:
+            row = conn.execute('''
+                SELECT id, email, subject, body, attempts, created_at
+                FROM alert_outbox
+                WHERE (status = 'pending' AND next_attempt <= ?)
+                   OR (status = 'sending' AND COALESCE(claimed_at, 0) <= ?)
+                ORDER BY next_attempt
+                LIMIT 1
+            ''', (now, now - self.lease)).fetchone()
+            if row is None:
+                return None
+            conn.execute('''
+                UPDATE alert_outbox
+                SET status = 'sending', attempts = attempts + 1, claimed_at = ?, claimed_by = ?
+                WHERE id = ?
+            ''', (now, self.owner, row[0]))
+        return row
+    
+    def next_due(self):
+        """Seconds μέχρι το επόμενο pending μήνυμα ή lease που λήγει (None αν δεν υπάρχει)"""
+        row = get_connection(self.db_path).execute('''
+            SELECT MIN(CASE status WHEN 'pending' THEN next_attempt
+                                   ELSE COALESCE(claimed_at, 0) + ? END)
+            FROM alert_outbox WHERE status IN ('pending', 'sending')
+        ''', (self.lease,)).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+    
+    def deliver(self, message):
+        """Στέλνει ένα μήνυμα και ενημερώνει το outbox (sent / retry / failed)"""
+        message_id, email, subject, body, attempts, created_at = message
+        attempts += 1
+        try:
+            self.mailer.send(email, subject, body)
+        except Exception as e:
+            if attempts >= self.max_attempts:
+                status, next_attempt = 'failed', time.time()
+            else:
+                # Exponential backoff με jitter ώστε οι retries να μη συγχρονίζονται
+                delay = min(RETRY_MAX, self.retry_base * 2 ** (attempts - 1))
+                status, next_attempt = 'pending', time.time() + random.uniform(delay / 2, delay)
+            # Μόνο αν κρατάμε ακόμα το lease (αλλιώς το μήνυμα το έχει άλλος worker)
+            with transaction(self.db_path) as conn:
+                conn.execute('''
+                    UPDATE alert_outbox SET status = ?, next_attempt = ?, last_error = ?
+                    WHERE id = ? AND status = 'sending' AND claimed_by = ?
+                ''', (status, next_attempt, str(e)[:500], message_id, self.owner))
+            with self.condition:
+                if status == 'failed':
+                    self.failed += 1
+                else:
+                    self.retries += 1
+            print(f"❌ Alert email to {email} failed (attempt {attempts}/{self.max_attempts}): {e}")
+            return False
+        
+        sent_at = time.time()
+        with transaction(self.db_path) as conn:
+            c = conn.execute('''
+                UPDATE alert_outbox SET status = 'sent', sent_at = ?, last_error = NULL
+                WHERE id = ? AND status = 'sending' AND claimed_by = ?
+            ''', (sent_at, message_id, self.owner))
+        if c.rowcount == 0:
+            # Το send κράτησε πάνω από το lease και το μήνυμα το πήρε άλλος worker:
+            # δεν το σημειώνουμε εμείς (μπορεί να σταλεί δεύτερη φορά)
+            print(f"⚠️ Alert email {message_id} to {email} was sent after its lease of {self.lease}s expired; "
+                  f"another worker owns it now and may send it again")
+        with self.condition:
+            self.sent += 1
+            self.latencies.append(sent_at - created_at)
+        return True
+    
+    def _work(self):
+        while self.running:
+            try:
+                message = self.claim()
+                if message is not None:
+                    self.deliver(message)
+                    continue
+                timeout = self.next_due()
+            except Exception as e:
+                print(f"❌ Error in alert delivery worker: {e}")
+                timeout = 1.0
+            with self.condition:
+                if self.running:
+                    self.condition.wait(timeout=1.0 if timeout is None else min(timeout, 1.0))
+    
+    def stats(self):
+        """Μετρικές παράδοσης: counters, μέγεθος ουράς και latency percentiles (ms)"""
+        counts = dict(get_connection(self.db_path).execute('''
+            SELECT status, COUNT(*) FROM alert_outbox GROUP BY status
+        ''').fetchall())
+        with self.condition:
+            latencies = sorted(self.latencies)
+            result = {
+                'workers': len(self.threads),
+                'sent': self.sent,
+                'retries': self.retries,
+                'failed': self.failed,
+            }
+        
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+        
+        result.update({
+            'pending': counts.get('pending', 0) + counts.get('sending', 0),
+            'outbox': counts,
+            'latency_ms': {
+                'p50': percentile(0.50),
+                'p95': percentile(0.95),
+                'max': percentile(1.0),
+                'samples': len(latencies)
+            }
+        })
+        return result
+
+def benchmark(messages=1000, outboxes=2, fail_every=7):
+    """Παράδοση messages emails απέναντι σε τοπικό SMTP stub (στη θέση του mail server).
+    
+    Δύο AlertOutbox (όπως δύο web workers) μοιράζονται την ίδια βάση. Το stub
+    απορρίπτει κάθε fail_every-οστό DATA με 451, ώστε να τρέξουν και retries.
+    Στη βάση υπάρχουν από πριν ένα 'sending' με ληγμένο lease (πρέπει να
+    ξανασταλεί) και ένα με ενεργό lease άλλου process (δεν πρέπει να σταλεί).
+    Ελέγχουμε ότι κάθε παραλήπτης πήρε ακριβώς ένα email.
+    """
+    import socketserver
+    from collections import Counter
+    from benchtools import check, temp_database
+    
+    received = Counter()
+    state = {'data': 0, 'rejected': 0}
+    lock = threading.Lock()
+    
+    class StubSMTPHandler(socketserver.StreamRequestHandler):
+        """Όσο SMTP χρειάζεται το smtplib (EHLO, MAIL, RCPT, DATA, RSET, QUIT)"""
+        
+        def reply(self, line):
+            self.wfile.write(line.encode() + b'\r\n')
+        
+        def handle(self):
+            self.reply('220 stub ESMTP')
+            recipients = []
+            for raw in self.rfile:
+                command = raw.decode().strip().split(' ')[0].upper()
+                if command in ('EHLO', 'HELO', 'NOOP', 'MAIL'):
+                    self.reply('250 OK')
+                elif command == 'RCPT':
+                    recipients.append(raw.decode().split('<', 1)[1].split('>', 1)[0])
+                    self.reply('250 OK')
+                elif command == 'RSET':
+                    recipients = []
+                    self.reply('250 OK')
+                elif command == 'DATA':
+                    self.reply('354 End data with <CR><LF>.<CR><LF>')
+                    for line in self.rfile:
+                        if line == b'.\r\n':
+                            break
+                    with lock:
+                        state['data'] += 1
+                        rejected = state['data'] % fail_every == 0
+                        if rejected:
+                            state['rejected'] += 1
+                        else:
+                            received.update(recipients)
+                    self.reply('451 Try again later' if rejected else '250 OK')
+                    recipients = []
+                elif command == 'QUIT':
+                    self.reply('221 Bye')
+                    return
+                else:
+                    self.reply('502 Command not implemented')
+    
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), StubSMTPHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    
+    with temp_database('outbox-bench-') as directory:
+        db_path = os.path.join(directory, 'bench.db')
+        workers = [AlertOutbox(db_path, mailer=SMTPPool('127.0.0.1', port), retry_base=0.01)
+                   for _ in range(outboxes)]
+        
+        # Ένα process που "έπεσε" πριν 3 λεπτά και ένα που στέλνει ακόμα
+        now = time.time()
+        with transaction(db_path) as conn:
+            conn.executemany('''
+                INSERT INTO alert_outbox (email, subject, body, alert_ids, status, attempts,
+                                          next_attempt, created_at, claimed_at, claimed_by)
+                VALUES (?, 'stub', 'stub', '0', 'sending', 1, ?, ?, ?, ?)
+            ''', [('crashed@example.com', now, now, now - LEASE_SECONDS - 60, 'crashed:1:0'),
+                  ('leased@example.com', now, now, now, 'alive:2:0')])
+        
+        triggered = [(i, f'user{i}@example.com', 'bitcoin', 100000.0, 90000.0, 'above')
+                     for i in range(messages)]
+        start = time.perf_counter()
+        workers[0].enqueue(triggered)
+        for worker in workers:
+            worker.start()
+        
+        deadline = time.time() + 120
+        while time.time() < deadline:
+            counts = dict(get_connection(db_path).execute(
+                'SELECT status, COUNT(*) FROM alert_outbox GROUP BY status').fetchall())
+            if counts.get('pending', 0) == 0 and counts.get('sending', 0) <= 1:
+                break
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - start
+        
+        stats = [worker.stats() for worker in workers]
+        for worker in workers:
+            worker.stop()
+        server.shutdown()
+        server.server_close()
+        
+        sent = sum(s['sent'] for s in stats)
+        retries = sum(s['retries'] for s in stats)
+        latencies = sorted(latency for worker in workers for latency in worker.latencies)
+        leased = get_connection(db_path).execute(
+            "SELECT status, claimed_by FROM alert_outbox WHERE email = 'leased@example.com'").fetchone()
+    
+    expected = {f'user{i}@example.com' for i in range(messages)} | {'crashed@example.com'}
+    check(set(received) == expected, f"missing: {sorted(expected - set(received))[:5]}")
+    check(max(received.values()) == 1, f"duplicates: {[e for e, n in received.items() if n > 1][:5]}")
+    check(leased == ('sending', 'alive:2:0'), f"active lease was taken over: {leased}")
+    check(retries == state['rejected'], f"{retries} retries for {state['rejected']} rejected sends")
+    
+    print(f"⏱️ {sent} emails via {outboxes} outboxes x {DELIVERY_WORKERS} workers in {elapsed:.2f}s "
+          f"({sent / elapsed:.0f}/s), {retries} retried after 451, "
+          f"p50 {latencies[len(latencies) // 2] * 1000:.0f}ms, p95 {latencies[int(len(latencies) * 0.95)] * 1000:.0f}ms")
+    print("✅ Every recipient got exactly one email; the expired lease was resent, the active one was left alone")
+
+if __name__ == "__main__":
+    import sys
+    
+    # python notifications.py bench [messages]
+    if len(sys.argv) > 1 and sys.argv[1] == 'bench':
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
\ No newline at end of file
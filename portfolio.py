@@ -0,0 +1,470 @@
+import os
+import random
+import secrets
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+from database import (HEARTBEAT_INTERVAL, SQL_MS_TO_TIMESTAMP, bump_versions, get_connection,
+                      get_data_versions, init_data_versions, timestamp_to_ms, transaction)
+from priceboard import price_board
+from pricecache import to_epoch
+from trading import DEFAULT_ACCOUNT, TradingBot
+
+# Λογαριασμοί με net worth snapshot σε κάθε tick (οι υπόλοιποι μόνο στη μνήμη)
+HISTORY_ACCOUNTS = (DEFAULT_ACCOUNT,)
+SYNC_MARGIN = 5             # Seconds: το sync ξαναδιαβάζει υπόλοιπα που άλλαξαν λίγο πριν το προηγούμενο
+SYNC_MAX_ACCOUNTS = 1000    # Περισσότεροι λογαριασμοί για sync: πλήρες load()
+SNAPSHOT_LEASE = 180        # Seconds: αν ο writer των snapshots δεν γράψει για τόσο, τα παίρνει άλλο process
+
+class PortfolioEngine:
+    """Mark-to-market όλων των λογαριασμών στη μνήμη.
+    
+    Οι θέσεις είναι ένας πίνακας amounts (λογαριασμοί x νομίσματα) και οι
+    τιμές ένα διάνυσμα, οπότε σε κάθε tick η αξία όλων των λογαριασμών
+    βγαίνει με ένα amounts @ prices αντί για queries ανά χρήστη. Ένα trade
+    αλλάζει ένα κελί και ένα balance (από τους listeners του TradingBot),
+    οπότε το /portfolio-value απαντά χωρίς καμία δουλειά στη βάση. Trades
+    και υπόλοιπα από άλλα processes τα φέρνει το sync() (από τον watcher
+    του tick bus, όταν αλλάξει το 'ledger' version της βάσης). Για τους
+    HISTORY_ACCOUNTS γράφεται σε κάθε tick ένα snapshot της καθαρής αξίας
+    στο net_worth_history (μόνο όταν αλλάζει, όπως τα prices), από ένα μόνο
+    process: αυτό που κρατά το lease 'net_worth' στο writer_leases.
+    """
+    
+    def __init__(self, bot, db_path=None, history_accounts=HISTORY_ACCOUNTS):
+        self.bot = bot
+        self.db_path = db_path
+        self.history_accounts = tuple(history_accounts)
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.account_index = {}     # account_id -> γραμμή
+        self.coin_index = {}        # coin -> στήλη
+        self.coins = []
+        self.count = 0              # γραμμές σε χρήση (οι πίνακες έχουν χωρητικότητα)
+        self.account_ids = np.zeros(0, dtype=np.int64)
+        self.balances = np.zeros(0)
+        self.amounts = np.zeros((0, 0))
+        self.avg_prices = np.zeros((0, 0))
+        self.prices = np.zeros(0)   # NaN: δεν έχουμε τιμή (η θέση δεν μετράει στην αξία)
+        self.holdings_values = np.zeros(0)
+        self.balance_ids = np.zeros(0, dtype=np.int64)
+        self.versions = np.zeros(0, dtype=np.int64)
+        self.trade_ids = {}         # (γραμμή, στήλη) -> id του τελευταίου trade που εφαρμόστηκε
+        self.trade_floor = 0        # trades με id <= trade_floor είναι ήδη στο load()
+        self.row_floors = np.zeros(0, dtype=np.int64)  # ανά γραμμή: trades <= αυτό είναι ήδη στο sync()
+        self.ledger_version = None  # το 'ledger' version της βάσης στο τελευταίο load/sync
+        self.synced_id = 0          # trades με id <= synced_id έχουν διαβαστεί από τη βάση
+        self.synced_at = ''         # CURRENT_TIMESTAMP της βάσης (μείον SYNC_MARGIN) στο τελευταίο sync
+        self.resync = set()         # λογαριασμοί που το sync άφησε για την επόμενη φορά
+        self.tick_version = 0
+        self.cache = {}             # account_id -> ((tick_version, version), απάντηση)
+        self.last_snapshots = {}    # account_id -> (ts_ms, net_worth)
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}'
+        self.init_history_table()
+        bot.subscribe(self.on_trade)
+    
+    def init_history_table(self):
+        """Δημιουργεί τον πίνακα net_worth_history (ανά λογαριασμό)"""
+        with transaction(self.db_path) as conn:
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(net_worth_history)')}
+            if columns and 'account_id' not in columns:
+                conn.execute('ALTER TABLE net_worth_history RENAME TO net_worth_history_v1')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS net_worth_history (
+                    account_id INTEGER NOT NULL,
+                    ts_ms INTEGER NOT NULL,
+                    net_worth REAL NOT NULL,
+                    holdings_value REAL NOT NULL,
+                    PRIMARY KEY (account_id, ts_ms)
+                ) WITHOUT ROWID
+            ''')
+            if columns and 'account_id' not in columns:
+                conn.execute('''
+                    INSERT INTO net_worth_history
+                    SELECT ?, ts_ms, net_worth, holdings_value FROM net_worth_history_v1
+                ''', (DEFAULT_ACCOUNT,))
+                conn.execute('DROP TABLE net_worth_history_v1')
+            # Ποιο process γράφει τα snapshots (ένα lease ανά όνομα)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS writer_leases (
+                    name TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+            init_data_versions(conn)
+    
+    def load(self, prices=None):
+        """Φορτώνει balances, θέσεις και τιμές (ένα snapshot της βάσης)"""
+        with transaction(self.db_path) as conn:
+            accounts = conn.execute('SELECT account_id, usd_balance FROM balance ORDER BY account_id').fetchall()
+            positions = conn.execute('''
+                SELECT account_id, coin_name, amount, avg_buy_price FROM portfolio WHERE amount > 0
+            ''').fetchall()
+            last_id = conn.execute('SELECT MAX(id) FROM transactions').fetchone()[0] or 0
+            ledger_version, synced_at = self._sync_point(conn)
+            snapshots = {account_id: conn.execute('''
+                SELECT ts_ms, net_worth FROM net_worth_history
+                WHERE account_id = ? ORDER BY ts_ms DESC LIMIT 1
+            ''', (account_id,)).fetchone() for account_id in self.history_accounts}
+        if prices is None:
+            prices = {coin_name: price for coin_name, price, _ in price_board.get_latest_prices()}
+        
+        coins = sorted({row[1] for row in positions} | set(prices))
+        coin_index = {coin_name: i for i, coin_name in enumerate(coins)}
+        account_ids = np.array([row[0] for row in accounts], dtype=np.int64)
+        account_index = {account_id: i for i, account_id in enumerate(account_ids.tolist())}
+        
+        amounts = np.zeros((len(accounts), len(coins)))
+        avg_prices = np.zeros((len(accounts), len(coins)))
+        if positions:
+            keep = [row for row in positions if row[0] in account_index]
+            rows = np.array([account_index[row[0]] for row in keep], dtype=np.int64)
+            columns = np.array([coin_index[row[1]] for row in keep], dtype=np.int64)
+            amounts[rows, columns] = [row[2] for row in keep]
+            avg_prices[rows, columns] = [row[3] for row in keep]
+        
+        with self.lock:
+            self.account_index, self.coin_index, self.coins = account_index, coin_index, coins
+            self.count = len(accounts)
+            self.account_ids = account_ids
+            self.balances = np.array([row[1] for row in accounts], dtype=np.float64)
+            self.amounts, self.avg_prices = amounts, avg_prices
+            self.prices = np.array([prices.get(coin_name, np.nan) for coin_name in coins], dtype=np.float64)
+            self.balance_ids = np.full(len(accounts), last_id, dtype=np.int64)
+            self.versions = np.zeros(len(accounts), dtype=np.int64)
+            self.trade_ids = {}
+            self.trade_floor = last_id
+            self.row_floors = np.zeros(len(accounts), dtype=np.int64)
+            self.ledger_version, self.synced_id, self.synced_at = ledger_version, last_id, synced_at
+            self.resync = set()
+            self.last_snapshots = {account_id: snapshot for account_id, snapshot in snapshots.items() if snapshot}
+            self._revalue()
+            self.loaded = True
+            self.tick_version += 1
+            self.cache = {}
+    
+    def ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+    
+    def _revalue(self):
+        """Η αξία των holdings όλων των λογαριασμών: ένα matrix-vector product"""
+        self.holdings_values = self.amounts @ np.nan_to_num(self.prices)
+    
+    def _column(self, coin_name):
+        """Η στήλη ενός νομίσματος (προσθέτει νέα στήλη αν χρειάζεται)"""
+        column = self.coin_index.get(coin_name)
+        if column is None:
+            column = self.coin_index[coin_name] = len(self.coins)
+            self.coins.append(coin_name)
+            self.amounts = np.pad(self.amounts, ((0, 0), (0, 1)))
+            self.avg_prices = np.pad(self.avg_prices, ((0, 0), (0, 1)))
+            self.prices = np.append(self.prices, np.nan)
+        return column
+    
+    def _row(self, account_id):
+        """Η γραμμή ενός λογαριασμού (προσθέτει νέα γραμμή αν χρειάζεται)"""
+        row = self.account_index.get(account_id)
+        if row is None:
+            row = self.account_index[account_id] = self.count
+            if row >= len(self.account_ids):
+                # Χωρητικότητα x2, ώστε πολλοί νέοι λογαριασμοί να μην αντιγράφουν τους πίνακες κάθε φορά
+                grow = max(16, len(self.account_ids))
+                self.account_ids = np.pad(self.account_ids, (0, grow))
+                self.balances = np.pad(self.balances, (0, grow))
+                self.holdings_values = np.pad(self.holdings_values, (0, grow))
+                self.balance_ids = np.pad(self.balance_ids, (0, grow))
+                self.row_floors = np.pad(self.row_floors, (0, grow))
+                self.versions = np.pad(self.versions, (0, grow))
+                self.amounts = np.pad(self.amounts, ((0, grow), (0, 0)))
+                self.avg_prices = np.pad(self.avg_prices, ((0, grow), (0, 0)))
+            self.account_ids[row] = account_id
+            self.count += 1
+        return row
+    
+    def on_tick(self, timestamp, prices):
+        """Subscriber του tick bus: νέες τιμές, αποτίμηση όλων των λογαριασμών, snapshots"""
+        if not self.loaded:
+            return
+        with self.lock:
+            for coin_name, price in prices.items():
+                # Πρώτα η στήλη: ένα νέο νόμισμα αντικαθιστά το self.prices
+                column = self._column(coin_name)
+                self.prices[column] = price
+            self._revalue()
+            self.tick_version += 1
+            snapshots = []
+            for account_id in self.history_accounts:
+                row = self.account_index.get(account_id)
+                if row is not None:
+                    holdings_value = float(self.holdings_values[row])
+                    snapshots.append((account_id, float(self.balances[row]) + holdings_value, holdings_value))
+        self.record_snapshots(int(to_epoch(timestamp) * 1000), snapshots)
+    
+    def on_trade(self, event):
+        """Listener του TradingBot: η νέα θέση και το balance μετά από ένα trade"""
+        if not self.loaded:
+            return
+        with self.lock:
+            row = self._row(event['account'])
+            self.versions[row] += 1
+            if event['type'] == 'balance':
+                self.balances[row] = event['balance']
+                return
+            
+            # Τα trades γίνονται commit σειριακά (BEGIN IMMEDIATE), οπότε το id
+            # δίνει τη σειρά τους ακόμα κι αν οι listeners καλεστούν ανάποδα
+            trade_id = event['id']
+            column = self._column(event['coin'])
+            if trade_id > self.balance_ids[row]:
+                self.balances[row], self.balance_ids[row] = event['balance'], trade_id
+            if trade_id > max(self.trade_ids.get((row, column), self.trade_floor), self.row_floors[row]):
+                self.trade_ids[(row, column)] = trade_id
+                if np.isnan(self.prices[column]):
+                    self.prices[column] = event['price']
+                amount = event['position_amount'] if event['position_amount'] > 0 else 0.0
+                self.holdings_values[row] += (amount - self.amounts[row, column]) * self.prices[column]
+                self.amounts[row, column] = amount
+                self.avg_prices[row, column] = event['avg_price'] if amount else 0.0
+    
+    @staticmethod
+    def _sync_point(conn):
+        """('ledger' version, από πότε ψάχνει υπόλοιπα το επόμενο sync) μέσα στο transaction"""
+        row = conn.execute("SELECT version FROM data_versions WHERE domain = 'ledger'").fetchone()
+        synced_at = conn.execute("SELECT datetime(CURRENT_TIMESTAMP, ?)", (f'-{SYNC_MARGIN} seconds',)).fetchone()[0]
+        return (row[0] if row else None), synced_at
+    
+    def sync(self):
+        """Φέρνει στη μνήμη ό,τι άλλαξε στη βάση από άλλα processes.
+        
+        Οι listeners του TradingBot βλέπουν μόνο τα trades αυτού του process.
+        Όταν αλλάξει το 'ledger' version, οι λογαριασμοί με trades μετά το
+        synced_id ή με υπόλοιπο που άλλαξε μετά το synced_at ξαναδιαβάζονται
+        (υπόλοιπο και θέσεις) από ένα snapshot της βάσης.
+        """
+        if not self.loaded:
+            return
+        version = get_data_versions(('ledger',), self.db_path).get('ledger', (None,))[0]
+        if version == self.ledger_version and not self.resync:
+            return
+        
+        with transaction(self.db_path) as conn:
+            last_id = conn.execute('SELECT MAX(id) FROM transactions').fetchone()[0] or 0
+            version, synced_at = self._sync_point(conn)
+            accounts = {row[0] for row in conn.execute(
+                'SELECT DISTINCT account_id FROM transactions WHERE id > ?', (self.synced_id,))}
+            accounts.update(row[0] for row in conn.execute(
+                'SELECT account_id FROM balance WHERE updated_at >= ?', (self.synced_at,)))
+            accounts |= self.resync
+            balances, positions = {}, []
+            if len(accounts) > SYNC_MAX_ACCOUNTS:
+                accounts = None
+            elif accounts:
+                placeholders = ', '.join('?' * len(accounts))
+                balances = dict(conn.execute(
+                    f'SELECT account_id, usd_balance FROM balance WHERE account_id IN ({placeholders})',
+                    list(accounts)).fetchall())
+                positions = conn.execute(f'''
+                    SELECT account_id, coin_name, amount, avg_buy_price FROM portfolio
+                    WHERE amount > 0 AND account_id IN ({placeholders})
+                ''', list(accounts)).fetchall()
+        
+        if accounts is None:
+            self.load()
+            return
+        
+        with self.lock:
+            synced, resync = {}, set()
+            for account_id, balance in balances.items():
+                row = self._row(account_id)
+                if self.balance_ids[row] > last_id:
+                    # Ένα trade αυτού του process είναι νεότερο από το snapshot
+                    resync.add(account_id)
+                    continue
+                synced[account_id] = row
+                self.balances[row] = balance
+                self.amounts[row] = 0.0
+                self.avg_prices[row] = 0.0
+                # Τα events με id <= last_id (ακόμα κι αν φτάσουν αργότερα) είναι ήδη εδώ
+                self.balance_ids[row] = self.row_floors[row] = last_id
+                self.versions[row] += 1
+            for account_id, coin_name, amount, avg_price in positions:
+                row = synced.get(account_id)
+                if row is not None:
+                    column = self._column(coin_name)
+                    self.amounts[row, column], self.avg_prices[row, column] = amount, avg_price
+            if synced:
+                rows = list(synced.values())
+                self.holdings_values[rows] = self.amounts[rows] @ np.nan_to_num(self.prices)
+            self.resync = resync
+            self.ledger_version, self.synced_id, self.synced_at = version, last_id, synced_at
+    
+    def claim_snapshots(self, conn, now):
+        """Ανανεώνει ή παίρνει το lease των snapshots (μέσα σε write transaction).
+        
+        Κάθε web worker έχει δικό του engine και βλέπει τα ίδια ticks· χωρίς
+        lease όλοι θα έγραφαν το ίδιο snapshot και θα άλλαζαν το 'prices'
+        version σε κάθε tick. Επιστρέφει False αν το κρατά άλλο process.
+        """
+        c = conn.execute('''
+            INSERT INTO writer_leases (name, owner, expires_at) VALUES ('net_worth', ?, ?)
+            ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+            WHERE writer_leases.owner = excluded.owner OR writer_leases.expires_at <= ?
+        ''', (self.owner, now + SNAPSHOT_LEASE, now))
+        return c.rowcount > 0
+    
+    def record_snapshots(self, ts_ms, snapshots):
+        """Γράφει τα snapshots που άλλαξαν (ή πέρασε HEARTBEAT_INTERVAL), αν κρατά το lease"""
+        rows = []
+        for account_id, net_worth, holdings_value in snapshots:
+            last = self.last_snapshots.get(account_id)
+            if last is not None:
+                if ts_ms <= last[0]:
+                    continue
+                if abs(net_worth - last[1]) < 1e-9 and ts_ms - last[0] < HEARTBEAT_INTERVAL * 1000:
+                    continue
+            rows.append((account_id, ts_ms, net_worth, holdings_value))
+        if not rows:
+            return
+        try:
+            now = time.time()
+            lease = get_connection(self.db_path).execute(
+                "SELECT owner, expires_at FROM writer_leases WHERE name = 'net_worth'").fetchone()
+            if lease and lease[0] != self.owner and lease[1] > now:
+                return          # Τα γράφει άλλο process· εδώ ούτε write lock
+            with transaction(self.db_path, immediate=True) as conn:
+                if not self.claim_snapshots(conn, now):
+                    return
+                conn.executemany('INSERT OR REPLACE INTO net_worth_history VALUES (?, ?, ?, ?)', rows)
+                # Η καμπύλη του net worth σερβίρεται με το 'prices' version
+                bump_versions(conn, 'prices')
+            for account_id, ts_ms, net_worth, _ in rows:
+                self.last_snapshots[account_id] = (ts_ms, net_worth)
+        except Exception as e:
+            # Το ιστορικό είναι για τα γραφήματα· δεν σταματά την ενημέρωση των τιμών
+            print(f"❌ Error recording net worth: {e}")
+    
+    def net_worths(self):
+        """(account_ids, net worth) όλων των λογαριασμών"""
+        with self.lock:
+            count = self.count
+            return self.account_ids[:count].copy(), self.balances[:count] + self.holdings_values[:count]
+    
+    def get_portfolio_value(self, account_id=DEFAULT_ACCOUNT):
+        """Όπως το /api/trading/portfolio-value, από τη μνήμη (None αν δεν υπάρχει ο λογαριασμός)"""
+        self.ensure_loaded()
+        with self.lock:
+            row = self.account_index.get(account_id)
+            if row is None:
+                return None
+            key = (self.tick_version, int(self.versions[row]))
+            cached = self.cache.get(account_id)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+            
+            holdings = []
+            for column in np.flatnonzero(self.amounts[row]).tolist():
+                current_price = float(self.prices[column])
+                if current_price != current_price:
+                    continue
+                amount, avg_price = float(self.amounts[row, column]), float(self.avg_prices[row, column])
+                value = amount * current_price
+                cost = amount * avg_price
+                holdings.append({
+                    'coin': self.coins[column],
+                    'amount': amount,
+                    'avg_price': avg_price,
+                    'current_price': current_price,
+                    'value': value,
+                    'profit_loss': value - cost,
+                    'profit_loss_pct': (value - cost) / cost * 100 if avg_price > 0 else 0
+                })
+            holdings.sort(key=lambda holding: holding['coin'])
+            holdings_value = float(self.holdings_values[row])
+            result = {
+                'account_id': account_id,
+                'balance': float(self.balances[row]),
+                'portfolio_value': holdings_value,
+                'total_net_worth': float(self.balances[row]) + holdings_value,
+                'holdings': holdings
+            }
+            if len(self.cache) > 10000:
+                self.cache.clear()
+            self.cache[account_id] = (key, result)
+            return result
+
+def get_net_worth_history(start, end, account_id=DEFAULT_ACCOUNT, db_path=None):
+    """Τα snapshots της καθαρής αξίας στο [start, end]: [(timestamp, net_worth, holdings_value)]"""
+    return get_connection(db_path).execute(f'''
+        SELECT {SQL_MS_TO_TIMESTAMP.format('ts_ms')}, net_worth, holdings_value
+        FROM net_worth_history
+        WHERE account_id = ? AND ts_ms >= ? AND ts_ms <= ?
+        ORDER BY ts_ms
+    ''', (account_id, timestamp_to_ms(start), timestamp_to_ms(end))).fetchall()
+
+def benchmark(accounts=100000, coins=20, ticks=100, baseline=1000):
+    """Αποτίμηση όλων των λογαριασμών ανά tick σε μια προσωρινή βάση"""
+    from benchtools import check
+    
+    directory = tempfile.mkdtemp(prefix='portfolio-bench-')
+    db_path = os.path.join(directory, 'bench.db')
+    try:
+        bot = TradingBot(db_path)
+        rng = random.Random(1)
+        names = [f'coin-{i:02d}' for i in range(coins)]
+        prices = {coin_name: rng.uniform(0.1, 60000) for coin_name in names}
+        
+        start = time.perf_counter()
+        with transaction(db_path) as conn:
+            ids = range(DEFAULT_ACCOUNT + 1, DEFAULT_ACCOUNT + accounts)
+            conn.executemany('INSERT INTO accounts (id, name) VALUES (?, ?)', ((i, f'user-{i}') for i in ids))
+            conn.executemany('INSERT INTO balance (account_id, usd_balance) VALUES (?, ?)',
+                             ((i, rng.uniform(0, 10000)) for i in ids))
+            conn.executemany('INSERT INTO portfolio (account_id, coin_name, amount, avg_buy_price) VALUES (?, ?, ?, ?)',
+                             ((i, coin_name, rng.uniform(0, 1000) / prices[coin_name], prices[coin_name])
+                              for i in range(DEFAULT_ACCOUNT, DEFAULT_ACCOUNT + accounts)
+                              for coin_name in rng.sample(names, rng.randint(1, 5))))
+        print(f"   seeded {accounts} accounts in {time.perf_counter() - start:.1f}s")
+        
+        engine = PortfolioEngine(bot, db_path)
+        start = time.perf_counter()
+        engine.load(prices)
+        load = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for n in range(ticks):
+            tick = {coin_name: price * rng.uniform(0.99, 1.01) for coin_name, price in prices.items()}
+            engine.on_tick(f'2026-01-01 00:{n // 60:02d}:{n % 60:02d}', tick)
+        per_tick = (time.perf_counter() - start) / ticks
+        
+        # Η ίδια αποτίμηση με ένα query ανά λογαριασμό (ο τρόπος του get_portfolio_value)
+        current = {coin_name: float(engine.prices[engine.coin_index[coin_name]]) for coin_name in names}
+        sample = rng.sample(range(DEFAULT_ACCOUNT, DEFAULT_ACCOUNT + accounts), baseline)
+        start = time.perf_counter()
+        expected = {account_id: bot.get_balance(account_id) + bot.get_portfolio_value(current, account_id)['total_value']
+                    for account_id in sample}
+        per_account = (time.perf_counter() - start) / baseline
+        
+        account_ids, net_worth = engine.net_worths()
+        values = dict(zip(account_ids.tolist(), net_worth.tolist()))
+        for account_id, value in expected.items():
+            check(abs(values[account_id] - value) <= 1e-6 * max(1, value),
+                  f"account {account_id}: engine {values[account_id]}, queries {value}")
+        
+        print(f"⏱️ {accounts} accounts x {coins} coins: load {load:.2f}s, revaluation of all accounts "
+              f"{per_tick * 1000:.1f}ms/tick, per-account queries ~{per_account * accounts:.1f}s/tick "
+              f"(measured on {baseline}) - values match ✅")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and args[0] == 'bench':
+        benchmark(int(args[1]) if len(args) > 1 else 100000)
+    else:
+        print("Usage: python portfolio.py bench [accounts]")
\ No newline at end of file
@@ -0,0 +1,208 @@
+import mmap
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:         # Windows: ένας writer τη φορά χωρίς file lock
+    fcntl = None
+
+BOARD_SLOTS = 16384         # Μέγιστος αριθμός νομισμάτων στο board (~1.6MB αρχείο)
+NAME_BYTES = 64             # Μέγιστο μήκος ονόματος (UTF-8) που χωράει σε slot
+MAX_AGE = 180               # Seconds χωρίς write μετά τα οποία διαβάζουμε από τη βάση
+MAGIC = b'CPBOARD2'
+
+# Layout του αρχείου (little-endian, σταθερό):
+#   header: magic (8s) | seq (Q) | updated_at (d) | slots (I) | count (I) | skipped (I)
+#   slots:  coin_name (64s) | price (d) | timestamp (32s)   x slots
+# skipped: νομίσματα που δεν χώρεσαν (γεμάτο board ή όνομα > NAME_BYTES).
+# Όσο είναι > 0 το board δεν είναι πλήρες και οι λίστες έρχονται από τη βάση.
+HEADER = struct.Struct('<8sQdIII')
+SLOT = struct.Struct(f'<{NAME_BYTES}sd32s')
+SEQ = struct.Struct('<Q')
+SEQ_OFFSET = 8
+
+class PriceBoard:
+    """Οι τελευταίες τιμές σε κοινή μνήμη (mmap αρχείου) για όλα τα processes.
+    
+    Το ingest γράφει κάθε tick μετά το commit. Κάθε web worker διαβάζει
+    χωρίς lock με seqlock: ο writer κάνει το seq μονό πριν γράψει και ζυγό
+    μετά, ο reader ξαναδιαβάζει αν το seq ήταν μονό ή άλλαξε στο μεταξύ.
+    Αν το board λείπει ή δεν έχει γραφτεί για MAX_AGE seconds, οι reads
+    πηγαίνουν στη βάση (database.get_latest_prices). Το ίδιο και για
+    νομίσματα που δεν έχουν slot (γεμάτο board ή πολύ μεγάλο όνομα).
+    """
+    
+    def __init__(self, path=None, slots=BOARD_SLOTS):
+        self.path = path            # None: δίπλα στη βάση (crypto_prices.board)
+        self.slots = slots
+        self.size = HEADER.size + slots * SLOT.size
+        self.fd = None
+        self.mm = None
+        self.index = {}             # coin -> slot (τα slots δεν αλλάζουν νόμισμα)
+        self.names = []             # slot -> coin, για τους readers
+        self.layouts = {}           # count -> Struct για όλα τα slots με ένα unpack
+        self.timestamps = {}        # raw bytes -> str
+        self.skipped = set()        # νομίσματα που δεν χώρεσαν (warning μία φορά)
+        self.lock = threading.Lock()
+    
+    def _open(self, create):
+        """Ανοίγει (ή δημιουργεί) το αρχείο και το κάνει mmap"""
+        if self.mm is not None:
+            return True
+        with self.lock:
+            if self.mm is not None:
+                return True
+            path = self.path
+            if path is None:
+                from database import DB_PATH
+                path = os.path.splitext(DB_PATH)[0] + '.board'
+            if not create and not os.path.exists(path):
+                return False
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            if os.fstat(fd).st_size < self.size:
+                os.ftruncate(fd, self.size)
+            mm = mmap.mmap(fd, self.size)
+            if mm[:8] != MAGIC:
+                HEADER.pack_into(mm, 0, MAGIC, 0, 0.0, self.slots, 0, 0)
+            self.fd, self.mm = fd, mm
+        return True
+    
+    def write(self, rows):
+        """Γράφει [(coin_name, price, timestamp), ...] - μόνο όσα είναι νεότερα"""
+        try:
+            self._open(create=True)
+            with self.lock:
+                if fcntl:
+                    fcntl.flock(self.fd, fcntl.LOCK_EX)
+                try:
+                    self._write(rows)
+                finally:
+                    if fcntl:
+                        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        except Exception as e:
+            # Το board είναι cache· ένα σφάλμα εδώ δεν πρέπει να σταματά το ingest
+            print(f"❌ Error writing price board: {e}")
+    
+    def _write(self, rows):
+        mm = self.mm
+        _, seq, _, slots, count, skipped = HEADER.unpack_from(mm, 0)
+        if seq & 1:
+            seq += 1        # Ένας writer σταμάτησε στη μέση του write
+        # Άλλος writer (process) μπορεί να έχει προσθέσει νομίσματα
+        if len(self.index) != count:
+            self.index = {self._name(i): i for i in range(count)}
+        
+        SEQ.pack_into(mm, SEQ_OFFSET, seq + 1)          # μονό: γράφουμε
+        for coin_name, price, timestamp in rows:
+            slot = self.index.get(coin_name)
+            if slot is None:
+                name = coin_name.encode()
+                if count >= slots or len(name) > NAME_BYTES:
+                    # Χωρίς slot (και όχι κομμένο όνομα): οι readers πάνε στη βάση
+                    if coin_name not in self.skipped:
+                        self.skipped.add(coin_name)
+                        skipped += 1
+                        print(f"⚠️ Price board: no slot for {coin_name!r}, served from the database")
+                    continue
+                slot = self.index[coin_name] = count
+                count += 1
+            else:
+                offset = HEADER.size + slot * SLOT.size
+                current = SLOT.unpack_from(mm, offset)[2].rstrip(b'\0').decode()
+                if timestamp < current:
+                    continue
+            SLOT.pack_into(mm, HEADER.size + slot * SLOT.size,
+                           coin_name.encode(), price, timestamp.encode())
+        HEADER.pack_into(mm, 0, MAGIC, seq + 1, time.time(), slots, count, skipped)
+        SEQ.pack_into(mm, SEQ_OFFSET, seq + 2)          # ζυγό: συνεπές
+    
+    def _name(self, slot):
+        return SLOT.unpack_from(self.mm, HEADER.size + slot * SLOT.size)[0].rstrip(b'\0').decode()
+    
+    def _timestamp(self, raw):
+        # Τα περισσότερα slots έχουν το ίδιο timestamp (ένα tick) - decode μία φορά
+        timestamp = self.timestamps.get(raw)
+        if timestamp is None:
+            if len(self.timestamps) > 4096:
+                self.timestamps.clear()
+            timestamp = self.timestamps[raw] = raw.rstrip(b'\0').decode()
+        return timestamp
+    
+    def _layout(self, count):
+        layout = self.layouts.get(count)
+        if layout is None:
+            layout = self.layouts[count] = struct.Struct('<' + SLOT.format.lstrip('<') * count)
+        return layout
+    
+    def read(self, retries=100):
+        """(updated_at, [(coin_name, price, timestamp), ...], skipped) ή None αν δεν υπάρχει board"""
+        if not self._open(create=False):
+            return None
+        mm = self.mm
+        for _ in range(retries):
+            seq = SEQ.unpack_from(mm, SEQ_OFFSET)[0]
+            if seq & 1:
+                time.sleep(0)
+                continue
+            _, _, updated_at, _, count, skipped = HEADER.unpack_from(mm, 0)
+            # Ένα unpack για όλα τα slots, κατευθείαν από το mmap
+            values = self._layout(count).unpack_from(mm, HEADER.size)
+            if SEQ.unpack_from(mm, SEQ_OFFSET)[0] != seq:
+                continue
+            if len(self.names) != count:
+                self.names = [values[i].rstrip(b'\0').decode() for i in range(0, 3 * count, 3)]
+            return updated_at, list(zip(self.names, values[1::3], map(self._timestamp, values[2::3]))), skipped
+        return None
+    
+    def fresh_rows(self, max_age=MAX_AGE):
+        """Τα rows του board αν δεν είναι stale και έχει όλα τα νομίσματα, αλλιώς None"""
+        snapshot = self.read()
+        if snapshot is None or time.time() - snapshot[0] > max_age or snapshot[2]:
+            return None
+        return snapshot[1]
+    
+    def get_latest_prices(self, max_age=MAX_AGE):
+        """Όπως το database.get_latest_prices(), από το board όταν είναι fresh"""
+        rows = self.fresh_rows(max_age)
+        if rows is None:
+            from database import get_latest_prices
+            return get_latest_prices()
+        return sorted(rows)
+    
+    def get_price(self, coin_name, max_age=MAX_AGE, retries=100):
+        """Η τρέχουσα τιμή ενός νομίσματος (ή None αν δεν υπάρχει)"""
+        if self._open(create=False):
+            mm = self.mm
+            for _ in range(retries):
+                seq = SEQ.unpack_from(mm, SEQ_OFFSET)[0]
+                if seq & 1:
+                    time.sleep(0)
+                    continue
+                _, _, updated_at, _, count, _ = HEADER.unpack_from(mm, 0)
+                if len(self.names) != count:
+                    self.names = [self._name(i) for i in range(count)]
+                    self.index = {name: i for i, name in enumerate(self.names)}
+                slot = self.index.get(coin_name)
+                price = None if slot is None else SLOT.unpack_from(mm, HEADER.size + slot * SLOT.size)[1]
+                if SEQ.unpack_from(mm, SEQ_OFFSET)[0] != seq:
+                    continue
+                if time.time() - updated_at > max_age or slot is None:
+                    break
+                return price
+        
+        from database import get_latest_price
+        return get_latest_price(coin_name)
+    
+    def close(self):
+        with self.lock:
+            if self.mm is not None:
+                self.mm.close()
+                os.close(self.fd)
+                self.mm = self.fd = None
+                self.index, self.names = {}, []
+
+# Κοινό board για όλο το process
+price_board = PriceBoard()
\ No newline at end of file
@@ -0,0 +1,259 @@
+import threading
+from array import array
+from datetime import datetime, timezone
+import database
+
+RING_SIZE = 1440            # Ticks ανά νόμισμα (24 ώρες με fetch ανά λεπτό)
+MAX_CACHED_COINS = 500      # Νομίσματα πέρα από αυτό δεν μπαίνουν στο cache
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def to_epoch(timestamp):
+    """Timestamp της βάσης (UTC string) σε epoch seconds"""
+    return datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc).timestamp()
+
+def from_epoch(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+class CoinRing:
+    """Ring buffer σταθερού μεγέθους με τα τελευταία ticks ενός νομίσματος.
+    
+    Τιμές και epoch timestamps σε δύο array('d'): 16 bytes ανά tick,
+    δεσμευμένα μία φορά. complete = True όσο το ring έχει όλο το ιστορικό
+    του νομίσματος (δεν έχει πετάξει ακόμα κανένα tick).
+    """
+    
+    __slots__ = ('capacity', 'prices', 'times', 'head', 'size', 'complete')
+    
+    def __init__(self, capacity, complete=True):
+        self.capacity = capacity
+        self.prices = array('d', [0.0]) * capacity
+        self.times = array('d', [0.0]) * capacity
+        self.head = 0       # Η θέση του επόμενου append
+        self.size = 0
+        self.complete = complete
+    
+    def _slot(self, k):
+        """Η θέση στα arrays του k-οστού παλαιότερου tick"""
+        return (self.head - self.size + k) % self.capacity
+    
+    def append(self, seconds, price):
+        """Προσθέτει ένα tick· False αν είναι παλαιότερο από το τελευταίο"""
+        if self.size:
+            last = (self.head - 1) % self.capacity
+            if seconds < self.times[last]:
+                return False
+            if seconds == self.times[last]:
+                self.prices[last] = price
+                return True
+        
+        self.prices[self.head] = price
+        self.times[self.head] = seconds
+        self.head = (self.head + 1) % self.capacity
+        if self.size == self.capacity:
+            self.complete = False
+        else:
+            self.size += 1
+        return True
+    
+    def last(self):
+        i = (self.head - 1) % self.capacity
+        return self.prices[i], self.times[i]
+    
+    def oldest(self):
+        return self.times[self._slot(0)]
+    
+    def tail(self, count):
+        """Τα τελευταία count ticks ως (price, epoch), παλιό -> νέο"""
+        count = min(count, self.size)
+        return [(self.prices[i], self.times[i])
+                for i in (self._slot(k) for k in range(self.size - count, self.size))]
+    
+    def _bisect(self, seconds):
+        """Πρώτο k με times >= seconds (binary search πάνω στο ring)"""
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.times[self._slot(mid)] < seconds:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    def before(self, seconds):
+        """Το τελευταίο tick πριν το seconds ως (price, epoch) ή None"""
+        k = self._bisect(seconds)
+        if not k:
+            return None
+        i = self._slot(k - 1)
+        return self.prices[i], self.times[i]
+    
+    def between(self, start, end):
+        """Ticks με start <= epoch <= end ως (price, epoch), παλιό -> νέο"""
+        first = self._bisect(start)
+        last = self._bisect(end)
+        while last < self.size and self.times[self._slot(last)] == end:
+            last += 1
+        return [(self.prices[i], self.times[i])
+                for i in (self._slot(k) for k in range(first, last))]
+
+class PriceCache:
+    """In-memory cache με τα πρόσφατα ticks κάθε νομίσματος.
+    
+    Γεμίζει από το tick bus (δηλαδή από το ingest, και από άλλο process μέσω
+    του watcher) και ζεσταίνεται από τη βάση στην εκκίνηση. Οι μέθοδοι
+    get_* έχουν την ίδια μορφή με τις αντίστοιχες του database.py και
+    πηγαίνουν στη βάση μόνο όταν το ζητούμενο δεν υπάρχει στο cache.
+    Με change_only (όπως το CHANGE_ONLY του data_fetcher) το ring κρατά μόνο
+    τα ticks που κρατά και το prices_v2 (database.tick_kind), ώστε ένα hit
+    και ένα miss να δίνουν τις ίδιες γραμμές· το τελευταίο tick κάθε
+    νομίσματος (όπως το latest_prices) κρατιέται χωριστά στο latest.
+    """
+    
+    def __init__(self, ring_size=RING_SIZE, max_coins=MAX_CACHED_COINS, change_only=True):
+        self.ring_size = ring_size
+        self.max_coins = max_coins
+        self.change_only = change_only
+        self.rings = {}
+        self.latest = {}        # coin -> (price, seconds) του τελευταίου tick
+        self.warm = False
+        self.overflow = False   # Υπάρχουν νομίσματα εκτός cache (πάνω από max_coins)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def _load_ring(self, coin_name):
+        rows = database.get_historical_data(coin_name, self.ring_size)
+        
+        ring = CoinRing(self.ring_size, complete=len(rows) < self.ring_size)
+        for price, timestamp in rows:
+            ring.append(to_epoch(timestamp), price)
+        return ring
+    
+    def load(self):
+        """Γεμίζει το cache με τα τελευταία ticks κάθε νομίσματος από τη βάση"""
+        conn = database.get_connection()
+        coins = conn.execute(
+            'SELECT coin_name, price, timestamp FROM latest_prices ORDER BY coin_name LIMIT ?',
+            (self.max_coins + 1,)).fetchall()
+        rings = {coin_name: self._load_ring(coin_name) for coin_name, _, _ in coins[:self.max_coins]}
+        latest = {coin_name: (price, to_epoch(timestamp)) for coin_name, price, timestamp in coins[:self.max_coins]}
+        
+        with self.lock:
+            self.rings = rings
+            self.latest = latest
+            self.overflow = len(coins) > self.max_coins
+            self.warm = True
+        print(f"✅ Price cache loaded: {len(rings)} coins, {sum(r.size for r in rings.values())} ticks")
+    
+    def on_tick(self, timestamp, prices):
+        """Subscriber του tick bus: προσθέτει το tick στο ring κάθε νομίσματος"""
+        seconds = to_epoch(timestamp)
+        reload = []
+        with self.lock:
+            for coin_name, price in prices.items():
+                ring = self.rings.get(coin_name)
+                if ring is None:
+                    if len(self.rings) >= self.max_coins:
+                        self.overflow = True
+                        continue
+                    # Νέο νόμισμα: ό,τι υπάρχει στη βάση είναι αυτό το tick
+                    ring = self.rings[coin_name] = CoinRing(self.ring_size)
+                latest = self.latest.get(coin_name)
+                if latest is None or seconds >= latest[1]:
+                    self.latest[coin_name] = (price, seconds)
+                if self.change_only and ring.size:
+                    last_price, last_seconds = ring.last()
+                    # Ίδια τιμή χωρίς heartbeat: ούτε η βάση έγραψε γραμμή
+                    if seconds > last_seconds and not database.tick_kind(
+                            (last_price, round(last_seconds * 1000)), price, round(seconds * 1000)):
+                        continue
+                if not ring.append(seconds, price):
+                    reload.append(coin_name)
+        
+        # Tick παλαιότερο από το ring (π.χ. backfill): ξαναφορτώνουμε το νόμισμα
+        if reload:
+            rings = {coin_name: self._load_ring(coin_name) for coin_name in reload}
+            with self.lock:
+                self.rings.update(rings)
+    
+    def _count(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+    
+    def get_latest_prices(self):
+        """Όπως το database.get_latest_prices(): [(coin, price, timestamp), ...]"""
+        with self.lock:
+            hit = self.warm and not self.overflow
+            if hit:
+                latest = sorted((coin_name, *tick) for coin_name, tick in self.latest.items())
+            self._count(hit)
+        
+        if not hit:
+            return database.get_latest_prices()
+        return [(coin_name, price, from_epoch(seconds)) for coin_name, price, seconds in latest]
+    
+    def get_latest_timestamp(self, coin_name):
+        with self.lock:
+            latest = self.latest.get(coin_name)
+            hit = latest is not None
+            if hit:
+                seconds = latest[1]
+            self._count(hit)
+        
+        if not hit:
+            return database.get_latest_timestamp(coin_name)
+        return from_epoch(seconds)
+    
+    def get_historical_data(self, coin_name, limit=50):
+        """Όπως το database.get_historical_data(): τα τελευταία limit (price, timestamp)"""
+        with self.lock:
+            ring = self.rings.get(coin_name)
+            hit = ring is not None and (limit <= ring.size or ring.complete)
+            if hit:
+                rows = ring.tail(limit)
+                # Όπως στη βάση: η τελευταία τιμή ισχύει μέχρι το τελευταίο tick
+                latest = self.latest.get(coin_name)
+                if rows and latest and latest[1] > rows[-1][1]:
+                    rows = (rows + [(rows[-1][0], latest[1])])[-limit:]
+            self._count(hit)
+        
+        if not hit:
+            return database.get_historical_data(coin_name, limit)
+        return [(price, from_epoch(seconds)) for price, seconds in rows]
+    
+    def get_history_range(self, coin_name, start, end):
+        """Όπως το database.get_history_range(..., 'raw') για διαστήματα μέσα στο ring"""
+        start_seconds, end_seconds = to_epoch(start), to_epoch(end)
+        with self.lock:
+            ring = self.rings.get(coin_name)
+            hit = ring is not None and ring.size > 0 and (ring.complete or start_seconds >= ring.oldest())
+            if hit:
+                rows = ring.between(start_seconds, end_seconds)
+                # Forward-fill όπως στη βάση: η τιμή που ίσχυε στο start
+                previous = None if rows and rows[0][1] == start_seconds else ring.before(start_seconds)
+                if previous and start_seconds - previous[1] <= database.HEARTBEAT_INTERVAL:
+                    rows.insert(0, (previous[0], start_seconds))
+                # ...και η τελευταία τιμή μέχρι το τελευταίο tick (ως το end)
+                latest = self.latest.get(coin_name)
+                until = min(end_seconds, latest[1]) if latest else end_seconds
+                if rows and until > rows[-1][1]:
+                    rows.append((rows[-1][0], until))
+            self._count(hit)
+        
+        if not hit:
+            return database.get_history_range(coin_name, start, end, 'raw')
+        return [(price, from_epoch(seconds)) for price, seconds in rows]
+    
+    def stats(self):
+        with self.lock:
+            ticks = sum(ring.size for ring in self.rings.values())
+            return {
+                'coins': len(self.rings),
+                'ticks': ticks,
+                'ring_size': self.ring_size,
+                'memory_bytes': len(self.rings) * self.ring_size * 16,
+                'hits': self.hits,
+                'misses': self.misses
+            }
\ No newline at end of file
@@ -7,6 +7,13 @@ let currentCoin = 'bitcoin';
 let currentIndicator = null;
 let originalPrices = [];
 let originalTimestamps = [];
+// Latest prices from the dashboard snapshot
+let latestPrices = [];
+let priceStream = null;
+// Coins of the top cards - their chart series come with the dashboard snapshot
+const TOP_COINS = ['bitcoin', 'ethereum', 'solana', 'ripple', 'cardano'];
+// Chart series from the last snapshot, by coin
+let historyCache = {};
 
 // Function to initialize the chart
 function initChart() {
@@ -87,35 +94,70 @@ function initChart() {
     }
 }
 
-// Fetch current prices
-async function fetchPrices() {
-    console.log('📡 Fetching current prices...');
+// Load everything the dashboard shows (prices, chart, alerts, trading) in one request
+async function loadDashboard() {
+    console.log('📡 Loading dashboard snapshot...');
     
     try {
-        const response = await fetch('/api/prices');
+        const coins = [currentCoin, ...TOP_COINS.filter(coin => coin !== currentCoin)];
+        const response = await fetch(`/api/dashboard?coins=${coins.join(',')}`);
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
         
         const data = await response.json();
-        console.log('📊 Prices response:', data);
+        console.log('📊 Dashboard response:', data);
         
         if (data.status === 'success') {
-            displayPrices(data.data);
-            updateLastUpdate();
-            fetchHistoricalData(currentCoin);
-            document.getElementById('api-status').className = 'badge bg-success rounded-pill';
-            document.getElementById('api-status').textContent = 'Online';
+            historyCache = data.history;
+            handlePrices(data.prices);
+            showHistory(currentCoin);
+            displayAlerts(data.alerts);
+            displayPortfolioValue(data.trading);
+            displayTransactions(data.transactions);
         } else {
             console.error('API error:', data.message);
         }
     } catch (error) {
-        console.error('❌ Error fetching prices:', error);
-        document.getElementById('api-status').className = 'badge bg-danger rounded-pill';
-        document.getElementById('api-status').textContent = 'Offline';
+        console.error('❌ Error loading dashboard:', error);
+        setApiStatus(false);
     }
 }
 
+// Render a new set of latest prices
+function handlePrices(prices) {
+    latestPrices = prices;
+    displayPrices(prices);
+    updateLastUpdate();
+    setApiStatus(true);
+}
+
+function setApiStatus(online) {
+    const status = document.getElementById('api-status');
+    status.className = online ? 'badge bg-success rounded-pill' : 'badge bg-danger rounded-pill';
+    status.textContent = online ? 'Online' : 'Offline';
+}
+
+// Subscribe to /api/stream - the server pushes one event per ingest cycle
+function startPriceStream() {
+    console.log('📡 Connecting to price stream...');
+    
+    priceStream = new EventSource('/api/stream');
+    
+    // Each tick refreshes the whole dashboard with one snapshot request
+    priceStream.addEventListener('prices', function(event) {
+        const data = JSON.parse(event.data);
+        console.log(`📊 Stream tick with ${data.count} prices`);
+        loadDashboard();
+    });
+    
+    // EventSource reconnects by itself and resumes with Last-Event-ID
+    priceStream.onerror = function() {
+        console.warn('⚠️ Price stream disconnected, reconnecting...');
+        setApiStatus(false);
+    };
+}
+
 // Dark Mode Toggle
 function toggleDarkMode() {
     const body = document.body;
@@ -161,17 +203,20 @@ async function exportToCSV() {
     console.log('📥 Exporting data to CSV...');
     
     try {
-        // Fetch latest prices
-        const response = await fetch('/api/prices');
-        const data = await response.json();
+        // Use the prices we already have from the stream
+        let prices = latestPrices;
         
-        if (data.status !== 'success' || !data.data) {
-            showAlertMessage('danger', '❌ No data to export');
-            return;
+        if (prices.length === 0) {
+            const response = await fetch('/api/prices');
+            const data = await response.json();
+            
+            if (data.status !== 'success' || !data.data) {
+                showAlertMessage('danger', '❌ No data to export');
+                return;
+            }
+            prices = data.data;
         }
         
-        const prices = data.data;
-        
         // Create CSV content
         let csvContent = "Coin,Symbol,Price (USD),Timestamp\n";
         
@@ -302,34 +347,15 @@ async function exportAlerts() {
 }
 
 // Trading Bot Functions
-async function loadTradingData() {
-    try {
-        // Load portfolio value
-        const valueResponse = await fetch('/api/trading/portfolio-value');
-        const valueData = await valueResponse.json();
-        
-        if (valueData.status === 'success') {
-            document.getElementById('usd-balance').textContent = 
-                `$${valueData.balance.toLocaleString(undefined, {minimumFractionDigits: 2, maximumFractionDigits: 2})}`;
-            document.getElementById('portfolio-value').textContent = 
-                `$${valueData.portfolio_value.toLocaleString(undefined, {minimumFractionDigits: 2, maximumFractionDigits: 2})}`;
-            document.getElementById('net-worth').textContent = 
-                `$${valueData.total_net_worth.toLocaleString(undefined, {minimumFractionDigits: 2, maximumFractionDigits: 2})}`;
-            
-            displayHoldings(valueData.holdings);
-        }
-        
-        // Load transactions
-        const txResponse = await fetch('/api/trading/transactions');
-        const txData = await txResponse.json();
-        
-        if (txData.status === 'success') {
-            displayTransactions(txData.transactions);
-        }
-        
-    } catch (error) {
-        console.error('Error loading trading data:', error);
-    }
+function displayPortfolioValue(value) {
+    document.getElementById('usd-balance').textContent = 
+        `$${value.balance.toLocaleString(undefined, {minimumFractionDigits: 2, maximumFractionDigits: 2})}`;
+    document.getElementById('portfolio-value').textContent = 
+        `$${value.portfolio_value.toLocaleString(undefined, {minimumFractionDigits: 2, maximumFractionDigits: 2})}`;
+    document.getElementById('net-worth').textContent = 
+        `$${value.total_net_worth.toLocaleString(undefined, {minimumFractionDigits: 2, maximumFractionDigits: 2})}`;
+    
+    displayHoldings(value.holdings);
 }
 
 function displayHoldings(holdings) {
@@ -420,7 +446,7 @@ document.getElementById('trade-form').addEventListener('submit', async function(
         if (data.status === 'success') {
             showAlertMessage('success', data.message);
             document.getElementById('trade-amount').value = '';
-            loadTradingData(); // Refresh data
+            loadDashboard(); // Refresh data
         } else {
             showAlertMessage('danger', data.message);
         }
@@ -450,20 +476,11 @@ document.getElementById('trade-amount').addEventListener('input', async function
         return;
     }
     
-    try {
-        const response = await fetch('/api/prices');
-        const data = await response.json();
-        
-        if (data.status === 'success') {
-            const coinData = data.data.find(p => p.coin === coin);
-            if (coinData) {
-                const value = amount * coinData.price;
-                document.getElementById('estimated-value').textContent = 
-                    `Estimated value: $${formatPrice(value)}`;
-            }
-        }
-    } catch (error) {
-        console.error('Error estimating value:', error);
+    const coinData = latestPrices.find(p => p.coin === coin);
+    if (coinData) {
+        const value = amount * coinData.price;
+        document.getElementById('estimated-value').textContent = 
+            `Estimated value: $${formatPrice(value)}`;
     }
 });
 
@@ -638,12 +655,21 @@ function getSymbol(coinId) {
     return symbols[coinId] || coinId.substring(0, 4).toUpperCase();
 }
 
+// Show the chart of a coin: from the last snapshot, or fetched if it is not there
+function showHistory(coinName) {
+    if (historyCache[coinName]) {
+        displayHistory(coinName, historyCache[coinName]);
+    } else {
+        fetchHistoricalData(coinName);
+    }
+}
+
 // Fetch historical data for charts
 async function fetchHistoricalData(coinName) {
     console.log(`📈 Fetching historical data for ${coinName}...`);
     
     try {
-        const response = await fetch(`/api/history/${coinName}`);
+        const response = await fetch(`/api/history?coins=${coinName}`);
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
@@ -651,20 +677,27 @@ async function fetchHistoricalData(coinName) {
         const data = await response.json();
         console.log(`📊 Historical data for ${coinName}:`, data);
         
-        if (data.status === 'success' && data.prices && data.prices.length > 0) {
-            console.log(`✅ Got ${data.prices.length} data points`);
-            updateChart(data.prices, data.timestamps, coinName);
-            document.getElementById('data-points').textContent = data.prices.length;
-        } else {
-            console.warn('⚠️ No historical data available');
-            document.getElementById('chart-title').textContent = 
-                `${formatCoinName(coinName)} - No data available`;
+        if (data.status === 'success') {
+            historyCache[coinName] = data.series[coinName];
+            displayHistory(coinName, data.series[coinName]);
         }
     } catch (error) {
         console.error(`❌ Error fetching historical data for ${coinName}:`, error);
     }
 }
 
+function displayHistory(coinName, data) {
+    if (data.prices && data.prices.length > 0) {
+        console.log(`✅ Got ${data.prices.length} data points`);
+        updateChart(data.prices, data.timestamps, coinName);
+        document.getElementById('data-points').textContent = data.prices.length;
+    } else {
+        console.warn('⚠️ No historical data available');
+        document.getElementById('chart-title').textContent = 
+            `${formatCoinName(coinName)} - No data available`;
+    }
+}
+
 // Update the chart with new data
 function updateChart(prices, timestamps, coinName) {
     if (!priceChart) {
@@ -785,8 +818,8 @@ function selectCoin(coinId) {
     });
     event.currentTarget.classList.add('selected-coin');
     
-    // Fetch new historical data
-    fetchHistoricalData(coinId);
+    // Show its chart (usually already in the last snapshot)
+    showHistory(coinId);
 }
 
 // Helper functions
@@ -896,9 +929,16 @@ function getRank(coinName) {
 
 // Start auto-refresh
 function startAutoRefresh() {
+    loadDashboard(); // Initial load
+    
+    if (window.EventSource) {
+        startPriceStream();
+        return;
+    }
+    
+    // Fallback for browsers without EventSource
     console.log('🔄 Starting auto-refresh (30s interval)');
-    fetchPrices(); // Initial load
-    setInterval(fetchPrices, 30000); // Refresh every 30 seconds
+    setInterval(loadDashboard, 30000); // Refresh every 30 seconds
 }
 
 // Alert form submission
@@ -956,41 +996,45 @@ async function loadActiveAlerts() {
         const response = await fetch('/api/alerts');
         const data = await response.json();
         
-        const container = document.getElementById('active-alerts');
-        
-        if (data.alerts.length === 0) {
-            container.innerHTML = '<p class="text-muted">No active alerts</p>';
-            return;
-        }
-        
-        let html = '<ul class="list-group">';
-        data.alerts.forEach(alert => {
-            html += `
-                <li class="list-group-item d-flex justify-content-between align-items-center">
-                    <div>
-                        <strong>${formatCoinName(alert.coin)}</strong>
-                        <span class="badge bg-${alert.condition === 'above' ? 'success' : 'danger'} ms-2">
-                            ${alert.condition} $${alert.price}
-                        </span>
-                    </div>
-                    <div>
-                        <small class="text-muted me-3">${alert.email}</small>
-                        <button class="btn btn-sm btn-outline-danger" onclick="deleteAlert(${alert.id})">
-                            <i class="bi bi-trash"></i>
-                        </button>
-                    </div>
-                </li>
-            `;
-        });
-        html += '</ul>';
-        
-        container.innerHTML = html;
+        displayAlerts(data.alerts);
         
     } catch (error) {
         console.error('Error loading alerts:', error);
     }
 }
 
+function displayAlerts(alerts) {
+    const container = document.getElementById('active-alerts');
+    
+    if (alerts.length === 0) {
+        container.innerHTML = '<p class="text-muted">No active alerts</p>';
+        return;
+    }
+    
+    let html = '<ul class="list-group">';
+    alerts.forEach(alert => {
+        html += `
+            <li class="list-group-item d-flex justify-content-between align-items-center">
+                <div>
+                    <strong>${formatCoinName(alert.coin)}</strong>
+                    <span class="badge bg-${alert.condition === 'above' ? 'success' : 'danger'} ms-2">
+                        ${alert.condition} $${alert.price}
+                    </span>
+                </div>
+                <div>
+                    <small class="text-muted me-3">${alert.email}</small>
+                    <button class="btn btn-sm btn-outline-danger" onclick="deleteAlert(${alert.id})">
+                        <i class="bi bi-trash"></i>
+                    </button>
+                </div>
+            </li>
+        `;
+    });
+    html += '</ul>';
+    
+    container.innerHTML = html;
+}
+
 // Global variable για το alert που θα διαγραφεί
 let alertToDelete = null;
 
@@ -1289,13 +1333,11 @@ document.addEventListener('DOMContentLoaded', function() {
         console.error('❌ initChart function not found!');
     }
     
-    // Start auto-refresh
+    // Start auto-refresh (the first snapshot also loads the alerts and trading data)
     if (typeof startAutoRefresh === 'function') {
         startAutoRefresh();
     }
     
-    // Load active alerts
-    loadActiveAlerts();
     // Load dark mode preference when page loads
     loadDarkModePreference();
     
@@ -1307,8 +1349,6 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     updateCurrentTime();
     setInterval(updateCurrentTime, 1000);
-    loadTradingData();
-    setInterval(loadTradingData, 30000);
 });
 
 // Make functions available globally
@@ -0,0 +1,101 @@
+import json
+import threading
+from collections import deque
+from database import get_latest_prices, timestamp_to_ms
+from ticks import tick_bus
+
+class PriceBroadcaster:
+    """Ένα κοινό broadcast των τιμών για όλους τους SSE clients.
+    
+    Είναι subscriber στο tick bus: όταν φτάσει νέο tick φτιάχνει το
+    payload μία φορά. Κάθε client απλά περιμένει το επόμενο event.
+    Το id ενός event είναι το timestamp (epoch ms) του νεότερου tick στο
+    snapshot, οπότε είναι το ίδιο σε όλους τους workers (και μετά από
+    restart): ένα Last-Event-ID ισχύει σε όποιον worker κι αν ξανασυνδεθεί
+    ο client.
+    """
+    
+    def __init__(self, history_size=100, bus=tick_bus):
+        self.bus = bus
+        self.events = deque(maxlen=history_size)  # (event_id, payload) για Last-Event-ID resume
+        self.last_id = 0            # epoch ms του νεότερου tick που έχει σταλεί
+        self.condition = threading.Condition()
+        self.running = False
+    
+    def start(self):
+        """Γίνεται subscriber στο tick bus (μία φορά) και στέλνει το τρέχον snapshot"""
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        self.bus.subscribe(self.on_tick)
+        self.publish(get_latest_prices())
+    
+    def stop(self):
+        self.bus.unsubscribe(self.on_tick)
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+    
+    def on_tick(self, timestamp, prices):
+        """Νέο tick: ένα snapshot όλων των τελευταίων τιμών για όλους τους clients"""
+        self.publish(get_latest_prices())
+    
+    def publish(self, prices):
+        """Στέλνει ένα νέο tick σε όλους τους clients"""
+        data = [{
+            'coin': coin_name,
+            'price': price,
+            'timestamp': timestamp
+        } for coin_name, price, timestamp in prices]
+        payload = json.dumps({'data': data, 'count': len(data)})
+        event_id = max((timestamp_to_ms(timestamp) for _, _, timestamp in prices), default=0)
+        
+        with self.condition:
+            if self.events and self.events[-1][1] == payload:
+                return self.last_id         # Τίποτα νέο (π.χ. commit χωρίς τιμές)
+            # Νέες τιμές χωρίς νεότερο timestamp (σπάνιο): επόμενο id, ώστε να σταλούν
+            self.last_id = max(event_id, self.last_id + 1)
+            self.events.append((self.last_id, payload))
+            self.condition.notify_all()
+        return self.last_id
+    
+    def events_after(self, last_event_id):
+        """Events μετά το last_event_id· αν είναι παλαιότερο από το history, μόνο το τελευταίο"""
+        with self.condition:
+            events = list(self.events)
+        if last_event_id is None or not events:
+            return events[-1:]
+        # Ίσο ή νεότερο (ο client ήρθε από worker που είδε ήδη το επόμενο tick): τίποτα
+        if last_event_id >= events[-1][0]:
+            return []
+        if last_event_id >= events[0][0]:
+            return [e for e in events if e[0] > last_event_id]
+        # Κάθε event είναι πλήρες snapshot: το τελευταίο αρκεί
+        return events[-1:]
+    
+    def wait_for_event(self, last_event_id, timeout):
+        """Μπλοκάρει μέχρι να υπάρξει event νεότερο από το last_event_id"""
+        with self.condition:
+            seen = last_event_id or 0
+            self.condition.wait_for(lambda: self.last_id > seen or not self.running,
+                                    timeout=timeout)
+    
+    def stream(self, last_event_id=None, heartbeat=15):
+        """Generator με SSE μηνύματα για έναν client"""
+        self.start()
+        yield 'retry: 5000\n\n'
+        
+        while self.running:
+            events = self.events_after(last_event_id)
+            if not events:
+                self.wait_for_event(last_event_id, heartbeat)
+                events = self.events_after(last_event_id)
+            
+            if events:
+                for event_id, payload in events:
+                    yield f'id: {event_id}\nevent: prices\ndata: {payload}\n\n'
+                    last_event_id = event_id
+            else:
+                # Σχόλιο SSE ώστε να καταλαβαίνουμε αν έκλεισε ο client
+                yield ': keep-alive\n\n'
\ No newline at end of file
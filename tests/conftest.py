@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Τα modules είναι στη ρίζα του repo (όχι package)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
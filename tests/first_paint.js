@@ -0,0 +1,107 @@
+// Runs the dashboard scripts in node and reports every request they make on first paint.
+// Usage: node first_paint.js script.js [script.js ...]
+// Each request is written to stdout as one JSON line ({"fetch": url, ...} or
+// {"eventsource": url}); a fetch waits for one JSON line on stdin with the
+// response ({"status": 200, "body": "..."}). When nothing has been pending
+// for IDLE_MS it writes {"done": true} and exits.
+const fs = require('fs');
+const readline = require('readline');
+const vm = require('vm');
+
+const IDLE_MS = 300;
+
+function send(message) {
+    process.stdout.write(JSON.stringify(message) + '\n');
+}
+
+// A DOM node, library or anything else the page touches: every property and call works
+function stub() {
+    const props = {};
+    return new Proxy(function () {}, {
+        get(target, prop) {
+            if (prop === Symbol.toPrimitive) return () => '';
+            if (prop === Symbol.iterator) return function* () {};
+            if (prop === 'then') return undefined;
+            if (prop === 'length') return 0;
+            if (!(prop in props)) props[prop] = stub();
+            return props[prop];
+        },
+        set(target, prop, value) {
+            props[prop] = value;
+            return true;
+        },
+        apply: () => stub(),
+        construct: () => stub()
+    });
+}
+
+let pending = 0;
+let lastActivity = Date.now();
+const waiting = [];
+
+readline.createInterface({ input: process.stdin }).on('line', line => {
+    const { status, body } = JSON.parse(line);
+    pending--;
+    lastActivity = Date.now();
+    waiting.shift()({
+        ok: status < 400,
+        status,
+        headers: { get: () => null },
+        json: async () => JSON.parse(body),
+        text: async () => body
+    });
+});
+
+function fetch(url, options = {}) {
+    pending++;
+    lastActivity = Date.now();
+    send({ fetch: String(url), method: options.method || 'GET', body: options.body || null });
+    return new Promise(resolve => waiting.push(resolve));
+}
+
+class EventSource {
+    constructor(url) {
+        send({ eventsource: String(url) });
+    }
+    addEventListener() {}
+    close() {}
+}
+
+const loaded = [];
+const document = stub();
+document.addEventListener = (type, listener) => {
+    if (type === 'DOMContentLoaded') loaded.push(listener);
+};
+
+const page = {
+    document,
+    fetch,
+    EventSource,
+    Chart: stub(),
+    bootstrap: stub(),
+    localStorage: { getItem: () => null, setItem() {}, removeItem() {} },
+    navigator: stub(),
+    location: stub(),
+    console: { log() {}, warn() {}, error() {}, info() {}, debug() {} },
+    setTimeout,
+    clearTimeout,
+    setInterval: () => 0,           // Periodic refreshes are not part of the first paint
+    clearInterval() {},
+    alert() {},
+    confirm: () => true,
+    Date, JSON, Math, Object, Array, Promise, Number, String, Error, Intl, URLSearchParams
+};
+page.window = page;
+vm.createContext(page);
+
+for (const path of process.argv.slice(2)) {
+    vm.runInContext(fs.readFileSync(path, 'utf8'), page, { filename: path });
+}
+loaded.forEach(listener => listener());
+
+setInterval(() => {
+    if (pending === 0 && Date.now() - lastActivity > IDLE_MS) {
+        send({ done: true });
+        process.exit(0);
+    }
+}, 50);
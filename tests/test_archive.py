@@ -0,0 +1,37 @@
+import numpy as np
+
+from archive import PriceArchive
+
+DAY = 86400000
+JAN = 1577836800000         # 2020-01-01
+
+def test_older_ticks_are_merged_into_their_month(tmp_path):
+    archive = PriceArchive(str(tmp_path))
+    assert archive.append('bitcoin', [JAN, JAN + 2 * DAY, JAN + 40 * DAY], [1.0, 3.0, 5.0]) == 3
+    
+    # Μέσα στον Ιανουάριο και πριν από όλα: συγχώνευση, όχι απόρριψη
+    assert archive.append('bitcoin', [JAN - DAY, JAN + DAY, JAN + 2 * DAY], [0.0, 2.0, 9.0]) == 2
+    ts, prices = archive.scan('bitcoin')
+    assert ts.tolist() == [JAN - DAY, JAN, JAN + DAY, JAN + 2 * DAY, JAN + 40 * DAY]
+    assert prices.tolist() == [0.0, 1.0, 2.0, 3.0, 5.0]     # Το υπάρχον tick κερδίζει
+    
+    # Ένας δεύτερος reader (άλλο process) βλέπει το νέο generation
+    ts, _ = PriceArchive(str(tmp_path)).scan('bitcoin', JAN, JAN + 2 * DAY)
+    assert ts.tolist() == [JAN, JAN + DAY, JAN + 2 * DAY]
+    assert sorted(p.name for p in (tmp_path / 'bitcoin').iterdir()) == [
+        '2019-12.price', '2019-12.ts', '2020-01.1.price', '2020-01.1.ts', '2020-02.price', '2020-02.ts']
+
+def test_rerun_writes_nothing(tmp_path):
+    archive = PriceArchive(str(tmp_path))
+    ts = JAN + np.arange(100) * 60000
+    archive.append('bitcoin', ts, np.ones(100))
+    assert archive.append('bitcoin', ts, np.ones(100)) == 0
+    assert archive.stats()['ticks'] == 100
+
+def test_open_partitions_are_bounded(tmp_path):
+    archive = PriceArchive(str(tmp_path), max_open=2)
+    ts = JAN + np.arange(4) * 40 * DAY                   # 4 διαφορετικοί μήνες
+    archive.append('bitcoin', ts, np.arange(4.0))
+    assert archive.scan('bitcoin')[1].tolist() == [0.0, 1.0, 2.0, 3.0]
+    assert len(archive.maps) == 2
+    assert archive.scan('bitcoin', JAN, JAN)[1].tolist() == [0.0]
\ No newline at end of file
@@ -0,0 +1,26 @@
+import io
+
+import pytest
+
+from data_fetcher import iter_market_chart
+
+BODY = (b'{"prices": [[1577836800000, 7195.24], [1577836860000,7196.5] ,\n'
+        b' [1577836920000, null],[1577836980000, 7197.1]], '
+        b'"market_caps": [[1577836800000, 130000000000.5], [1577836860000, 130000000001]], '
+        b'"total_volumes": [[1577836800000, 1.5]]}')
+EMPTY = (b'{"prices": [], "market_caps": [[1, 2]]}', b'{"prices":[ ]}')
+
+@pytest.mark.parametrize('chunk_size', range(1, len(BODY) + 1))
+def test_same_pairs_for_every_chunk_size(chunk_size):
+    """Τα ίδια ζεύγη για κάθε chunk_size από 1 έως όλο το σώμα (null τιμές παραλείπονται)"""
+    blocks = list(iter_market_chart(io.BytesIO(BODY), 'x', chunk_size=chunk_size))
+    ts = [int(value) for _, block, _ in blocks for value in block]
+    prices = [float(value) for _, _, block in blocks for value in block]
+    assert ts == [1577836800000, 1577836860000, 1577836980000]
+    assert prices == [7195.24, 7196.5, 7197.1]
+
+@pytest.mark.parametrize('body', EMPTY)
+def test_empty_prices(body):
+    """Άδειος πίνακας prices: κανένα block, ούτε από τα market_caps που ακολουθούν"""
+    for chunk_size in range(1, len(body) + 1):
+        assert not list(iter_market_chart(io.BytesIO(body), 'x', chunk_size=chunk_size)), chunk_size
@@ -0,0 +1,95 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+import database
+from benchtools import temp_database
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HARNESS = os.path.join(ROOT, 'tests', 'first_paint.js')
+COINS = ['bitcoin', 'ethereum', 'solana', 'ripple', 'cardano']
+
+@pytest.fixture(scope='module')
+def app():
+    """Το app πάνω σε προσωρινή βάση, με τιμές για τα νομίσματα του dashboard"""
+    with temp_database():
+        import app
+        for minute in range(3):
+            database.insert_prices({coin: 100.0 + minute for coin in COINS},
+                                   f'2024-01-01 12:0{minute}:00')
+        app.price_cache.load()
+        app.portfolio_engine.load()
+        try:
+            yield app
+        finally:
+            for stop in (app.price_broadcaster.stop, app.tick_bus.stop,
+                         app.alert_outbox.stop, app.trading_bot.stop):
+                stop()
+
+@pytest.fixture
+def client(app):
+    return app.app.test_client()
+
+def page_scripts(tmp_path):
+    """static/app.js και μετά τα inline scripts του templates/index.html, όπως στον browser"""
+    with open(os.path.join(ROOT, 'templates', 'index.html'), encoding='utf-8') as f:
+        inline = re.findall(r'<script>(.*?)</script>', f.read(), re.S)
+    scripts = [os.path.join(ROOT, 'static', 'app.js')]
+    for i, code in enumerate(inline):
+        path = tmp_path / f'inline{i}.js'
+        path.write_text(code, encoding='utf-8')
+        scripts.append(str(path))
+    return scripts
+
+def first_paint(client, scripts):
+    """Τα requests που κάνει η σελίδα μέχρι να ησυχάσει: [(type, url), ...]"""
+    node = subprocess.Popen(['node', HARNESS, *scripts], stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, text=True)
+    requests = []
+    try:
+        for line in node.stdout:
+            message = json.loads(line)
+            if message.get('done'):
+                break
+            if 'eventsource' in message:
+                requests.append(('eventsource', message['eventsource']))
+                continue
+            requests.append(('fetch', message['fetch']))
+            response = client.open(message['fetch'], method=message['method'], data=message['body'],
+                                   content_type='application/json')
+            node.stdin.write(json.dumps({'status': response.status_code,
+                                         'body': response.get_data(as_text=True)}) + '\n')
+            node.stdin.flush()
+    finally:
+        node.kill()
+        node.wait()
+    return requests
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+def test_first_paint_is_one_dashboard_request(client, tmp_path):
+    requests = first_paint(client, page_scripts(tmp_path))
+    assert requests == [('fetch', f"/api/dashboard?coins={','.join(COINS)}"),
+                        ('eventsource', '/api/stream')]
+
+def test_dashboard_is_one_database_snapshot(app, client):
+    # Τα caches στη μνήμη μένουν στο προηγούμενο tick· το dashboard όχι
+    caches = [app.price_cache.on_tick, app.portfolio_engine.on_tick]
+    for callback in caches:
+        app.tick_bus.unsubscribe(callback)
+    try:
+        database.insert_prices({coin: 200.0 for coin in COINS}, '2024-01-01 12:03:00')
+        app.trading_bot.buy_coin('bitcoin', 1.0, 200.0)
+        data = client.get(f"/api/dashboard?coins={','.join(COINS)}").get_json()
+    finally:
+        for callback in caches:
+            app.tick_bus.subscribe(callback)
+    
+    assert {row['price'] for row in data['prices']} == {200.0}
+    assert all(series['prices'][-1] == 200.0 for series in data['history'].values())
+    assert data['transactions'][0]['coin'] == 'bitcoin'
+    assert data['trading']['holdings'][0]['current_price'] == 200.0
+    assert data['trading']['total_net_worth'] == data['trading']['balance'] + 200.0
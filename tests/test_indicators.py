@@ -0,0 +1,7 @@
+import numpy as np
+
+from indicators import to_list
+
+def test_to_list_keeps_significant_digits_of_small_prices():
+    assert to_list(np.array([1.23456789012345e-9, 65000.123456789, -0.0, np.nan])) == \
+        [1.23456789012e-09, 65000.1234568, 0.0, None]
@@ -0,0 +1,35 @@
+import datetime
+
+import database
+from benchtools import temp_database
+from pricecache import PriceCache
+
+def timestamps(count, step=60):
+    """count timestamps ανά step seconds από 2024-01-01 12:00:00"""
+    start = datetime.datetime(2024, 1, 1, 12)
+    return [str(start + datetime.timedelta(seconds=i * step)) for i in range(count)]
+
+def test_ring_keeps_the_rows_of_change_only_ingest():
+    with temp_database():
+        database.init_db()
+        cache = PriceCache(ring_size=64)
+        cache.load()
+        # Ίδια τιμή για 15 λεπτά (ένα heartbeat), μετά αλλαγές
+        prices = [100.0] * 15 + [101.0, 101.0, 102.0, 102.0]
+        for timestamp, price in zip(timestamps(len(prices)), prices):
+            database.insert_prices({'bitcoin': price}, timestamp, change_only=True)
+            cache.on_tick(timestamp, {'bitcoin': price})
+        
+        assert [price for price, _ in database.get_history_range('bitcoin', *timestamps(2, 3600))] == \
+            [100.0, 100.0, 101.0, 102.0, 102.0]  # πρώτο, heartbeat, 101, 102 και το τελευταίο tick
+        for limit in (2, 64):
+            assert cache.get_historical_data('bitcoin', limit) == database.get_historical_data('bitcoin', limit)
+        assert cache.hits == 2
+        assert cache.get_latest_prices() == database.get_latest_prices()
+        assert cache.get_latest_timestamp('bitcoin') == database.get_latest_timestamp('bitcoin')
+        
+        # Forward-fill στο start και μέχρι το τελευταίο tick (12:16 και 12:18 χωρίς γραμμή)
+        for start, end in [(3, 16), (11, 17), (16, 25)]:
+            start, end = timestamps(26)[start], timestamps(26)[end]
+            assert cache.get_history_range('bitcoin', start, end) == \
+                database.get_history_range('bitcoin', start, end, 'raw')
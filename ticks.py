@@ -0,0 +1,139 @@
+import queue
+import threading
+import time
+
+class TickBus:
+    """In-process publish/subscribe για τα ticks τιμών.
+    
+    Το ingest (insert_prices) κάνει publish κάθε tick μόλις γίνει commit.
+    Οι subscribers (alerts, SSE stream, ...) καλούνται σε ένα δικό τους
+    dispatcher thread, ώστε να μην καθυστερούν το ingest.
+    
+    Όταν ο fetcher τρέχει σε άλλο process, το start_watcher() παρακολουθεί
+    το PRAGMA data_version της βάσης και κάνει publish τα νέα ticks από εκεί.
+    Τα callbacks του on_change() καλούνται σε κάθε τέτοια αλλαγή (όχι μόνο
+    ticks: π.χ. trades από άλλο process).
+    """
+    
+    def __init__(self):
+        self.subscribers = []
+        self.change_callbacks = []  # callback() σε κάθε commit άλλης σύνδεσης
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.seen = {}              # coin -> (timestamp, price) του τελευταίου publish
+        self.dispatcher = None
+        self.watcher = None
+        self.running = False
+    
+    def subscribe(self, callback):
+        """Το callback(timestamp, prices) καλείται για κάθε νέο tick"""
+        with self.lock:
+            self.subscribers.append(callback)
+        self._start_dispatcher()
+        return callback
+    
+    def on_change(self, callback):
+        """Το callback() καλείται από τον watcher όταν αλλάξει το data_version"""
+        with self.lock:
+            self.change_callbacks.append(callback)
+        return callback
+    
+    def unsubscribe(self, callback):
+        with self.lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+    
+    def publish(self, timestamp, prices):
+        """Στέλνει ένα tick ({coin: price}) σε όλους τους subscribers.
+        
+        Τιμές που έχουν ήδη γίνει publish (π.χ. και από το ίδιο process και
+        από τον watcher) αγνοούνται.
+        """
+        with self.lock:
+            fresh = {}
+            for coin, price in prices.items():
+                last = self.seen.get(coin)
+                if last is None or timestamp > last[0] or (timestamp == last[0] and price != last[1]):
+                    fresh[coin] = price
+                    self.seen[coin] = (timestamp, price)
+            if not fresh or not self.subscribers:
+                return
+        self.queue.put((timestamp, fresh))
+    
+    def _start_dispatcher(self):
+        with self.lock:
+            if self.dispatcher is not None:
+                return
+            self.running = True
+            self.dispatcher = threading.Thread(target=self._dispatch, name='tick-bus', daemon=True)
+        self.dispatcher.start()
+    
+    def _dispatch(self):
+        while self.running:
+            item = self.queue.get()
+            if item is None:
+                break
+            timestamp, prices = item
+            with self.lock:
+                subscribers = list(self.subscribers)
+            for callback in subscribers:
+                try:
+                    callback(timestamp, prices)
+                except Exception as e:
+                    print(f"❌ Error in tick subscriber {getattr(callback, '__name__', callback)}: {e}")
+    
+    def start_watcher(self, db_path=None, poll_interval=0.25):
+        """Cross-process fallback: publish ticks που έγραψε άλλο process"""
+        with self.lock:
+            if self.watcher is not None:
+                return
+            self.running = True
+            self.watcher = threading.Thread(target=self._watch, args=(db_path, poll_interval),
+                                            name='tick-watcher', daemon=True)
+        self.watcher.start()
+    
+    def _watch(self, db_path, poll_interval):
+        from database import get_connection
+        
+        conn = get_connection(db_path)
+        data_version = None
+        # Ξεκινάμε από το τρέχον τελευταίο tick - δεν ξαναστέλνουμε ιστορικό
+        since = conn.execute('SELECT MAX(timestamp) FROM latest_prices').fetchone()[0] or ''
+        
+        while self.running:
+            try:
+                # Το data_version αλλάζει όταν κάποια άλλη σύνδεση κάνει commit
+                version = conn.execute('PRAGMA data_version').fetchone()[0]
+                if version != data_version:
+                    data_version = version
+                    rows = conn.execute('''
+                        SELECT coin_name, price, timestamp
+                        FROM latest_prices
+                        WHERE timestamp >= ?
+                        ORDER BY timestamp
+                    ''', (since,)).fetchall()
+                    
+                    ticks = {}
+                    for coin_name, price, timestamp in rows:
+                        ticks.setdefault(timestamp, {})[coin_name] = price
+                    for timestamp, prices in ticks.items():
+                        self.publish(timestamp, prices)
+                        since = max(since, timestamp)
+                    
+                    with self.lock:
+                        callbacks = list(self.change_callbacks)
+                    for callback in callbacks:
+                        try:
+                            callback()
+                        except Exception as e:
+                            print(f"❌ Error in change callback {getattr(callback, '__name__', callback)}: {e}")
+            except Exception as e:
+                print(f"❌ Error in tick watcher: {e}")
+            time.sleep(poll_interval)
+    
+    def stop(self):
+        self.running = False
+        self.queue.put(None)
+
+# Κοινό bus για όλο το process
+tick_bus = TickBus()
\ No newline at end of file
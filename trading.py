@@ -1,83 +1,297 @@
+import os
+import queue
+import random
+import shutil
 import sqlite3
-from datetime import datetime
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from database import get_connection, on_commit, track_versions, transaction
+from priceboard import price_board
+
+DEFAULT_ACCOUNT = 1         # Ο λογαριασμός του dashboard (και όλων των παλιών δεδομένων)
+INITIAL_BALANCE = 10000
+TRADE_RETRIES = 8           # Προσπάθειες ενός order όταν η βάση είναι locked (SQLITE_BUSY)
+RETRY_DELAY = 0.005         # Seconds, διπλασιάζεται σε κάθε retry (+ jitter)
+GROUP_COMMIT = os.environ.get('TRADING_GROUP_COMMIT', '0') == '1'
+GROUP_COMMIT_MAX = 256      # Orders ανά transaction στο group commit
+GROUP_COMMIT_WAIT = 0       # Extra seconds αναμονής (0: όσα orders μαζεύτηκαν όσο έτρεχε το προηγούμενο commit)
+TRANSACTIONS_PAGE = 20      # Συναλλαγές ανά σελίδα (default)
+TRANSACTIONS_MAX_PAGE = 500
+# Οι στήλες που κουβαλάνε τα covering indexes του transactions (εκτός από timestamp, id)
+TRANSACTION_COLUMNS = 'type, coin_name, amount, price, total, realized_pnl'
+
+def is_busy(error):
+    """True για τα σφάλματα lock της SQLite (SQLITE_BUSY / SQLITE_LOCKED)"""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+
+def with_retries(run, retries=TRADE_RETRIES, delay=RETRY_DELAY):
+    """Τρέχει ένα write transaction και το ξαναδοκιμάζει από την αρχή σε SQLITE_BUSY.
+    
+    Το transaction() έχει ήδη κάνει rollback, οπότε τίποτα από την
+    αποτυχημένη προσπάθεια δεν έχει γραφτεί.
+    """
+    for attempt in range(retries):
+        try:
+            return run()
+        except sqlite3.OperationalError as e:
+            if not is_busy(e) or attempt == retries - 1:
+                raise
+            time.sleep(delay * (2 ** attempt) * (0.5 + random.random()))
+
+class OrderQueue:
+    """Group commit: ένα thread εκτελεί τα orders της ουράς σε κοινά transactions.
+    
+    Κάθε order τρέχει σε δικό του SAVEPOINT, οπότε ένα order που αποτυγχάνει
+    δεν ακυρώνει τα άλλα, και όλα μαζί κάνουν ένα commit (ένα fsync του WAL
+    και ένα write lock για έως GROUP_COMMIT_MAX orders). Ο caller παίρνει
+    ένα Future που ολοκληρώνεται μόνο μετά το commit.
+    """
+    
+    def __init__(self, bot, max_batch=GROUP_COMMIT_MAX, wait=GROUP_COMMIT_WAIT):
+        self.bot = bot
+        self.max_batch = max_batch
+        self.wait = wait
+        self.orders = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.committed = 0
+    
+    def submit(self, side, coin_name, amount, price, account_id=DEFAULT_ACCOUNT):
+        future = Future()
+        self.start()
+        self.orders.put((future, side, coin_name, amount, price, account_id))
+        return future
+    
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='order-queue', daemon=True)
+                self.thread.start()
+    
+    def stop(self):
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is not None:
+            self.orders.put(None)
+            thread.join(timeout=5)
+    
+    def _next_batch(self):
+        first = self.orders.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.wait
+        while len(batch) < self.max_batch:
+            try:
+                order = self.orders.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if order is None:
+                self.orders.put(None)
+                break
+            batch.append(order)
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                results = with_retries(lambda: self._execute(batch))
+            except Exception as e:
+                for future, *_ in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.committed += len(batch)
+            for (future, *_), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+    
+    def _execute(self, batch):
+        results = []
+        with transaction(self.bot.db_path, immediate=True) as conn:
+            for _, side, coin_name, amount, price, account_id in batch:
+                conn.execute('SAVEPOINT trade_order')
+                try:
+                    results.append(self.bot._execute(conn, side, coin_name, amount, price, account_id))
+                except Exception as e:
+                    conn.execute('ROLLBACK TO trade_order')
+                    results.append(e)
+                conn.execute('RELEASE trade_order')
+        return results
 
 class TradingBot:
-    def __init__(self, db_path='crypto_prices.db'):
+    """Paper trading για πολλούς λογαριασμούς (account_id σε κάθε μέθοδο).
+    
+    Χωρίς account_id όλα πηγαίνουν στον DEFAULT_ACCOUNT, τον λογαριασμό του
+    dashboard, οπότε ο κώδικας του ενός χρήστη δουλεύει όπως πριν.
+    """
+    
+    def __init__(self, db_path=None, group_commit=GROUP_COMMIT):
         self.db_path = db_path
         self.init_trading_tables()
+        # Με group commit τα orders περνούν από ένα κοινό writer thread
+        self.order_queue = OrderQueue(self) if group_commit else None
+        self.trade_listeners = []
+    
+    def subscribe(self, callback):
+        """Το callback(event) καλείται μετά το commit κάθε trade (ή αλλαγής balance)"""
+        self.trade_listeners.append(callback)
+        return callback
+    
+    def _notify(self, event):
+        for callback in list(self.trade_listeners):
+            try:
+                callback(event)
+            except Exception as e:
+                # Ένας listener δεν πρέπει να ακυρώνει ένα trade που έγινε ήδη commit
+                print(f"❌ Error in trade listener: {e}")
+    
+    def stop(self):
+        """Σταματά το thread του group commit (αν υπάρχει)"""
+        if self.order_queue is not None:
+            self.order_queue.stop()
     
     def init_trading_tables(self):
         """Δημιουργεί πίνακες για το trading bot"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        with transaction(self.db_path) as conn:
+            c = conn.cursor()
+            
+            # Οι πίνακες του ενός λογαριασμού γίνονται *_v1 και αντιγράφονται παρακάτω
+            legacy = migrate_accounts(conn)
+            
+            # Λογαριασμοί (paper trading users)
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS accounts (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Πίνακας για το portfolio κάθε λογαριασμού
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS portfolio (
+                    account_id INTEGER NOT NULL,
+                    coin_name TEXT NOT NULL,
+                    amount REAL DEFAULT 0,
+                    avg_buy_price REAL DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (account_id, coin_name)
+                )
+            ''')
+            
+            # Πίνακας για το ιστορικό συναλλαγών
+            c.execute(f'''
+                CREATE TABLE IF NOT EXISTS transactions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    account_id INTEGER NOT NULL DEFAULT {DEFAULT_ACCOUNT},
+                    type TEXT NOT NULL,  -- 'buy' or 'sell'
+                    coin_name TEXT NOT NULL,
+                    amount REAL NOT NULL,
+                    price REAL NOT NULL,
+                    total REAL NOT NULL,
+                    realized_pnl REAL,  -- μόνο στα sell: total - amount * avg_buy_price
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            migrate_realized_pnl(conn)
+            
+            # Covering indexes: κάθε σελίδα του ιστορικού (keyset στο (timestamp, id))
+            # και τα per-coin summaries διαβάζονται μόνο από το index, χωρίς sort
+            c.execute('DROP INDEX IF EXISTS idx_transactions_account')
+            c.execute(f'''
+                CREATE INDEX IF NOT EXISTS idx_transactions_history
+                ON transactions (account_id, timestamp, id, {TRANSACTION_COLUMNS})
+            ''')
+            c.execute(f'''
+                CREATE INDEX IF NOT EXISTS idx_transactions_coin
+                ON transactions (account_id, coin_name, timestamp, id, {TRANSACTION_COLUMNS})
+            ''')
+            
+            # Πίνακας για το υπόλοιπο (balance) κάθε λογαριασμού
+            c.execute(f'''
+                CREATE TABLE IF NOT EXISTS balance (
+                    account_id INTEGER PRIMARY KEY,
+                    usd_balance REAL DEFAULT {INITIAL_BALANCE},
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            # Για το PortfolioEngine.sync(): ποια υπόλοιπα άλλαξαν (και από άλλα processes)
+            c.execute('CREATE INDEX IF NOT EXISTS idx_balance_updated ON balance (updated_at)')
+            
+            if legacy:
+                copy_legacy_account(conn, legacy)
+            
+            # Κάθε αλλαγή λογαριασμών, υπολοίπων, θέσεων ή συναλλαγών αλλάζει το 'ledger' version
+            for table in ('accounts', 'balance', 'portfolio', 'transactions'):
+                track_versions(conn, table, 'ledger')
+            
+            # Ο λογαριασμός του dashboard υπάρχει πάντα
+            c.execute("INSERT OR IGNORE INTO accounts (id, name) VALUES (?, 'default')", (DEFAULT_ACCOUNT,))
+            c.execute('INSERT OR IGNORE INTO balance (account_id, usd_balance) VALUES (?, ?)',
+                      (DEFAULT_ACCOUNT, INITIAL_BALANCE))
         
-        # Πίνακας για το portfolio του χρήστη
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS portfolio (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                coin_name TEXT NOT NULL UNIQUE,
-                amount REAL DEFAULT 0,
-                avg_buy_price REAL DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Πίνακας για το ιστορικό συναλλαγών
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                type TEXT NOT NULL,  -- 'buy' or 'sell'
-                coin_name TEXT NOT NULL,
-                amount REAL NOT NULL,
-                price REAL NOT NULL,
-                total REAL NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Πίνακας για το υπόλοιπο (balance)
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS balance (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                usd_balance REAL DEFAULT 10000,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Αρχικοποίηση balance αν δεν υπάρχει
-        c.execute('SELECT * FROM balance')
-        if not c.fetchone():
-            c.execute('INSERT INTO balance (usd_balance) VALUES (10000)')
-        
-        conn.commit()
-        conn.close()
         print("✅ Trading tables initialized")
     
-    def get_balance(self):
-        """Επιστρέφει το τρέχον υπόλοιπο σε USD"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('SELECT usd_balance FROM balance ORDER BY id DESC LIMIT 1')
+    def create_account(self, name, initial_balance=INITIAL_BALANCE):
+        """Νέος λογαριασμός με αρχικό balance - επιστρέφει το id (ή None αν το όνομα υπάρχει)"""
+        try:
+            with transaction(self.db_path, immediate=True) as conn:
+                account_id = conn.execute('INSERT INTO accounts (name) VALUES (?)', (name,)).lastrowid
+                conn.execute('INSERT INTO balance (account_id, usd_balance) VALUES (?, ?)',
+                             (account_id, initial_balance))
+                on_commit(lambda: self._notify({'type': 'balance', 'account': account_id,
+                                                'balance': initial_balance}), self.db_path)
+        except sqlite3.IntegrityError:
+            return None
+        return account_id
+    
+    def get_accounts(self, limit=100, after=0):
+        """Λογαριασμοί με id > after (keyset pagination)"""
+        c = get_connection(self.db_path).execute('''
+            SELECT accounts.id, accounts.name, balance.usd_balance, accounts.created_at
+            FROM accounts
+            JOIN balance ON balance.account_id = accounts.id
+            WHERE accounts.id > ?
+            ORDER BY accounts.id
+            LIMIT ?
+        ''', (after, limit))
+        return [{'id': account_id, 'name': name, 'balance': balance, 'created_at': created_at}
+                for account_id, name, balance, created_at in c.fetchall()]
+    
+    def get_balance(self, account_id=DEFAULT_ACCOUNT):
+        """Επιστρέφει το τρέχον υπόλοιπο σε USD (None αν δεν υπάρχει ο λογαριασμός)"""
+        c = get_connection(self.db_path).execute('SELECT usd_balance FROM balance WHERE account_id = ?',
+                                                 (account_id,))
         balance = c.fetchone()
-        conn.close()
-        return balance[0] if balance else 10000
+        return balance[0] if balance else None
     
-    def update_balance(self, new_balance):
+    def update_balance(self, new_balance, account_id=DEFAULT_ACCOUNT):
         """Ενημερώνει το υπόλοιπο"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('UPDATE balance SET usd_balance = ?, updated_at = CURRENT_TIMESTAMP', (new_balance,))
-        conn.commit()
-        conn.close()
+        with transaction(self.db_path) as conn:
+            conn.execute('UPDATE balance SET usd_balance = ?, updated_at = CURRENT_TIMESTAMP WHERE account_id = ?',
+                         (new_balance, account_id))
+            on_commit(lambda: self._notify({'type': 'balance', 'account': account_id,
+                                            'balance': new_balance}), self.db_path)
     
-    def get_portfolio(self):
+    def get_portfolio(self, account_id=DEFAULT_ACCOUNT):
         """Επιστρέφει όλα τα coins στο portfolio"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('SELECT coin_name, amount, avg_buy_price FROM portfolio WHERE amount > 0')
+        c = get_connection(self.db_path).execute('''
+            SELECT coin_name, amount, avg_buy_price FROM portfolio WHERE account_id = ? AND amount > 0
+        ''', (account_id,))
         portfolio = c.fetchall()
-        conn.close()
         
         result = []
         for coin_name, amount, avg_price in portfolio:
@@ -88,20 +302,58 @@ class TradingBot:
             })
         return result
     
-    def buy_coin(self, coin_name, amount, current_price):
+    def get_current_price(self, coin_name):
+        """Η τιμή εκτέλεσης μιας εντολής: από το κοινό price board (ή τη βάση)"""
+        return price_board.get_price(coin_name)
+    
+    def buy_coin(self, coin_name, amount, current_price, account_id=DEFAULT_ACCOUNT):
         """Αγοράζει ένα coin"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        return self.execute('buy', coin_name, amount, current_price, account_id)
+    
+    def sell_coin(self, coin_name, amount, current_price, account_id=DEFAULT_ACCOUNT):
+        """Πουλάει ένα coin"""
+        return self.execute('sell', coin_name, amount, current_price, account_id)
+    
+    def execute(self, side, coin_name, amount, current_price, account_id=DEFAULT_ACCOUNT):
+        """Ένα order ως ένα σειριακό write transaction (BEGIN IMMEDIATE).
+        
+        Ο έλεγχος του balance/των coins και όλα τα writes γίνονται με το write
+        lock ήδη πιασμένο, οπότε δύο ταυτόχρονα orders δεν ξοδεύουν τα ίδια
+        χρήματα. Σε SQLITE_BUSY όλο το order ξανατρέχει από την αρχή.
+        """
+        if not amount or amount <= 0 or not current_price or current_price <= 0:
+            return {'success': False, 'message': 'Amount and price must be positive'}
+        if self.order_queue is not None:
+            return self.order_queue.submit(side, coin_name, amount, current_price, account_id).result()
+        
+        def run():
+            with transaction(self.db_path, immediate=True) as conn:
+                return self._execute(conn, side, coin_name, amount, current_price, account_id)
         
+        return with_retries(run)
+    
+    def _execute(self, conn, side, coin_name, amount, current_price, account_id=DEFAULT_ACCOUNT):
+        if side == 'buy':
+            return self._buy(conn, coin_name, amount, current_price, account_id)
+        return self._sell(conn, coin_name, amount, current_price, account_id)
+    
+    def _buy(self, conn, coin_name, amount, current_price, account_id):
+        """Η αγορά μέσα σε ένα ανοιχτό transaction"""
         total_cost = amount * current_price
-        balance = self.get_balance()
         
+        # Το get_balance() διαβάζει από την ίδια σύνδεση του thread,
+        # μέσα στο ίδιο transaction
+        c = conn.cursor()
+        balance = self.get_balance(account_id)
+        
+        if balance is None:
+            return {'success': False, 'message': 'Account not found'}
         if total_cost > balance:
-            conn.close()
             return {'success': False, 'message': 'Insufficient funds'}
         
         # Ενημέρωση portfolio
-        c.execute('SELECT amount, avg_buy_price FROM portfolio WHERE coin_name = ?', (coin_name,))
+        c.execute('SELECT amount, avg_buy_price FROM portfolio WHERE account_id = ? AND coin_name = ?',
+                  (account_id, coin_name))
         existing = c.fetchone()
         
         if existing:
@@ -113,27 +365,29 @@ class TradingBot:
             c.execute('''
                 UPDATE portfolio 
                 SET amount = ?, avg_buy_price = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE coin_name = ?
-            ''', (new_amount, new_avg, coin_name))
+                WHERE account_id = ? AND coin_name = ?
+            ''', (new_amount, new_avg, account_id, coin_name))
         else:
             # Νέο coin
             c.execute('''
-                INSERT INTO portfolio (coin_name, amount, avg_buy_price)
-                VALUES (?, ?, ?)
-            ''', (coin_name, amount, current_price))
+                INSERT INTO portfolio (account_id, coin_name, amount, avg_buy_price)
+                VALUES (?, ?, ?, ?)
+            ''', (account_id, coin_name, amount, current_price))
         
         # Καταγραφή συναλλαγής
         c.execute('''
-            INSERT INTO transactions (type, coin_name, amount, price, total)
-            VALUES (?, ?, ?, ?, ?)
-        ''', ('buy', coin_name, amount, current_price, total_cost))
+            INSERT INTO transactions (account_id, type, coin_name, amount, price, total)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (account_id, 'buy', coin_name, amount, current_price, total_cost))
+        trade_id = c.lastrowid
         
         # Ενημέρωση balance
         new_balance = balance - total_cost
-        c.execute('UPDATE balance SET usd_balance = ?, updated_at = CURRENT_TIMESTAMP', (new_balance,))
+        c.execute('UPDATE balance SET usd_balance = ?, updated_at = CURRENT_TIMESTAMP WHERE account_id = ?',
+                  (new_balance, account_id))
         
-        conn.commit()
-        conn.close()
+        position = (new_amount, new_avg) if existing else (amount, current_price)
+        self._trade_committed(trade_id, account_id, 'buy', coin_name, amount, current_price, position, new_balance)
         
         return {
             'success': True,
@@ -142,48 +396,51 @@ class TradingBot:
             'total_cost': total_cost
         }
     
-    def sell_coin(self, coin_name, amount, current_price):
-        """Πουλάει ένα coin"""
-        conn = sqlite3.connect(self.db_path)
+    def _sell(self, conn, coin_name, amount, current_price, account_id):
+        """Η πώληση μέσα σε ένα ανοιχτό transaction"""
         c = conn.cursor()
         
         # Έλεγχος αν υπάρχει το coin
-        c.execute('SELECT amount, avg_buy_price FROM portfolio WHERE coin_name = ?', (coin_name,))
+        c.execute('SELECT amount, avg_buy_price FROM portfolio WHERE account_id = ? AND coin_name = ?',
+                  (account_id, coin_name))
         existing = c.fetchone()
         
         if not existing or existing[0] < amount:
-            conn.close()
             return {'success': False, 'message': 'Insufficient coins'}
         
         old_amount, old_avg = existing
         total_value = amount * current_price
-        balance = self.get_balance()
+        balance = self.get_balance(account_id)
         
         # Ενημέρωση portfolio
         new_amount = old_amount - amount
         
         if new_amount == 0:
-            c.execute('DELETE FROM portfolio WHERE coin_name = ?', (coin_name,))
+            c.execute('DELETE FROM portfolio WHERE account_id = ? AND coin_name = ?', (account_id, coin_name))
         else:
-            c.execute('UPDATE portfolio SET amount = ?, updated_at = CURRENT_TIMESTAMP WHERE coin_name = ?', 
-                     (new_amount, coin_name))
+            c.execute('''
+                UPDATE portfolio SET amount = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE account_id = ? AND coin_name = ?
+            ''', (new_amount, account_id, coin_name))
+        
+        # Υπολογισμός profit/loss (αποθηκεύεται στη συναλλαγή για τα summaries)
+        cost_basis = amount * old_avg
+        profit_loss = total_value - cost_basis
         
         # Καταγραφή συναλλαγής
         c.execute('''
-            INSERT INTO transactions (type, coin_name, amount, price, total)
-            VALUES (?, ?, ?, ?, ?)
-        ''', ('sell', coin_name, amount, current_price, total_value))
+            INSERT INTO transactions (account_id, type, coin_name, amount, price, total, realized_pnl)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (account_id, 'sell', coin_name, amount, current_price, total_value, profit_loss))
+        trade_id = c.lastrowid
         
         # Ενημέρωση balance
         new_balance = balance + total_value
-        c.execute('UPDATE balance SET usd_balance = ?, updated_at = CURRENT_TIMESTAMP', (new_balance,))
+        c.execute('UPDATE balance SET usd_balance = ?, updated_at = CURRENT_TIMESTAMP WHERE account_id = ?',
+                  (new_balance, account_id))
         
-        # Υπολογισμός profit/loss
-        cost_basis = amount * old_avg
-        profit_loss = total_value - cost_basis
-        
-        conn.commit()
-        conn.close()
+        position = (new_amount, old_avg) if new_amount != 0 else (0, 0)
+        self._trade_committed(trade_id, account_id, 'sell', coin_name, amount, current_price, position, new_balance)
         
         return {
             'success': True,
@@ -193,35 +450,118 @@ class TradingBot:
             'profit_loss': profit_loss
         }
     
-    def get_transactions(self, limit=20):
-        """Επιστρέφει το ιστορικό συναλλαγών"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('''
-            SELECT type, coin_name, amount, price, total, timestamp
+    def _trade_committed(self, trade_id, account_id, side, coin_name, amount, price, position, balance):
+        """Ειδοποιεί τους listeners με τη νέα θέση και το balance μετά το commit"""
+        if not self.trade_listeners:
+            return
+        event = {
+            'type': side,
+            'id': trade_id,
+            'account': account_id,
+            'coin': coin_name,
+            'amount': amount,
+            'price': price,
+            'position_amount': position[0],
+            'avg_price': position[1],
+            'balance': balance
+        }
+        on_commit(lambda: self._notify(event), self.db_path)
+    
+    def get_transactions(self, limit=TRANSACTIONS_PAGE, account_id=DEFAULT_ACCOUNT, before=None,
+                         coin_name=None, side=None, start=None, end=None):
+        """Επιστρέφει το ιστορικό συναλλαγών, νεότερο πρώτα.
+        
+        Keyset pagination: before = (timestamp, id) της τελευταίας συναλλαγής
+        της προηγούμενης σελίδας (βλ. transaction_cursor). Κάθε σελίδα είναι
+        ένα range scan στο covering index, όσο βαθιά κι αν είναι - σε αντίθεση
+        με το OFFSET που διαβάζει όλες τις προηγούμενες γραμμές.
+        """
+        conditions = ['account_id = ?']
+        params = [account_id]
+        if coin_name:
+            conditions.append('coin_name = ?')
+            params.append(coin_name)
+        if side:
+            conditions.append('type = ?')
+            params.append(side)
+        if start:
+            conditions.append('timestamp >= ?')
+            params.append(start)
+        if end:
+            conditions.append('timestamp <= ?')
+            params.append(end)
+        if before:
+            conditions.append('(timestamp, id) < (?, ?)')
+            params.extend(before)
+        
+        c = get_connection(self.db_path).execute(f'''
+            SELECT id, type, coin_name, amount, price, total, realized_pnl, timestamp
             FROM transactions
-            ORDER BY timestamp DESC
+            WHERE {' AND '.join(conditions)}
+            ORDER BY timestamp DESC, id DESC
             LIMIT ?
-        ''', (limit,))
+        ''', params + [limit])
         
         transactions = c.fetchall()
-        conn.close()
         
         result = []
         for t in transactions:
             result.append({
-                'type': t[0],
-                'coin': t[1],
-                'amount': t[2],
-                'price': t[3],
-                'total': t[4],
-                'timestamp': t[5]
+                'id': t[0],
+                'type': t[1],
+                'coin': t[2],
+                'amount': t[3],
+                'price': t[4],
+                'total': t[5],
+                'realized_pnl': t[6],
+                'timestamp': t[7]
+            })
+        return result
+    
+    def get_transaction_summary(self, account_id=DEFAULT_ACCOUNT, start=None, end=None):
+        """Ανά coin: πλήθος, όγκος αγορών/πωλήσεων και realized P&L (από το idx_transactions_coin)"""
+        conditions = ['account_id = ?']
+        params = [account_id]
+        if start:
+            conditions.append('timestamp >= ?')
+            params.append(start)
+        if end:
+            conditions.append('timestamp <= ?')
+            params.append(end)
+        
+        c = get_connection(self.db_path).execute(f'''
+            SELECT coin_name,
+                   SUM(type = 'buy'), SUM(type = 'sell'),
+                   TOTAL(CASE WHEN type = 'buy' THEN amount END),
+                   TOTAL(CASE WHEN type = 'sell' THEN amount END),
+                   TOTAL(CASE WHEN type = 'buy' THEN total END),
+                   TOTAL(CASE WHEN type = 'sell' THEN total END),
+                   TOTAL(realized_pnl)
+            FROM transactions
+            WHERE {' AND '.join(conditions)}
+            GROUP BY coin_name
+            ORDER BY coin_name
+        ''', params)
+        
+        result = []
+        for row in c.fetchall():
+            result.append({
+                'coin': row[0],
+                'buys': row[1],
+                'sells': row[2],
+                'bought': row[3],
+                'sold': row[4],
+                'buy_volume': row[5],
+                'sell_volume': row[6],
+                'realized_pnl': row[7]
             })
         return result
     
-    def get_portfolio_value(self, current_prices):
+    def get_portfolio_value(self, current_prices=None, account_id=DEFAULT_ACCOUNT):
         """Υπολογίζει τη συνολική αξία του portfolio"""
-        portfolio = self.get_portfolio()
+        if current_prices is None:
+            current_prices = {coin_name: price for coin_name, price, _ in price_board.get_latest_prices()}
+        portfolio = self.get_portfolio(account_id)
         total_value = 0
         holdings = []
         
@@ -246,4 +586,217 @@ class TradingBot:
         return {
             'total_value': total_value,
             'holdings': holdings
-        }
\ No newline at end of file
+        }
+
+def migrate_accounts(conn):
+    """Οι πίνακες του ενός λογαριασμού (χωρίς account_id) γίνονται *_v1.
+    
+    Το portfolio είχε UNIQUE(coin_name) και το balance μία γραμμή, που δεν
+    αλλάζουν με ALTER TABLE· το transactions απλά παίρνει τη στήλη
+    account_id (όλες οι παλιές συναλλαγές ανήκουν στον DEFAULT_ACCOUNT).
+    Επιστρέφει τα ονόματα των πινάκων που πρέπει να αντιγραφούν.
+    """
+    def columns(table):
+        return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+    
+    legacy = []
+    for table in ('portfolio', 'balance'):
+        existing = columns(table)
+        if existing and 'account_id' not in existing:
+            conn.execute(f'ALTER TABLE {table} RENAME TO {table}_v1')
+            legacy.append(table)
+    existing = columns('transactions')
+    if existing and 'account_id' not in existing:
+        conn.execute(f'ALTER TABLE transactions ADD COLUMN account_id INTEGER NOT NULL DEFAULT {DEFAULT_ACCOUNT}')
+    return legacy
+
+def migrate_realized_pnl(conn):
+    """Προσθέτει τη στήλη realized_pnl και τη συμπληρώνει για τις παλιές πωλήσεις.
+    
+    Ξαναπαίζει τις συναλλαγές κάθε λογαριασμού με τη σειρά του id, με τον ίδιο
+    μέσο όρο κόστους που χρησιμοποιεί το _buy.
+    """
+    if 'realized_pnl' in {row[1] for row in conn.execute('PRAGMA table_info(transactions)')}:
+        return
+    conn.execute('ALTER TABLE transactions ADD COLUMN realized_pnl REAL')
+    
+    positions = {}
+    updates = []
+    for trade_id, account_id, side, coin_name, amount, price, total in conn.execute('''
+        SELECT id, account_id, type, coin_name, amount, price, total FROM transactions ORDER BY id
+    ''').fetchall():
+        held, avg = positions.get((account_id, coin_name), (0, 0))
+        if side == 'buy':
+            positions[(account_id, coin_name)] = (held + amount, (held * avg + amount * price) / (held + amount))
+        else:
+            updates.append((total - amount * avg, trade_id))
+            positions[(account_id, coin_name)] = (held - amount, avg) if held - amount > 0 else (0, 0)
+    conn.executemany('UPDATE transactions SET realized_pnl = ? WHERE id = ?', updates)
+    if updates:
+        print(f"✅ Backfilled realized P&L for {len(updates)} sells")
+
+def transaction_cursor(trade):
+    """Ο cursor της επόμενης σελίδας: '<timestamp>,<id>' της τελευταίας συναλλαγής"""
+    return f"{trade['timestamp']},{trade['id']}"
+
+def parse_transaction_cursor(value):
+    """'<timestamp>,<id>' -> (timestamp, id) - ValueError αν δεν είναι έγκυρος"""
+    timestamp, _, trade_id = value.rpartition(',')
+    if not timestamp:
+        raise ValueError(f"Invalid cursor: {value!r}")
+    return timestamp, int(trade_id)
+
+def copy_legacy_account(conn, legacy):
+    """Αντιγράφει τον παλιό μοναδικό λογαριασμό στον DEFAULT_ACCOUNT"""
+    if 'portfolio' in legacy:
+        conn.execute('''
+            INSERT INTO portfolio (account_id, coin_name, amount, avg_buy_price, created_at, updated_at)
+            SELECT ?, coin_name, amount, avg_buy_price, created_at, updated_at FROM portfolio_v1
+        ''', (DEFAULT_ACCOUNT,))
+        conn.execute('DROP TABLE portfolio_v1')
+    if 'balance' in legacy:
+        # Το balance διαβαζόταν πάντα από τη γραμμή με το μεγαλύτερο id
+        conn.execute('''
+            INSERT INTO balance (account_id, usd_balance, updated_at)
+            SELECT ?, usd_balance, updated_at FROM balance_v1 ORDER BY id DESC LIMIT 1
+        ''', (DEFAULT_ACCOUNT,))
+        conn.execute('DROP TABLE balance_v1')
+    print(f"✅ Migrated the trading account to account {DEFAULT_ACCOUNT}")
+
+def check_ledger(bot, initial_balance, successes):
+    """Έλεγχος των invariants: balance και holdings κάθε λογαριασμού ίσα με τα transactions"""
+    from benchtools import check
+    
+    conn = get_connection(bot.db_path)
+    flows = conn.execute('''
+        SELECT account_id, coin_name,
+               SUM(CASE WHEN type = 'buy' THEN amount ELSE -amount END),
+               SUM(CASE WHEN type = 'buy' THEN -total ELSE total END),
+               COUNT(*)
+        FROM transactions
+        GROUP BY account_id, coin_name
+    ''').fetchall()
+    holdings = {(account_id, coin_name): amount for account_id, coin_name, amount in
+                conn.execute('SELECT account_id, coin_name, amount FROM portfolio')}
+    balances = dict(conn.execute('SELECT account_id, usd_balance FROM balance'))
+    
+    expected = dict.fromkeys(balances, initial_balance)
+    for account_id, coin_name, amount, cash, _ in flows:
+        expected[account_id] += cash
+        held = holdings.get((account_id, coin_name), 0)
+        check(abs(held - amount) <= 1e-9 * max(1, abs(amount)),
+              f"account {account_id} holds {held} {coin_name}, transactions say {amount}")
+        check(held >= 0, f"account {account_id} holds {held} {coin_name}")
+    for account_id, balance in balances.items():
+        check(abs(balance - expected[account_id]) <= 1e-6 * max(1, initial_balance),
+              f"account {account_id} balance {balance}, transactions say {expected[account_id]}")
+        check(balance >= 0, f"account {account_id} balance {balance}")
+    recorded = sum(row[4] for row in flows)
+    check(recorded == successes, f"{recorded} transactions for {successes} filled orders")
+
+def benchmark(orders=5000, threads=32, group_commit=False, accounts=100, initial_balance=100000):
+    """Χιλιάδες ταυτόχρονα buy/sell orders από πολλούς λογαριασμούς σε μια προσωρινή βάση"""
+    directory = tempfile.mkdtemp(prefix='trading-bench-')
+    bot = TradingBot(os.path.join(directory, 'bench.db'), group_commit=group_commit)
+    bot.update_balance(initial_balance)
+    account_ids = [DEFAULT_ACCOUNT] + [bot.create_account(f'bench-{i}', initial_balance)
+                                       for i in range(accounts - 1)]
+    prices = {'bitcoin': 60000, 'ethereum': 3000, 'solana': 150, 'cardano': 0.5, 'dogecoin': 0.1}
+    rng = random.Random(1)
+    plan = []
+    for _ in range(orders):
+        coin_name = rng.choice(list(prices))
+        price = prices[coin_name] * rng.uniform(0.98, 1.02)
+        side = 'buy' if rng.random() < 0.6 else 'sell'
+        plan.append((side, coin_name, rng.uniform(10, 500) / price, price, rng.choice(account_ids)))
+    
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(threads) as executor:
+            results = list(executor.map(lambda order: bot.execute(*order), plan))
+        elapsed = time.perf_counter() - start
+        successes = sum(result['success'] for result in results)
+        check_ledger(bot, initial_balance, successes)
+    finally:
+        bot.stop()
+        shutil.rmtree(directory, ignore_errors=True)
+    
+    mode = 'group commit' if group_commit else 'one transaction per order'
+    extra = f", {bot.order_queue.batches} commits" if group_commit else ''
+    print(f"⏱️ {orders} orders from {threads} threads on {accounts} accounts ({mode}): {elapsed:.2f}s, "
+          f"{orders / elapsed:.0f} orders/s, {successes} filled{extra} - ledger OK ✅")
+
+def benchmark_history(rows=1000000, pages=200):
+    """Σελίδα 1 vs βαθιά σελίδα σε ένα μεγάλο ιστορικό συναλλαγών (keyset vs OFFSET)"""
+    from benchtools import check
+    
+    directory = tempfile.mkdtemp(prefix='trading-history-')
+    bot = TradingBot(os.path.join(directory, 'history.db'))
+    coins = ['bitcoin', 'ethereum', 'solana', 'cardano', 'dogecoin']
+    rng = random.Random(1)
+    start = time.time() - rows
+    
+    def seed():
+        # Ένα trade το δευτερόλεπτο· κάθε δεύτερο sell, με τυχαίο realized P&L
+        for i in range(rows):
+            side = 'buy' if i % 2 == 0 else 'sell'
+            amount = rng.uniform(0.01, 1)
+            price = rng.uniform(100, 1000)
+            yield (DEFAULT_ACCOUNT, side, coins[i % len(coins)], amount, price, amount * price,
+                   rng.uniform(-10, 10) if side == 'sell' else None,
+                   datetime.fromtimestamp(start + i, timezone.utc).strftime('%Y-%m-%d %H:%M:%S'))
+    
+    def timed(run):
+        began = time.perf_counter()
+        for _ in range(pages):
+            result = run()
+        return (time.perf_counter() - began) / pages * 1000, result
+    
+    try:
+        began = time.perf_counter()
+        with transaction(bot.db_path, immediate=True) as conn:
+            conn.executemany('''
+                INSERT INTO transactions (account_id, type, coin_name, amount, price, total, realized_pnl, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', seed())
+        print(f"📥 Seeded {rows} transactions in {time.perf_counter() - began:.1f}s")
+        
+        conn = get_connection(bot.db_path)
+        deep = rows - rows // 10
+        cursor = conn.execute('SELECT timestamp, id FROM transactions WHERE id = ?', (rows - deep + 1,)).fetchone()
+        first_ms, first = timed(lambda: bot.get_transactions())
+        keyset_ms, page = timed(lambda: bot.get_transactions(before=cursor))
+        coin_ms, _ = timed(lambda: bot.get_transactions(before=cursor, coin_name='solana'))
+        offset_ms, offset_page = timed(lambda: conn.execute('''
+            SELECT id FROM transactions WHERE account_id = ?
+            ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?
+        ''', (DEFAULT_ACCOUNT, TRANSACTIONS_PAGE, deep)).fetchall())
+        summary_ms, _ = timed(lambda: bot.get_transaction_summary())
+        check([t['id'] for t in page] == [row[0] for row in offset_page], "keyset and OFFSET pages differ")
+        
+        plan = ' '.join(row[-1] for row in conn.execute('''
+            EXPLAIN QUERY PLAN SELECT id, type, coin_name, amount, price, total, realized_pnl, timestamp
+            FROM transactions WHERE account_id = ? AND (timestamp, id) < (?, ?)
+            ORDER BY timestamp DESC, id DESC LIMIT ?
+        ''', (DEFAULT_ACCOUNT, *cursor, TRANSACTIONS_PAGE)))
+        check('COVERING INDEX' in plan and 'TEMP B-TREE' not in plan, f"unexpected query plan: {plan}")
+    finally:
+        bot.stop()
+        shutil.rmtree(directory, ignore_errors=True)
+    
+    print(f"⏱️ Page 1: {first_ms:.3f}ms | page {deep // TRANSACTIONS_PAGE} (keyset): {keyset_ms:.3f}ms | "
+          f"same page with coin filter: {coin_ms:.3f}ms | same page with OFFSET: {offset_ms:.1f}ms")
+    print(f"⏱️ Per-coin summary over {rows} transactions: {summary_ms:.0f}ms")
+    print(f"🔍 {plan}")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and args[0] == 'bench':
+        orders = int(args[1]) if len(args) > 1 else 5000
+        threads = int(args[2]) if len(args) > 2 else 32
+        benchmark(orders, threads, group_commit=False)
+        benchmark(orders, threads, group_commit=True)
+    elif args and args[0] == 'history-bench':
+        benchmark_history(int(args[1]) if len(args) > 1 else 1000000)
+    else:
+        print("Usage: python trading.py bench [orders] [threads] | history-bench [rows]")
\ No newline at end of file